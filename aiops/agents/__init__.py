@@ -1,35 +1,44 @@
-"""AI Agents for DevOps automation."""
+"""AI Agents for DevOps automation.
 
-from aiops.agents.base_agent import BaseAgent
-from aiops.agents.code_reviewer import CodeReviewAgent
-from aiops.agents.test_generator import TestGeneratorAgent
-from aiops.agents.log_analyzer import LogAnalyzerAgent
-from aiops.agents.cicd_optimizer import CICDOptimizerAgent
-from aiops.agents.doc_generator import DocGeneratorAgent
-from aiops.agents.performance_analyzer import PerformanceAnalyzerAgent
-from aiops.agents.anomaly_detector import AnomalyDetectorAgent
-from aiops.agents.auto_fixer import AutoFixerAgent
-from aiops.agents.intelligent_monitor import IntelligentMonitorAgent
-from aiops.agents.security_scanner import SecurityScannerAgent
-from aiops.agents.dependency_analyzer import DependencyAnalyzerAgent
-from aiops.agents.code_quality import CodeQualityAgent
-from aiops.agents.k8s_optimizer import KubernetesOptimizerAgent
-from aiops.agents.cost_optimizer import CostOptimizerAgent
-from aiops.agents.disaster_recovery import DisasterRecoveryAgent
-from aiops.agents.chaos_engineer import ChaosEngineerAgent
-from aiops.agents.db_query_analyzer import DatabaseQueryAnalyzerAgent
-from aiops.agents.config_drift_detector import ConfigDriftDetectorAgent
-from aiops.agents.container_security import ContainerSecurityAgent
-from aiops.agents.iac_validator import IaCValidatorAgent
-from aiops.agents.secret_scanner import SecretScannerAgent
-from aiops.agents.service_mesh_analyzer import ServiceMeshAnalyzerAgent
-from aiops.agents.sla_monitor import SLAMonitorAgent
-from aiops.agents.api_performance_analyzer import APIPerformanceAnalyzerAgent
-# New agents
-from aiops.agents.incident_response import IncidentResponseAgent
-from aiops.agents.compliance_checker import ComplianceCheckerAgent
-from aiops.agents.migration_planner import MigrationPlannerAgent
-from aiops.agents.release_manager import ReleaseManagerAgent
+Agents are imported lazily on first attribute access (PEP 562) so that
+importing one agent does not pay the start-up cost of all of them.
+"""
+
+import importlib
+from typing import Any, Dict, List
+
+_LAZY: Dict[str, str] = {
+    "BaseAgent": "aiops.agents.base_agent",
+    "CodeReviewAgent": "aiops.agents.code_reviewer",
+    "TestGeneratorAgent": "aiops.agents.test_generator",
+    "LogAnalyzerAgent": "aiops.agents.log_analyzer",
+    "CICDOptimizerAgent": "aiops.agents.cicd_optimizer",
+    "DocGeneratorAgent": "aiops.agents.doc_generator",
+    "PerformanceAnalyzerAgent": "aiops.agents.performance_analyzer",
+    "AnomalyDetectorAgent": "aiops.agents.anomaly_detector",
+    "AutoFixerAgent": "aiops.agents.auto_fixer",
+    "IntelligentMonitorAgent": "aiops.agents.intelligent_monitor",
+    "SecurityScannerAgent": "aiops.agents.security_scanner",
+    "DependencyAnalyzerAgent": "aiops.agents.dependency_analyzer",
+    "CodeQualityAgent": "aiops.agents.code_quality",
+    "KubernetesOptimizerAgent": "aiops.agents.k8s_optimizer",
+    "CostOptimizerAgent": "aiops.agents.cost_optimizer",
+    "DisasterRecoveryAgent": "aiops.agents.disaster_recovery",
+    "ChaosEngineerAgent": "aiops.agents.chaos_engineer",
+    "DatabaseQueryAnalyzerAgent": "aiops.agents.db_query_analyzer",
+    "ConfigDriftDetectorAgent": "aiops.agents.config_drift_detector",
+    "ContainerSecurityAgent": "aiops.agents.container_security",
+    "IaCValidatorAgent": "aiops.agents.iac_validator",
+    "SecretScannerAgent": "aiops.agents.secret_scanner",
+    "ServiceMeshAnalyzerAgent": "aiops.agents.service_mesh_analyzer",
+    "SLAMonitorAgent": "aiops.agents.sla_monitor",
+    "APIPerformanceAnalyzerAgent": "aiops.agents.api_performance_analyzer",
+    # New agents
+    "IncidentResponseAgent": "aiops.agents.incident_response",
+    "ComplianceCheckerAgent": "aiops.agents.compliance_checker",
+    "MigrationPlannerAgent": "aiops.agents.migration_planner",
+    "ReleaseManagerAgent": "aiops.agents.release_manager",
+}
 
 __all__ = [
     "BaseAgent",
@@ -63,3 +72,18 @@ __all__ = [
     "MigrationPlannerAgent",
     "ReleaseManagerAgent",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the agent module on first access and cache the attribute."""
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    obj = getattr(importlib.import_module(module_name), name)
+    globals()[name] = obj
+    return obj
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
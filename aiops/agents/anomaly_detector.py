@@ -1,7 +1,10 @@
 """Anomaly Detector Agent - AI-powered anomaly detection for systems and metrics."""
 
-from typing import List, Dict, Any, Optional
+import random
+from typing import AsyncIterator, Callable, Final, List, Dict, Any, Optional, Tuple
+from collections import OrderedDict, defaultdict
 from datetime import datetime
+import numpy as np
 from pydantic import BaseModel, Field
 from aiops.agents.base_agent import BaseAgent
 from aiops.core.logger import get_logger
@@ -9,6 +12,178 @@ from aiops.core.logger import get_logger
 logger = get_logger(__name__)
 
 
+# Static prompts are module constants so every call sends a byte-identical
+# prefix, which lets provider-side prefix caching reuse it.
+_ANOMALY_SYSTEM_PROMPT: Final[str] = """You are an expert SRE and anomaly detection specialist.
+
+Detect anomalies by analyzing:
+
+1. **Performance Anomalies**:
+   - Latency spikes
+   - Throughput degradation
+   - Response time increases
+
+2. **Error Rate Anomalies**:
+   - Sudden error increases
+   - New error types
+   - Error pattern changes
+
+3. **Resource Anomalies**:
+   - CPU/Memory spikes
+   - Disk space issues
+   - Network saturation
+
+4. **Behavioral Anomalies**:
+   - Traffic pattern changes
+   - Unusual user behavior
+   - Deployment impact
+
+5. **Security Anomalies**:
+   - Suspicious access patterns
+   - Failed authentication spikes
+   - Unusual API calls
+
+Detection Criteria:
+- Compare against baseline (if available)
+- Identify statistical outliers
+- Recognize known anomaly patterns
+- Consider temporal context (time of day, day of week)
+- Assess business impact
+
+Provide:
+- Confidence level for each detection
+- Clear description of the anomaly
+- Potential root causes
+- Recommended actions
+- Business impact assessment
+"""
+
+_ANOMALY_USER_PROMPT_HEADER: Final[str] = """Analyze the following metrics for anomalies.
+
+Detect and report:
+1. All anomalies with confidence scores
+2. Severity and category for each
+3. Deviation from baseline
+4. Potential impacts
+5. Recommended actions
+
+"""
+
+_TIME_SERIES_SYSTEM_PROMPT: Final[str] = """You are a time series analysis expert.
+
+Detect anomalies in time series data:
+- Sudden spikes or drops
+- Trend changes
+- Seasonality violations
+- Level shifts
+- Pattern breaks
+
+Use statistical reasoning to identify outliers.
+"""
+
+_TIME_SERIES_USER_PROMPT_HEADER: Final[str] = """Analyze this time series for anomalies.
+Identify anomalous points with timestamps and severity.
+
+"""
+
+_FAILURE_PREDICTION_SYSTEM_PROMPT: Final[str] = """You are an expert at predicting system failures.
+
+Analyze metrics to predict:
+- Imminent failures
+- Degradation trends
+- Resource exhaustion
+- Cascading failures
+
+Use historical incident data to identify warning patterns.
+Provide probability and timeframe for predictions.
+"""
+
+_FAILURE_PREDICTION_USER_PROMPT_HEADER: Final[str] = """Predict potential failures based on these metrics.
+
+Provide:
+1. Predicted failure scenarios
+2. Probability (0-100%)
+3. Estimated time to failure
+4. Early warning indicators
+5. Preventive actions
+
+"""
+
+# Modified z-score above which a point is treated as a statistical outlier
+_OUTLIER_Z_THRESHOLD: Final[float] = 3.5
+
+
+def _numeric_outliers(values: np.ndarray, threshold: float = _OUTLIER_Z_THRESHOLD) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flag outliers with the median/MAD modified z-score.
+
+    Args:
+        values: 1-D float array of observations
+        threshold: Absolute modified z-score that marks an outlier
+
+    Returns:
+        Tuple of (outlier indices, modified z-scores for every point)
+    """
+    median = np.median(values)
+    deviations = np.abs(values - median)
+    mad = np.median(deviations)
+
+    if mad > 0:
+        scores = 0.6745 * (values - median) / mad
+    else:
+        # More than half the points are identical; fall back to the mean
+        # absolute deviation so a lone spike is still detected.
+        mean_ad = deviations.mean()
+        if mean_ad == 0:
+            return np.empty(0, dtype=np.intp), np.zeros_like(values)
+        scores = (values - median) / (1.253314 * mean_ad)
+
+    return np.flatnonzero(np.abs(scores) >= threshold), scores
+
+
+# Prompt budget for time series points; the most recent points are always kept
+_MAX_PROMPT_POINTS: Final[int] = 100
+_RECENT_POINTS: Final[int] = 20
+
+
+def _sample_indices(count: int, limit: int = _MAX_PROMPT_POINTS, recent: int = _RECENT_POINTS) -> List[int]:
+    """
+    Choose which of count points to show in a prompt.
+
+    Keeps the last `recent` points and a uniform random sample of the older
+    ones, returned in original order. The sample is seeded by count so the
+    same series always yields the same prompt.
+    """
+    if count <= limit:
+        return list(range(count))
+
+    history = random.Random(count).sample(range(count - recent), limit - recent)
+    return sorted(history) + list(range(count - recent, count))
+
+
+def _point_value(point: Any) -> float:
+    """Extract the numeric value from a time series data point."""
+    if isinstance(point, dict):
+        point = point["value"]
+    return float(point)
+
+
+def _format_scalar_metric(key: str, value: Any) -> str:
+    return f"- {key}: {value}\n"
+
+
+def _format_nested_metric(key: str, value: Dict[str, Any]) -> str:
+    return f"\n{key}:\n" + "".join(f"  - {sub_key}: {sub_value}\n" for sub_key, sub_value in value.items())
+
+
+# Formatter lookup by exact type; anything not listed is formatted inline
+_METRIC_FORMATTERS: Final[Dict[type, Callable[[str, Any], str]]] = {
+    dict: _format_nested_metric,
+    OrderedDict: _format_nested_metric,
+    defaultdict: _format_nested_metric,
+}
+
+
 class Anomaly(BaseModel):
     """Represents a detected anomaly."""
 
@@ -78,60 +253,124 @@ class AnomalyDetectorAgent(BaseAgent):
 
         except Exception as e:
             logger.error(f"Anomaly detection failed: {e}")
-            return AnomalyDetectionResult(
-                total_anomalies=0,
-                critical_count=0,
-                anomalies=[],
-                summary=f"Detection failed: {str(e)}",
-                recommendations=[],
-                potential_impacts=[],
-            )
+            return self._failed_result(e)
 
-    def _create_system_prompt(self) -> str:
-        """Create system prompt for anomaly detection."""
-        return """You are an expert SRE and anomaly detection specialist.
+    async def execute_stream(
+        self,
+        metrics: Dict[str, Any],
+        baseline: Optional[Dict[str, Any]] = None,
+        context: Optional[str] = None,
+        critical_budget: Optional[int] = None,
+    ) -> AsyncIterator[Anomaly]:
+        """
+        Detect anomalies, yielding each one as soon as the model finishes it.
 
-Detect anomalies by analyzing:
+        Args:
+            metrics: Current metrics data
+            baseline: Baseline/historical metrics for comparison
+            context: Additional context about the system
+            critical_budget: Stop generation once this many critical
+                anomalies have been yielded
 
-1. **Performance Anomalies**:
-   - Latency spikes
-   - Throughput degradation
-   - Response time increases
+        Yields:
+            Anomaly objects in the order the model reports them
+        """
+        logger.info("Streaming anomaly detection for system metrics")
 
-2. **Error Rate Anomalies**:
-   - Sudden error increases
-   - New error types
-   - Error pattern changes
+        stream = self._generate_structured_stream(
+            prompt=self._create_user_prompt(metrics, baseline, context),
+            system_prompt=self._create_system_prompt(),
+            schema=AnomalyDetectionResult,
+        )
+        items = self._stream_list_items(stream, "anomalies", Anomaly)
+        critical = 0
 
-3. **Resource Anomalies**:
-   - CPU/Memory spikes
-   - Disk space issues
-   - Network saturation
+        try:
+            async for anomaly in items:
+                yield anomaly
+                if anomaly.severity == "critical":
+                    critical += 1
+                    if critical_budget is not None and critical >= critical_budget:
+                        logger.info(f"Critical budget of {critical_budget} reached, stopping stream")
+                        return
+        finally:
+            await items.aclose()
+
+    async def execute_batch(
+        self,
+        batch: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[str]]],
+    ) -> List[AnomalyDetectionResult]:
+        """
+        Detect anomalies for many metric groups in one LLM submission.
 
-4. **Behavioral Anomalies**:
-   - Traffic pattern changes
-   - Unusual user behavior
-   - Deployment impact
+        Args:
+            batch: List of (metrics, baseline, context) tuples
 
-5. **Security Anomalies**:
-   - Suspicious access patterns
-   - Failed authentication spikes
-   - Unusual API calls
+        Returns:
+            One AnomalyDetectionResult per batch item, in input order
+        """
+        logger.info(f"Detecting anomalies in batch of {len(batch)} metric groups")
 
-Detection Criteria:
-- Compare against baseline (if available)
-- Identify statistical outliers
-- Recognize known anomaly patterns
-- Consider temporal context (time of day, day of week)
-- Assess business impact
+        system_prompt = self._create_system_prompt()
+        prompts = [
+            self._create_user_prompt(metrics, baseline, context)
+            for metrics, baseline, context in batch
+        ]
 
-Provide:
-- Confidence level for each detection
-- Clear description of the anomaly
-- Potential root causes
-- Recommended actions
-- Business impact assessment
-"""
+        try:
+            responses = await self._generate_structured_batch(
+                prompts=prompts,
+                system_prompt=system_prompt,
+                schema=AnomalyDetectionResult,
+            )
+        except Exception as e:
+            logger.error(f"Batch anomaly detection failed: {e}")
+            return [self._failed_result(e) for _ in batch]
+
+        results = []
+        for response in responses:
+            if isinstance(response, Exception):
+                logger.error(f"Anomaly detection failed: {response}")
+                results.append(self._failed_result(response))
+            else:
+                results.append(response)
+
+        logger.info(
+            f"Batch anomaly detection completed: "
+            f"{sum(r.total_anomalies for r in results)} anomalies across {len(results)} groups"
+        )
+        return results
+
+    async def execute_many(self, items: List[Dict[str, Any]]) -> List[AnomalyDetectionResult]:
+        """
+        Run independent detections concurrently.
+
+        Args:
+            items: Keyword arguments for each execute() call
+
+        Returns:
+            One AnomalyDetectionResult per item, in input order
+        """
+        results = await super().execute_many(items)
+        return [
+            self._failed_result(r) if isinstance(r, Exception) else r
+            for r in results
+        ]
+
+    def _failed_result(self, error: Exception) -> AnomalyDetectionResult:
+        """Build an empty result for a failed detection."""
+        return AnomalyDetectionResult(
+            total_anomalies=0,
+            critical_count=0,
+            anomalies=[],
+            summary=f"Detection failed: {str(error)}",
+            recommendations=[],
+            potential_impacts=[],
+        )
+
+    def _create_system_prompt(self) -> str:
+        """Create system prompt for anomaly detection."""
+        return _ANOMALY_SYSTEM_PROMPT
 
     def _create_user_prompt(
         self,
@@ -139,42 +378,27 @@ Provide:
         baseline: Optional[Dict[str, Any]] = None,
         context: Optional[str] = None,
     ) -> str:
-        """Create user prompt for anomaly detection."""
-        prompt = "Analyze the following metrics for anomalies:\n\n"
+        """Create user prompt for anomaly detection (static instructions first)."""
+        parts = [_ANOMALY_USER_PROMPT_HEADER]
 
         if context:
-            prompt += f"**System Context**: {context}\n\n"
+            parts.append(f"**System Context**: {context}\n\n")
 
-        prompt += "**Current Metrics**:\n"
-        prompt += self._format_metrics(metrics)
-        prompt += "\n"
+        parts.append("**Current Metrics**:\n")
+        parts.append(self._format_metrics(metrics))
 
         if baseline:
-            prompt += "**Baseline Metrics** (normal behavior):\n"
-            prompt += self._format_metrics(baseline)
-            prompt += "\n"
+            parts.append("\n**Baseline Metrics** (normal behavior):\n")
+            parts.append(self._format_metrics(baseline))
 
-        prompt += """Detect and report:
-1. All anomalies with confidence scores
-2. Severity and category for each
-3. Deviation from baseline
-4. Potential impacts
-5. Recommended actions
-"""
-
-        return prompt
+        return "".join(parts)
 
     def _format_metrics(self, metrics: Dict[str, Any]) -> str:
         """Format metrics for prompt."""
-        formatted = ""
-        for key, value in metrics.items():
-            if isinstance(value, dict):
-                formatted += f"\n{key}:\n"
-                for sub_key, sub_value in value.items():
-                    formatted += f"  - {sub_key}: {sub_value}\n"
-            else:
-                formatted += f"- {key}: {value}\n"
-        return formatted
+        return "".join(
+            _METRIC_FORMATTERS.get(type(value), _format_scalar_metric)(key, value)
+            for key, value in metrics.items()
+        )
 
     async def detect_time_series_anomalies(
         self,
@@ -184,6 +408,10 @@ Provide:
         """
         Detect anomalies in time series data.
 
+        Numeric series (plain numbers or dicts with a "value" key) are screened
+        locally with a robust z-score first; the LLM is only asked to explain
+        the flagged points, and is skipped entirely when none are found.
+
         Args:
             time_series_data: Time series data points
             metric_name: Name of the metric
@@ -193,36 +421,56 @@ Provide:
         """
         logger.info(f"Detecting anomalies in time series: {metric_name}")
 
-        system_prompt = """You are a time series analysis expert.
-
-Detect anomalies in time series data:
-- Sudden spikes or drops
-- Trend changes
-- Seasonality violations
-- Level shifts
-- Pattern breaks
-
-Use statistical reasoning to identify outliers.
-"""
-
-        user_prompt = f"""Analyze this time series for anomalies:
-
-**Metric**: {metric_name}
-
-**Data Points**:
-"""
-        for i, point in enumerate(time_series_data[:100]):  # Limit to avoid token overflow
-            user_prompt += f"  {i+1}. {point}\n"
-
-        if len(time_series_data) > 100:
-            user_prompt += f"\n... and {len(time_series_data) - 100} more data points\n"
-
-        user_prompt += "\nIdentify anomalous points with timestamps and severity."
+        try:
+            values = np.fromiter(
+                (_point_value(point) for point in time_series_data),
+                dtype=np.float64,
+                count=len(time_series_data),
+            )
+        except (KeyError, TypeError, ValueError):
+            values = None
+
+        parts = [_TIME_SERIES_USER_PROMPT_HEADER, f"**Metric**: {metric_name}\n\n"]
+
+        if values is not None and len(values):
+            outliers, scores = _numeric_outliers(values)
+            if not len(outliers):
+                logger.info(f"Time series analysis completed: no statistical outliers in {metric_name}")
+                return AnomalyDetectionResult(
+                    total_anomalies=0,
+                    critical_count=0,
+                    anomalies=[],
+                    summary=f"No statistical outliers found in {len(values)} data points",
+                    recommendations=[],
+                    potential_impacts=[],
+                )
+
+            # Only the flagged points go to the LLM, with their scores, so it
+            # explains the outliers instead of re-deriving them.
+            parts.append(
+                f"**Statistical Outliers** ({len(outliers)} of {len(values)} points, "
+                f"median {np.median(values):g}, |modified z-score| >= {_OUTLIER_Z_THRESHOLD}):\n"
+            )
+            shown = [outliers[i] for i in _sample_indices(len(outliers))]
+            if len(shown) < len(outliers):
+                parts.append(f"(sampled {len(shown)} of {len(outliers)} outliers, most recent kept)\n")
+            parts.extend(f"  {i+1}. {time_series_data[i]} (z={scores[i]:.2f})\n" for i in shown)
+        else:
+            shown = _sample_indices(len(time_series_data))
+            parts.append("**Data Points**:\n")
+            if len(shown) < len(time_series_data):
+                parts.append(
+                    f"(sampled {len(shown)} of {len(time_series_data)} points, "
+                    f"most recent {_RECENT_POINTS} kept; numbering is the original position)\n"
+                )
+            parts.extend(f"  {i+1}. {time_series_data[i]}\n" for i in shown)
+
+        user_prompt = "".join(parts)
 
         try:
             result = await self._generate_structured_response(
                 prompt=user_prompt,
-                system_prompt=system_prompt,
+                system_prompt=_TIME_SERIES_SYSTEM_PROMPT,
                 schema=AnomalyDetectionResult,
             )
 
@@ -231,14 +479,7 @@ Use statistical reasoning to identify outliers.
 
         except Exception as e:
             logger.error(f"Time series anomaly detection failed: {e}")
-            return AnomalyDetectionResult(
-                total_anomalies=0,
-                critical_count=0,
-                anomalies=[],
-                summary=f"Detection failed: {str(e)}",
-                recommendations=[],
-                potential_impacts=[],
-            )
+            return self._failed_result(e)
 
     async def predict_failures(
         self,
@@ -257,40 +498,16 @@ Use statistical reasoning to identify outliers.
         """
         logger.info("Predicting potential system failures")
 
-        system_prompt = """You are an expert at predicting system failures.
-
-Analyze metrics to predict:
-- Imminent failures
-- Degradation trends
-- Resource exhaustion
-- Cascading failures
-
-Use historical incident data to identify warning patterns.
-Provide probability and timeframe for predictions.
-"""
-
-        user_prompt = f"""Predict potential failures based on these metrics:
-
-**Current Metrics**:
-{self._format_metrics(metrics)}
-"""
+        parts = [_FAILURE_PREDICTION_USER_PROMPT_HEADER, "**Current Metrics**:\n", self._format_metrics(metrics)]
 
         if historical_incidents:
-            user_prompt += "\n**Historical Incidents**:\n"
-            for incident in historical_incidents[:10]:
-                user_prompt += f"- {incident}\n"
+            parts.append("\n**Historical Incidents**:\n")
+            parts.extend(f"- {incident}\n" for incident in historical_incidents[:10])
 
-        user_prompt += """
-Provide:
-1. Predicted failure scenarios
-2. Probability (0-100%)
-3. Estimated time to failure
-4. Early warning indicators
-5. Preventive actions
-"""
+        user_prompt = "".join(parts)
 
         try:
-            response = await self._generate_response(user_prompt, system_prompt)
+            response = await self._generate_response(user_prompt, _FAILURE_PREDICTION_SYSTEM_PROMPT)
 
             return {
                 "predictions": response,
@@ -300,3 +517,22 @@ Provide:
         except Exception as e:
             logger.error(f"Failure prediction failed: {e}")
             return {"predictions": f"Prediction failed: {str(e)}", "confidence": "none"}
+
+    async def predict_failures_many(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run independent failure predictions concurrently.
+
+        Args:
+            items: Keyword arguments for each predict_failures() call
+
+        Returns:
+            One prediction dict per item, in input order
+        """
+        logger.info(f"Running {len(items)} failure predictions concurrently")
+
+        results = await self._fan_out(self.predict_failures(**item) for item in items)
+        return [
+            {"predictions": f"Prediction failed: {str(r)}", "confidence": "none"}
+            if isinstance(r, Exception) else r
+            for r in results
+        ]
@@ -5,13 +5,25 @@ Analyzes API performance, identifies bottlenecks, suggests caching strategies,
 and provides optimization recommendations for REST/GraphQL APIs.
 """
 
-from typing import Dict, List, Any, Optional
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Any, NamedTuple, Optional, Tuple
+import numpy as np
+import orjson
 from pydantic import BaseModel, Field
 from datetime import datetime
+from aiops.core.cache import MemoryBackend
 from aiops.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Path keywords mapped to cache TTLs. Group N selects _CACHE_TTLS[N - 1];
+# lower-numbered groups take precedence when several keywords appear.
+_CACHE_TTL_RE = re.compile(r"(user|profile)|(list|search)|(config|settings)")
+_CACHE_TTLS = ("5-10 minutes", "2-5 minutes", "30-60 minutes")
+_DEFAULT_CACHE_TTL = "10-15 minutes"
+
 
 class APIEndpoint(BaseModel):
     """API endpoint performance data"""
@@ -48,11 +60,165 @@ class APIPerformanceResult(BaseModel):
     caching_opportunities: List[str] = Field(description="Caching recommendations")
 
 
+@dataclass(frozen=True)
+class _Endpoint:
+    """Lightweight endpoint record used for scoring and rule checks"""
+    __slots__ = (
+        "method",
+        "path",
+        "avg_latency_ms",
+        "p95_latency_ms",
+        "p99_latency_ms",
+        "requests_per_minute",
+        "error_rate",
+        "avg_response_size_kb",
+    )
+    method: str
+    path: str
+    avg_latency_ms: float
+    p95_latency_ms: float
+    p99_latency_ms: float
+    requests_per_minute: float
+    error_rate: float
+    avg_response_size_kb: float
+
+    @classmethod
+    def from_dict(cls, ep: Dict[str, Any]) -> "_Endpoint":
+        """Build a record from raw endpoint data"""
+        return cls(
+            method=ep.get('method', 'GET'),
+            path=ep.get('path', '/'),
+            avg_latency_ms=float(ep.get('avg_latency_ms', 0)),
+            p95_latency_ms=float(ep.get('p95_latency_ms', 0)),
+            p99_latency_ms=float(ep.get('p99_latency_ms', 0)),
+            requests_per_minute=float(ep.get('requests_per_minute', 0)),
+            error_rate=float(ep.get('error_rate', 0)),
+            avg_response_size_kb=float(ep.get('avg_response_size_kb', 0)),
+        )
+
+    def to_model(self) -> APIEndpoint:
+        """Convert to the APIEndpoint response model without re-validation"""
+        return APIEndpoint.model_construct(
+            method=self.method,
+            path=self.path,
+            avg_latency_ms=self.avg_latency_ms,
+            p95_latency_ms=self.p95_latency_ms,
+            p99_latency_ms=self.p99_latency_ms,
+            requests_per_minute=self.requests_per_minute,
+            error_rate=self.error_rate,
+            avg_response_size_kb=self.avg_response_size_kb,
+        )
+
+
+class _OptimizationRule(NamedTuple):
+    """Threshold rule that turns an endpoint into an APIOptimization"""
+    issue_type: str
+    applies: Callable[[_Endpoint], bool]
+    severity: str
+    metrics: Tuple[str, ...]
+    expected_improvement: str
+    recommendations: Tuple[str, ...]
+    implementation_effort: str
+
+
+_HIGH_ERROR_RATE_RECOMMENDATIONS = (
+    "Implement input validation and sanitization",
+    "Add proper error handling and logging",
+    "Implement circuit breaker for dependencies",
+    "Add request rate limiting",
+    "Improve monitoring and alerting",
+)
+
+# Evaluated in order for every endpoint; the two error-rate rules are
+# mutually exclusive and only differ in severity.
+_OPTIMIZATION_RULES: Tuple[_OptimizationRule, ...] = (
+    _OptimizationRule(
+        issue_type="high_latency",
+        applies=lambda e: e.p99_latency_ms > 1000,
+        severity="high",
+        metrics=("p99_latency_ms", "avg_latency_ms"),
+        expected_improvement="50-80% latency reduction",
+        recommendations=(
+            "Add database indexes on queried columns",
+            "Implement response caching (Redis/Memcached)",
+            "Optimize N+1 queries with eager loading",
+            "Add database query timeout limits",
+            "Consider pagination for large result sets",
+        ),
+        implementation_effort="medium",
+    ),
+    _OptimizationRule(
+        issue_type="missing_cache",
+        applies=lambda e: e.method == "GET" and e.requests_per_minute > 100,
+        severity="medium",
+        metrics=("requests_per_minute", "avg_latency_ms"),
+        expected_improvement="70-90% latency reduction, reduced DB load",
+        recommendations=(
+            "Implement Redis caching layer",
+            "Use ETag/If-None-Match for conditional requests",
+            "Add Cache-Control headers",
+            "Implement stale-while-revalidate pattern",
+        ),
+        implementation_effort="easy",
+    ),
+    _OptimizationRule(
+        issue_type="large_response",
+        applies=lambda e: e.avg_response_size_kb > 500,
+        severity="medium",
+        metrics=("avg_response_size_kb",),
+        expected_improvement="50-70% bandwidth reduction",
+        recommendations=(
+            "Enable gzip/brotli compression",
+            "Implement field filtering (GraphQL-style)",
+            "Add pagination (limit/offset or cursor-based)",
+            "Remove unnecessary fields from response",
+            "Consider using Protocol Buffers for binary data",
+        ),
+        implementation_effort="easy",
+    ),
+    _OptimizationRule(
+        issue_type="high_error_rate",
+        applies=lambda e: e.error_rate > 5,
+        severity="critical",
+        metrics=("error_rate",),
+        expected_improvement="Reduce errors to <0.1%",
+        recommendations=_HIGH_ERROR_RATE_RECOMMENDATIONS,
+        implementation_effort="medium",
+    ),
+    _OptimizationRule(
+        issue_type="high_error_rate",
+        applies=lambda e: 1.0 < e.error_rate <= 5,
+        severity="high",
+        metrics=("error_rate",),
+        expected_improvement="Reduce errors to <0.1%",
+        recommendations=_HIGH_ERROR_RATE_RECOMMENDATIONS,
+        implementation_effort="medium",
+    ),
+    _OptimizationRule(
+        issue_type="slow_mutation",
+        applies=lambda e: e.method in ("POST", "PUT", "PATCH") and e.avg_latency_ms > 500,
+        severity="medium",
+        metrics=("avg_latency_ms",),
+        expected_improvement="Async processing, immediate response",
+        recommendations=(
+            "Process asynchronously using message queue",
+            "Return 202 Accepted with job ID",
+            "Implement webhook/polling for status",
+            "Batch similar operations",
+            "Optimize database transactions",
+        ),
+        implementation_effort="hard",
+    ),
+)
+
+
 class APIPerformanceAnalyzer:
     """API performance analyzer agent"""
 
-    def __init__(self, llm_factory=None):
+    def __init__(self, llm_factory=None, cache_ttl: int = 30, cache_size: int = 1024):
         self.llm_factory = llm_factory
+        self.cache_ttl = cache_ttl
+        self._result_cache = MemoryBackend(maxsize=cache_size)
         logger.info("API Performance Analyzer initialized")
 
     async def analyze_api(
@@ -60,136 +226,71 @@ class APIPerformanceAnalyzer:
         endpoints: List[Dict[str, Any]],
         api_type: str = "REST"
     ) -> APIPerformanceResult:
-        """Analyze API performance"""
+        """
+        Analyze API performance.
+
+        Results are cached in-process as JSON for cache_ttl seconds, keyed by
+        the API type and a hash of the endpoint data. Each cache hit returns
+        a new result stamped with the current time.
+        """
+        cache_key = self._result_cache_key(endpoints, api_type) if self.cache_ttl else None
+        if cache_key is not None:
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                logger.debug(f"API analysis cache hit: {cache_key[:8]}...")
+                return APIPerformanceResult.model_validate_json(cached).model_copy(
+                    update={"analyzed_at": datetime.now().isoformat()}
+                )
 
-        endpoint_models = []
-        optimizations = []
-        caching_opportunities = []
+        result = self._analyze(endpoints, api_type)
 
-        for ep in endpoints:
-            endpoint = APIEndpoint(
-                method=ep.get('method', 'GET'),
-                path=ep.get('path', '/'),
-                avg_latency_ms=ep.get('avg_latency_ms', 0),
-                p95_latency_ms=ep.get('p95_latency_ms', 0),
-                p99_latency_ms=ep.get('p99_latency_ms', 0),
-                requests_per_minute=ep.get('requests_per_minute', 0),
-                error_rate=ep.get('error_rate', 0),
-                avg_response_size_kb=ep.get('avg_response_size_kb', 0)
-            )
-            endpoint_models.append(endpoint)
+        if cache_key is not None:
+            self._result_cache.set(cache_key, result.model_dump_json(), ttl=self.cache_ttl)
 
-            endpoint_path = f"{endpoint.method} {endpoint.path}"
+        return result
 
-            # Check latency issues
-            if endpoint.p99_latency_ms > 1000:
-                optimizations.append(APIOptimization(
-                    endpoint=endpoint_path,
-                    issue_type="high_latency",
-                    severity="high",
-                    current_performance={
-                        "p99_latency_ms": endpoint.p99_latency_ms,
-                        "avg_latency_ms": endpoint.avg_latency_ms
-                    },
-                    expected_improvement="50-80% latency reduction",
-                    recommendations=[
-                        "Add database indexes on queried columns",
-                        "Implement response caching (Redis/Memcached)",
-                        "Optimize N+1 queries with eager loading",
-                        "Add database query timeout limits",
-                        "Consider pagination for large result sets"
-                    ],
-                    implementation_effort="medium"
-                ))
+    def _result_cache_key(self, endpoints: List[Dict[str, Any]], api_type: str) -> Optional[str]:
+        """Hash the canonical JSON form of the inputs, or None if not serializable"""
+        try:
+            payload = orjson.dumps(endpoints, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            return None
+        return f"{api_type}:{hashlib.blake2b(payload, digest_size=16).hexdigest()}"
 
-            # Check for caching opportunities
-            if endpoint.method == "GET" and endpoint.requests_per_minute > 100:
-                caching_opportunities.append(
-                    f"{endpoint_path} - High traffic ({endpoint.requests_per_minute:.0f} req/min), "
-                    f"implement caching with 5-15 min TTL"
-                )
+    def _analyze(self, endpoints: List[Dict[str, Any]], api_type: str) -> APIPerformanceResult:
+        """Run the threshold rules and scoring over all endpoints"""
+        records = [_Endpoint.from_dict(ep) for ep in endpoints]
+        optimizations = []
+        caching_opportunities = []
 
-                optimizations.append(APIOptimization(
-                    endpoint=endpoint_path,
-                    issue_type="missing_cache",
-                    severity="medium",
-                    current_performance={
-                        "requests_per_minute": endpoint.requests_per_minute,
-                        "avg_latency_ms": endpoint.avg_latency_ms
-                    },
-                    expected_improvement="70-90% latency reduction, reduced DB load",
-                    recommendations=[
-                        "Implement Redis caching layer",
-                        "Use ETag/If-None-Match for conditional requests",
-                        "Add Cache-Control headers",
-                        "Implement stale-while-revalidate pattern",
-                        f"Suggested TTL: {self._suggest_cache_ttl(endpoint)}"
-                    ],
-                    implementation_effort="easy"
-                ))
+        for endpoint in records:
+            endpoint_path = f"{endpoint.method} {endpoint.path}"
 
-            # Check response size
-            if endpoint.avg_response_size_kb > 500:
-                optimizations.append(APIOptimization(
-                    endpoint=endpoint_path,
-                    issue_type="large_response",
-                    severity="medium",
-                    current_performance={
-                        "avg_response_size_kb": endpoint.avg_response_size_kb
-                    },
-                    expected_improvement="50-70% bandwidth reduction",
-                    recommendations=[
-                        "Enable gzip/brotli compression",
-                        "Implement field filtering (GraphQL-style)",
-                        "Add pagination (limit/offset or cursor-based)",
-                        "Remove unnecessary fields from response",
-                        "Consider using Protocol Buffers for binary data"
-                    ],
-                    implementation_effort="easy"
-                ))
+            for rule in _OPTIMIZATION_RULES:
+                if not rule.applies(endpoint):
+                    continue
 
-            # Check error rate
-            if endpoint.error_rate > 1.0:
-                optimizations.append(APIOptimization(
-                    endpoint=endpoint_path,
-                    issue_type="high_error_rate",
-                    severity="critical" if endpoint.error_rate > 5 else "high",
-                    current_performance={
-                        "error_rate": endpoint.error_rate
-                    },
-                    expected_improvement="Reduce errors to <0.1%",
-                    recommendations=[
-                        "Implement input validation and sanitization",
-                        "Add proper error handling and logging",
-                        "Implement circuit breaker for dependencies",
-                        "Add request rate limiting",
-                        "Improve monitoring and alerting"
-                    ],
-                    implementation_effort="medium"
-                ))
+                recommendations = list(rule.recommendations)
+                if rule.issue_type == "missing_cache":
+                    caching_opportunities.append(
+                        f"{endpoint_path} - High traffic ({endpoint.requests_per_minute:.0f} req/min), "
+                        f"implement caching with 5-15 min TTL"
+                    )
+                    recommendations.append(f"Suggested TTL: {self._suggest_cache_ttl(endpoint)}")
 
-            # Check for slow mutations
-            if endpoint.method in ['POST', 'PUT', 'PATCH'] and endpoint.avg_latency_ms > 500:
-                optimizations.append(APIOptimization(
+                # Built from trusted rule data, so validation is skipped
+                optimizations.append(APIOptimization.model_construct(
                     endpoint=endpoint_path,
-                    issue_type="slow_mutation",
-                    severity="medium",
-                    current_performance={
-                        "avg_latency_ms": endpoint.avg_latency_ms
-                    },
-                    expected_improvement="Async processing, immediate response",
-                    recommendations=[
-                        "Process asynchronously using message queue",
-                        "Return 202 Accepted with job ID",
-                        "Implement webhook/polling for status",
-                        "Batch similar operations",
-                        "Optimize database transactions"
-                    ],
-                    implementation_effort="hard"
+                    issue_type=rule.issue_type,
+                    severity=rule.severity,
+                    current_performance={name: getattr(endpoint, name) for name in rule.metrics},
+                    expected_improvement=rule.expected_improvement,
+                    recommendations=recommendations,
+                    implementation_effort=rule.implementation_effort,
                 ))
 
         # Calculate performance score
-        performance_score = self._calculate_performance_score(endpoint_models)
+        performance_score = self._calculate_performance_score(records)
 
         # Generate summary
         summary = self._generate_summary(api_type, len(endpoints), performance_score, len(optimizations))
@@ -197,74 +298,53 @@ class APIPerformanceAnalyzer:
         return APIPerformanceResult(
             api_type=api_type,
             endpoints_analyzed=len(endpoints),
-            endpoints=endpoint_models,
+            endpoints=[record.to_model() for record in records],
             optimizations=optimizations,
             performance_score=performance_score,
             summary=summary,
             caching_opportunities=caching_opportunities
         )
 
-    def _suggest_cache_ttl(self, endpoint: APIEndpoint) -> str:
+    def _suggest_cache_ttl(self, endpoint: _Endpoint) -> str:
         """Suggest cache TTL based on endpoint characteristics"""
-        if 'user' in endpoint.path or 'profile' in endpoint.path:
-            return "5-10 minutes"
-        elif 'list' in endpoint.path or 'search' in endpoint.path:
-            return "2-5 minutes"
-        elif 'config' in endpoint.path or 'settings' in endpoint.path:
-            return "30-60 minutes"
-        else:
-            return "10-15 minutes"
+        group = min((m.lastindex for m in _CACHE_TTL_RE.finditer(endpoint.path)), default=None)
+        if group is None:
+            return _DEFAULT_CACHE_TTL
+        return _CACHE_TTLS[group - 1]
 
-    def _calculate_performance_score(self, endpoints: List[APIEndpoint]) -> float:
+    def _calculate_performance_score(self, endpoints: List[_Endpoint]) -> float:
         """Calculate overall performance score"""
         if not endpoints:
             return 100.0
 
-        total_score = 0.0
-
-        for ep in endpoints:
-            score = 100.0
-
-            # Penalize high latency
-            if ep.p99_latency_ms > 2000:
-                score -= 30
-            elif ep.p99_latency_ms > 1000:
-                score -= 20
-            elif ep.p99_latency_ms > 500:
-                score -= 10
-
-            # Penalize high error rate
-            if ep.error_rate > 5:
-                score -= 40
-            elif ep.error_rate > 1:
-                score -= 20
-            elif ep.error_rate > 0.5:
-                score -= 10
+        count = len(endpoints)
+        p99 = np.fromiter((ep.p99_latency_ms for ep in endpoints), dtype=np.float64, count=count)
+        errors = np.fromiter((ep.error_rate for ep in endpoints), dtype=np.float64, count=count)
+        sizes = np.fromiter((ep.avg_response_size_kb for ep in endpoints), dtype=np.float64, count=count)
 
-            # Penalize large responses
-            if ep.avg_response_size_kb > 1000:
-                score -= 15
-            elif ep.avg_response_size_kb > 500:
-                score -= 10
+        # Penalize high latency, high error rate and large responses
+        latency_penalty = np.select([p99 > 2000, p99 > 1000, p99 > 500], [30, 20, 10], 0)
+        error_penalty = np.select([errors > 5, errors > 1, errors > 0.5], [40, 20, 10], 0)
+        size_penalty = np.select([sizes > 1000, sizes > 500], [15, 10], 0)
 
-            total_score += max(0, score)
-
-        return total_score / len(endpoints)
+        scores = 100.0 - latency_penalty - error_penalty - size_penalty
+        return float(np.maximum(scores, 0).mean())
 
     def _generate_summary(self, api_type: str, count: int, score: float, optimizations: int) -> str:
         """Generate summary"""
-        summary = f"{api_type} API Performance Analysis\n\n"
-        summary += f"Endpoints analyzed: {count}\n"
-        summary += f"Performance score: {score:.1f}/100\n"
-        summary += f"Optimizations found: {optimizations}\n\n"
-
         if score >= 85:
-            summary += "✓ API performance is excellent"
+            verdict = "✓ API performance is excellent"
         elif score >= 70:
-            summary += "⚠ API performance is good but has improvement opportunities"
+            verdict = "⚠ API performance is good but has improvement opportunities"
         elif score >= 50:
-            summary += "⚠ API performance needs improvement"
+            verdict = "⚠ API performance needs improvement"
         else:
-            summary += "✗ Critical performance issues detected"
-
-        return summary
+            verdict = "✗ Critical performance issues detected"
+
+        return "".join([
+            f"{api_type} API Performance Analysis\n\n",
+            f"Endpoints analyzed: {count}\n",
+            f"Performance score: {score:.1f}/100\n",
+            f"Optimizations found: {optimizations}\n\n",
+            verdict,
+        ])
@@ -1,16 +1,138 @@
 """Auto Fixer Agent - Automated issue resolution and self-healing."""
 
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field
+import orjson
+from typing import AsyncIterator, Final, List, Dict, Any, Optional
+from pydantic import BaseModel, ConfigDict, Field
 from aiops.agents.base_agent import BaseAgent
+from aiops.core.llm_cache import llm_cache
 from aiops.core.logger import get_logger
+from aiops.core.tokenizer import truncate_tail
 
 logger = get_logger(__name__)
 
+_AUTO_FIX_SYSTEM_PROMPT: Final[str] = """You are an expert SRE with deep knowledge of automated remediation and self-healing systems.
+
+Your task is to analyze issues and provide automated fix solutions.
+
+Fix Categories:
+1. **Code Fixes**: Bug fixes, patches, hotfixes
+2. **Configuration Fixes**: Config changes, feature flags, parameter tuning
+3. **Infrastructure Fixes**: Service restarts, resource scaling, health checks
+4. **Rollback Fixes**: Revert to previous version or state
+
+Risk Assessment:
+- **Low Risk**: Reversible, no data impact, tested fixes (e.g., service restart, cache clear)
+- **Medium Risk**: Some impact, requires testing (e.g., config changes, scaling)
+- **High Risk**: Potential data impact, significant changes (e.g., code changes, migrations)
+
+Safety Guidelines:
+- NEVER suggest destructive operations without rollback plan
+- ALWAYS provide validation steps
+- ALWAYS include rollback procedures
+- Prefer low-risk, reversible fixes
+- Be conservative with auto-apply recommendations
+
+"""
+
+_AUTO_APPLY_GUIDELINES: Final[str] = """
+Auto-Apply Mode:
+Only recommend auto-apply for LOW RISK fixes that:
+- Are fully reversible
+- Have no data impact
+- Are well-tested patterns
+- Have clear validation criteria
+"""
+
+_AUTO_FIX_SYSTEM_PROMPT_TAIL: Final[str] = """
+Provide:
+- Clear root cause analysis
+- Step-by-step fix procedures
+- Validation methods
+- Comprehensive rollback plan
+- Risk and confidence assessment
+"""
+
+# Both variants are built once so every call sends byte-identical prompts
+_AUTO_FIX_SYSTEM_PROMPTS: Final[Dict[bool, str]] = {
+    False: _AUTO_FIX_SYSTEM_PROMPT + _AUTO_FIX_SYSTEM_PROMPT_TAIL,
+    True: _AUTO_FIX_SYSTEM_PROMPT + _AUTO_APPLY_GUIDELINES + _AUTO_FIX_SYSTEM_PROMPT_TAIL,
+}
+
+_ROLLBACK_SYSTEM_PROMPT: Final[str] = """You are an expert at deployment rollback procedures.
+
+Create safe, comprehensive rollback plans:
+- Identify rollback method (redeploy, revert, feature flag)
+- Provide step-by-step instructions
+- Include data migration rollback if needed
+- Specify validation at each step
+- Consider dependencies and order of operations
+"""
+
+# Token budget for the most recent log lines included in a prompt
+_MAX_LOG_TOKENS: Final[int] = 500
+
+
+def _rollback_template(namespaced: bool, previous: bool) -> str:
+    """Build the canonical rollback plan for a simple Kubernetes deployment."""
+    ns = " -n {namespace}" if namespaced else ""
+    target = "{previous_version}" if previous else "the previous revision"
+    return (
+        "Rollback plan for {service} ({version}).\n"
+        "Reason: {issue}\n\n"
+        f"1. Roll back {{service}} to {target}:\n"
+        f"   kubectl rollout undo deployment/{{service}}{ns}\n"
+        "2. Wait for the rollout to complete:\n"
+        f"   kubectl rollout status deployment/{{service}}{ns} --timeout=300s\n"
+        f"3. Validate that {target} is running and healthy:\n"
+        f"   kubectl get deployment/{{service}}{ns} -o wide\n"
+        "   Monitor error rates and latency for 5 minutes\n"
+        "4. If the rollback fails, redeploy {version} and escalate\n"
+    )
+
+
+# Canonical rollback plans keyed by the exact set of deployment_info keys
+_ROLLBACK_TEMPLATES: Final[Dict[frozenset, str]] = {
+    frozenset(keys): _rollback_template("namespace" in keys, "previous_version" in keys)
+    for keys in (
+        {"service", "version"},
+        {"service", "version", "previous_version"},
+        {"service", "version", "namespace"},
+        {"service", "version", "previous_version", "namespace"},
+    )
+}
+
+# Kept free of per-call values so it stays cacheable
+_COMMON_FIX_SYSTEM_PROMPT: Final[str] = """Generate automated fixes for common DevOps issues.
+
+Provide standard, well-tested fix procedures.
+"""
+
+# Static instructions lead every user prompt so that the prompt prefix is
+# byte-identical across calls and eligible for provider prefix caching.
+_AUTO_FIX_USER_PROMPT_HEADER: Final[str] = """Analyze and provide automated fix for the issue below.
+
+Provide:
+1. Root cause analysis
+2. Recommended fix with exact commands/steps
+3. Alternative fix options
+4. Risk assessment
+5. Validation procedure
+6. Rollback plan
+
+"""
+
+_COMMON_FIX_USER_PROMPT_HEADER: Final[str] = """Provide a fix for the common issue below.
+
+Give specific commands and validation steps.
+
+"""
+
 
 class Fix(BaseModel):
     """Represents an automated fix."""
 
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     fix_type: str = Field(description="Type: code, configuration, infrastructure, rollback")
     description: str = Field(description="What the fix does")
     confidence: float = Field(description="Confidence level (0-100)")
@@ -20,9 +142,74 @@ class Fix(BaseModel):
     rollback_plan: str = Field(description="How to rollback if fix fails")
 
 
+# Known fixes for common issues. Commands may reference {service}, which is
+# filled in from the caller's context when present.
+_COMMON_FIX_TEMPLATES: Final[Dict[str, Dict[str, Any]]] = {
+    "out_of_memory": {
+        "description": "Restart service and increase memory limits",
+        "commands": [
+            "kubectl rollout restart deployment/{service}",
+            "kubectl set resources deployment/{service} --limits=memory=4Gi",
+        ],
+        "risk": "medium",
+    },
+    "high_cpu": {
+        "description": "Scale up replicas and investigate CPU hotspots",
+        "commands": [
+            "kubectl scale deployment/{service} --replicas=5",
+            "kubectl top pods -l app={service}",
+        ],
+        "risk": "low",
+    },
+    "disk_full": {
+        "description": "Clean up logs and temporary files",
+        "commands": [
+            "find /var/log -name '*.log' -mtime +7 -delete",
+            "docker system prune -af --volumes",
+        ],
+        "risk": "low",
+    },
+    "connection_timeout": {
+        "description": "Increase timeout and connection pool settings",
+        "commands": [
+            "Update config: connection_timeout=60",
+            "Update config: pool_size=20",
+        ],
+        "risk": "low",
+    },
+}
+
+_COMMON_FIXES: Final[Dict[str, Fix]] = {
+    issue_type: Fix(
+        fix_type="infrastructure",
+        description=template["description"],
+        confidence=85.0,
+        risk_level=template["risk"],
+        commands=template["commands"],
+        validation=["Check service health", "Monitor metrics for 5 minutes"],
+        rollback_plan="Revert configuration changes",
+    )
+    for issue_type, template in _COMMON_FIX_TEMPLATES.items()
+}
+
+
+# AutoFixResult fields that follow recommended_fix / alternative_fixes
+_AFTER_RECOMMENDED_FIX: Final = frozenset({"alternative_fixes", "requires_approval", "estimated_downtime"})
+_AFTER_ALTERNATIVE_FIXES: Final = frozenset({"requires_approval", "estimated_downtime"})
+
+
+class _Placeholders(dict):
+    """format_map mapping that leaves unknown placeholders untouched."""
+
+    def __missing__(self, key: str) -> str:
+        return "{" + key + "}"
+
+
 class AutoFixResult(BaseModel):
     """Result of auto-fix analysis."""
 
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     issue_summary: str = Field(description="Summary of the issue")
     root_cause: str = Field(description="Identified root cause")
     recommended_fix: Fix = Field(description="Primary recommended fix")
@@ -34,8 +221,8 @@ class AutoFixResult(BaseModel):
 class AutoFixerAgent(BaseAgent):
     """Agent for automated issue resolution."""
 
-    def __init__(self, **kwargs):
-        super().__init__(name="AutoFixerAgent", temperature=0.3, **kwargs)
+    def __init__(self, temperature: Optional[float] = 0.3, **kwargs):
+        super().__init__(name="AutoFixerAgent", temperature=temperature, **kwargs)
 
     async def execute(
         self,
@@ -80,52 +267,75 @@ class AutoFixerAgent(BaseAgent):
             logger.error(f"Auto-fix analysis failed: {e}")
             raise
 
-    def _create_system_prompt(self, auto_apply: bool) -> str:
-        """Create system prompt for auto-fix."""
-        prompt = """You are an expert SRE with deep knowledge of automated remediation and self-healing systems.
-
-Your task is to analyze issues and provide automated fix solutions.
-
-Fix Categories:
-1. **Code Fixes**: Bug fixes, patches, hotfixes
-2. **Configuration Fixes**: Config changes, feature flags, parameter tuning
-3. **Infrastructure Fixes**: Service restarts, resource scaling, health checks
-4. **Rollback Fixes**: Revert to previous version or state
+    async def execute_stream(
+        self,
+        issue_description: str,
+        logs: Optional[str] = None,
+        system_state: Optional[Dict[str, Any]] = None,
+        auto_apply: bool = False,
+    ) -> AsyncIterator[Fix]:
+        """
+        Analyze issue, yielding each fix as soon as the model finishes it.
 
-Risk Assessment:
-- **Low Risk**: Reversible, no data impact, tested fixes (e.g., service restart, cache clear)
-- **Medium Risk**: Some impact, requires testing (e.g., config changes, scaling)
-- **High Risk**: Potential data impact, significant changes (e.g., code changes, migrations)
+        The recommended fix is yielded first, followed by the alternative
+        fixes. Callers that only need the recommended fix can stop iterating
+        after the first item, which cancels the rest of the generation.
 
-Safety Guidelines:
-- NEVER suggest destructive operations without rollback plan
-- ALWAYS provide validation steps
-- ALWAYS include rollback procedures
-- Prefer low-risk, reversible fixes
-- Be conservative with auto-apply recommendations
+        Args:
+            issue_description: Description of the issue
+            logs: Relevant logs
+            system_state: Current system state
+            auto_apply: Whether to auto-apply low-risk fixes
 
-"""
+        Yields:
+            Fix objects in the order the model reports them
+        """
+        logger.info(f"Streaming auto-fix analysis: {issue_description[:100]}")
 
-        if auto_apply:
-            prompt += """
-Auto-Apply Mode:
-Only recommend auto-apply for LOW RISK fixes that:
-- Are fully reversible
-- Have no data impact
-- Are well-tested patterns
-- Have clear validation criteria
-"""
+        stream = self._generate_structured_stream(
+            prompt=self._create_user_prompt(issue_description, logs, system_state),
+            system_prompt=self._create_system_prompt(auto_apply),
+            schema=AutoFixResult,
+        )
+        recommended_done = False
+        emitted = 0
+        partial: Dict[str, Any] = {}
 
-        prompt += """
-Provide:
-- Clear root cause analysis
-- Step-by-step fix procedures
-- Validation methods
-- Comprehensive rollback plan
-- Risk and confidence assessment
-"""
+        try:
+            async for partial in stream:
+                # Fields arrive in schema order, so a later key means the
+                # earlier ones are complete
+                if not recommended_done and partial.keys() & _AFTER_RECOMMENDED_FIX:
+                    recommended_done = True
+                    fix = self._parse_streamed_item(partial.get("recommended_fix"), Fix)
+                    if fix is not None:
+                        yield fix
+
+                alternatives = partial.get("alternative_fixes") or []
+                closed = len(alternatives)
+                if not partial.keys() & _AFTER_ALTERNATIVE_FIXES:
+                    # The last alternative may still be streaming
+                    closed -= 1
+                while emitted < closed:
+                    fix = self._parse_streamed_item(alternatives[emitted], Fix)
+                    emitted += 1
+                    if fix is not None:
+                        yield fix
+
+            if not recommended_done:
+                fix = self._parse_streamed_item(partial.get("recommended_fix"), Fix)
+                if fix is not None:
+                    yield fix
+            for raw in (partial.get("alternative_fixes") or [])[emitted:]:
+                fix = self._parse_streamed_item(raw, Fix)
+                if fix is not None:
+                    yield fix
+        finally:
+            await stream.aclose()
 
-        return prompt
+    def _create_system_prompt(self, auto_apply: bool) -> str:
+        """Create system prompt for auto-fix."""
+        return _AUTO_FIX_SYSTEM_PROMPTS[bool(auto_apply)]
 
     def _create_user_prompt(
         self,
@@ -134,32 +344,22 @@ Provide:
         system_state: Optional[Dict[str, Any]] = None,
     ) -> str:
         """Create user prompt for auto-fix."""
-        prompt = f"""Analyze and provide automated fix for this issue:
-
-**Issue Description**:
-{issue_description}
-
-"""
+        parts = [_AUTO_FIX_USER_PROMPT_HEADER, f"**Issue Description**:\n{issue_description}\n\n"]
 
         if logs:
-            prompt += f"**Relevant Logs**:\n```\n{logs[:2000]}\n```\n\n"
+            logs = truncate_tail(logs, _MAX_LOG_TOKENS, self.llm.model)
+            parts.append(f"**Relevant Logs**:\n```\n{logs}\n```\n\n")
 
         if system_state:
-            prompt += "**System State**:\n"
-            for key, value in system_state.items():
-                prompt += f"- {key}: {value}\n"
-            prompt += "\n"
-
-        prompt += """Provide:
-1. Root cause analysis
-2. Recommended fix with exact commands/steps
-3. Alternative fix options
-4. Risk assessment
-5. Validation procedure
-6. Rollback plan
-"""
+            # Sorted keys keep the serialized state stable across calls
+            state = orjson.dumps(
+                system_state,
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+                default=str,
+            )
+            parts.append(f"**System State**:\n```json\n{state.decode()}\n```\n\n")
 
-        return prompt
+        return "".join(parts)
 
     async def generate_rollback_plan(
         self,
@@ -178,29 +378,27 @@ Provide:
         """
         logger.info("Generating rollback plan")
 
-        system_prompt = """You are an expert at deployment rollback procedures.
+        # Simple deployments of a known shape get a canonical plan without an LLM call
+        template = _ROLLBACK_TEMPLATES.get(frozenset(deployment_info))
+        if template is not None:
+            return {
+                "rollback_steps": template.format_map({**deployment_info, "issue": issue}),
+                "estimated_time": "5 minutes",
+            }
 
-Create safe, comprehensive rollback plans:
-- Identify rollback method (redeploy, revert, feature flag)
-- Provide step-by-step instructions
-- Include data migration rollback if needed
-- Specify validation at each step
-- Consider dependencies and order of operations
-"""
+        user_prompt = f"""Generate rollback plan for the situation below.
 
-        user_prompt = f"""Generate rollback plan for this situation:
+Provide complete rollback procedure with commands and validation.
 
 **Deployment Info**:
 {deployment_info}
 
 **Issue**:
 {issue}
-
-Provide complete rollback procedure with commands and validation.
 """
 
         try:
-            response = await self._generate_response(user_prompt, system_prompt)
+            response = await self._generate_response(user_prompt, _ROLLBACK_SYSTEM_PROMPT)
 
             return {
                 "rollback_steps": response,
@@ -224,78 +422,43 @@ Provide complete rollback procedure with commands and validation.
 
         Args:
             issue_type: Type of issue (out_of_memory, high_cpu, disk_full, etc.)
-            context: Additional context
+            context: Additional context; a "service" entry is substituted
+                into the commands of known fixes
 
         Returns:
             Fix for the common issue
         """
         logger.info(f"Getting fix for common issue: {issue_type}")
 
-        # Map of common issues to standard fixes
-        common_fixes = {
-            "out_of_memory": {
-                "description": "Restart service and increase memory limits",
-                "commands": [
-                    "kubectl rollout restart deployment/{service}",
-                    "kubectl set resources deployment/{service} --limits=memory=4Gi",
-                ],
-                "risk": "medium",
-            },
-            "high_cpu": {
-                "description": "Scale up replicas and investigate CPU hotspots",
-                "commands": [
-                    "kubectl scale deployment/{service} --replicas=5",
-                    "kubectl top pods -l app={service}",
-                ],
-                "risk": "low",
-            },
-            "disk_full": {
-                "description": "Clean up logs and temporary files",
-                "commands": [
-                    "find /var/log -name '*.log' -mtime +7 -delete",
-                    "docker system prune -af --volumes",
-                ],
-                "risk": "low",
-            },
-            "connection_timeout": {
-                "description": "Increase timeout and connection pool settings",
-                "commands": [
-                    "Update config: connection_timeout=60",
-                    "Update config: pool_size=20",
-                ],
-                "risk": "low",
-            },
-        }
-
-        if issue_type in common_fixes:
-            fix_data = common_fixes[issue_type]
-            return Fix(
-                fix_type="infrastructure",
-                description=fix_data["description"],
-                confidence=85.0,
-                risk_level=fix_data["risk"],
-                commands=fix_data["commands"],
-                validation=["Check service health", "Monitor metrics for 5 minutes"],
-                rollback_plan="Revert configuration changes",
+        fix = _COMMON_FIXES.get(issue_type)
+        if fix is not None:
+            if not context:
+                return fix.model_copy(deep=True)
+            values = _Placeholders(context)
+            return fix.model_copy(
+                update={"commands": [c.format_map(values) for c in fix.commands]},
+                deep=True,
             )
 
-        # Generate custom fix for unknown issues
-        system_prompt = f"""Generate automated fix for common DevOps issue: {issue_type}
-
-Provide standard, well-tested fix procedures.
-"""
-
-        user_prompt = f"""Provide fix for: {issue_type}
+        return await self._generate_common_fix(issue_type, context)
 
-Context: {context or 'None'}
-
-Give specific commands and validation steps.
-"""
+    @llm_cache(ttl=3600, cache_if=lambda fix: fix.fix_type != "manual")
+    async def _generate_common_fix(
+        self,
+        issue_type: str,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Fix:
+        """Generate a fix for an issue type without a known pattern."""
+        user_prompt = (
+            f"{_COMMON_FIX_USER_PROMPT_HEADER}"
+            f"Issue: {issue_type}\n\n"
+            f"Context: {context or 'None'}\n"
+        )
 
         try:
             result = await self._generate_structured_response(
                 prompt=user_prompt,
-                system_prompt=system_prompt,
+                system_prompt=_COMMON_FIX_SYSTEM_PROMPT,
                 schema=Fix,
             )
 
@@ -304,12 +467,38 @@ Give specific commands and validation steps.
 
         except Exception as e:
             logger.error(f"Fix generation failed: {e}")
-            return Fix(
-                fix_type="manual",
-                description=f"Automated fix generation failed: {str(e)}",
-                confidence=0,
-                risk_level="high",
-                commands=["Manual intervention required"],
-                validation=["Verify manually"],
-                rollback_plan="Not applicable",
-            )
+            return self._manual_fix(e)
+
+    async def fix_common_issues_many(
+        self,
+        issue_types: List[str],
+        context: Optional[Dict[str, Any]] = None,
+    ) -> List[Fix]:
+        """
+        Get fixes for several common issues concurrently.
+
+        Args:
+            issue_types: Issue types to fix
+            context: Additional context shared by all issues
+
+        Returns:
+            One Fix per issue type, in input order
+        """
+        logger.info(f"Getting fixes for {len(issue_types)} common issues")
+
+        results = await self._fan_out(
+            self.fix_common_issues(issue_type, context) for issue_type in issue_types
+        )
+        return [self._manual_fix(r) if isinstance(r, Exception) else r for r in results]
+
+    def _manual_fix(self, error: Exception) -> Fix:
+        """Build a manual-intervention fix for a failed generation."""
+        return Fix(
+            fix_type="manual",
+            description=f"Automated fix generation failed: {str(error)}",
+            confidence=0,
+            risk_level="high",
+            commands=["Manual intervention required"],
+            validation=["Verify manually"],
+            rollback_plan="Not applicable",
+        )
@@ -1,24 +1,97 @@
 """Base agent class for all AI agents."""
 
+import asyncio
+import functools
+import hashlib
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import AbstractSet, Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Type
+import orjson
+from pydantic import BaseModel, Field, ValidationError, create_model
+from aiops.core.admission import AdmissionController
+from aiops.core.cache import MemoryBackend
+from aiops.core.llm_cache import MAX_CACHEABLE_TEMPERATURE
 from aiops.core.llm_factory import LLMFactory, BaseLLM
 from aiops.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Structured responses shared by all agents, keyed by model and request
+_response_cache = MemoryBackend(maxsize=1024)
+
+_PACKED_PROMPT_HEADER = (
+    "Handle each numbered request below independently. Return exactly one "
+    "result per request, in the same order as the requests.\n\n"
+)
+
+
+def _parse_structured(response: Any, schema: Any) -> Any:
+    """
+    Normalize a provider's structured output to the requested schema.
+
+    Raw JSON is parsed in native code (pydantic-core for model schemas,
+    orjson otherwise) and plain dicts are validated into model schemas.
+    Already-parsed model instances are returned unchanged.
+    """
+    is_model = isinstance(schema, type) and issubclass(schema, BaseModel)
+
+    if isinstance(response, (str, bytes, bytearray)):
+        return schema.model_validate_json(response) if is_model else orjson.loads(response)
+    if is_model and isinstance(response, dict):
+        return schema.model_validate(response)
+    return response
+
+
+def _request_key(prompt: str, system_prompt: Optional[str], schema: Any) -> str:
+    """Hash the inputs that determine a structured response."""
+    schema_id = getattr(schema, "__qualname__", None)
+    if schema_id is None:
+        schema_id = orjson.dumps(schema, option=orjson.OPT_SORT_KEYS).decode()
+    h = hashlib.blake2b(digest_size=16)
+    for part in (prompt, system_prompt or "", schema_id):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=64)
+def _packed_schema(schema: type) -> type:
+    """Wrapper model holding a list of schema results, built once per schema."""
+    return create_model(
+        f"{schema.__name__}List",
+        results=(List[schema], Field(description="One result per request, in request order")),
+    )
+
 
 class BaseAgent(ABC):
     """Base class for all AI agents."""
 
+    # Part of every response cache key. Prompt changes invalidate cached
+    # responses on their own; bump this when parsing or post-processing
+    # changes should too.
+    cache_version = "1"
+
     def __init__(
         self,
         name: str,
         llm_provider: Optional[str] = None,
         model: Optional[str] = None,
         temperature: Optional[float] = None,
+        max_concurrency: int = 64,
+        cache_ttl: int = 3600,
+        max_response_tokens: Optional[int] = None,
+        target_latency: Optional[float] = None,
     ):
         self.name = name
+        self.max_concurrency = max_concurrency
+        self.cache_ttl = cache_ttl
+        # Cap on tokens generated per structured response; None keeps the
+        # model's configured max_tokens
+        self.max_response_tokens = max_response_tokens
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Backs off structured calls when the provider is rate limiting or
+        # responses take longer than target_latency seconds
+        self._admission = AdmissionController(max_concurrency, target_latency)
+        self._inflight: Dict[str, asyncio.Future] = {}
         self.llm: BaseLLM = LLMFactory.create(
             provider=llm_provider,
             model=model,
@@ -31,12 +104,41 @@ class BaseAgent(ABC):
         """Execute the agent's main task."""
         pass
 
+    async def execute_many(self, calls: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Run independent execute() calls concurrently.
+
+        Args:
+            calls: Keyword arguments for each execute() call
+
+        Returns:
+            One result per call, in input order; a call that raised is
+            returned as its exception
+        """
+        logger.info(f"{self.name}: Running {len(calls)} executions concurrently")
+        return await self._fan_out(self.execute(**call) for call in calls)
+
     async def _generate_response(
-        self, prompt: str, system_prompt: Optional[str] = None
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        cacheable_system: bool = True,
     ) -> str:
-        """Generate response from LLM."""
+        """
+        Generate response from LLM.
+
+        A static system prompt is sent as a cacheable prefix; pass
+        cacheable_system=False when it embeds per-call values. Requests are
+        tagged with the agent name so providers that route by cache key keep
+        each agent's prefix warm.
+        """
         try:
-            response = await self.llm.generate(prompt, system_prompt)
+            response = await self.llm.generate(
+                prompt,
+                system_prompt,
+                cacheable_system=cacheable_system,
+                prompt_cache_key=self.name,
+            )
             logger.debug(f"{self.name}: Generated response (length: {len(response)})")
             return response
         except Exception as e:
@@ -48,12 +150,296 @@ class BaseAgent(ABC):
         prompt: str,
         schema: Dict[str, Any],
         system_prompt: Optional[str] = None,
+        cacheable_system: bool = True,
+        max_tokens: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """Generate structured response from LLM."""
+        """
+        Generate structured response from LLM.
+
+        The response is limited to max_tokens, or to max_response_tokens
+        if not given. Calls wait for the agent's admission controller.
+        """
+
+        async def generate() -> Any:
+            async with self._admission.slot():
+                return await self.llm.generate_structured(
+                    prompt,
+                    schema,
+                    system_prompt,
+                    cacheable_system=cacheable_system,
+                    prompt_cache_key=self.name,
+                    max_tokens=max_tokens or self.max_response_tokens,
+                )
+
         try:
-            response = await self.llm.generate_structured(prompt, schema, system_prompt)
+            key = _request_key(prompt, system_prompt, schema)
+            response, coalesced = await self._coalesce(key, generate)
             logger.debug(f"{self.name}: Generated structured response")
-            return response
+            result = _parse_structured(response, schema)
+            # Coalesced callers get their own copy of the shared result
+            if coalesced and isinstance(result, BaseModel):
+                result = result.model_copy(deep=True)
+            return result
         except Exception as e:
             logger.error(f"{self.name}: Failed to generate structured response: {e}")
             raise
+
+    async def _cached_structured_response(
+        self,
+        prompt: str,
+        schema: Any,
+        system_prompt: Optional[str] = None,
+        cacheable_system: bool = True,
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """
+        Generate a structured response, reusing a cached one for identical requests.
+
+        Responses are keyed on the model, cache_version, prompts and schema,
+        so a changed input or prompt never hits a stale entry, and are kept
+        for ttl seconds (cache_ttl by default). Caching is skipped when the
+        TTL is 0 or the model samples at a high temperature.
+        """
+        ttl = self.cache_ttl if ttl is None else ttl
+        if not ttl or self.llm.temperature > MAX_CACHEABLE_TEMPERATURE:
+            return await self._generate_structured_response(
+                prompt, schema, system_prompt, cacheable_system=cacheable_system
+            )
+
+        digest = _request_key(prompt, system_prompt, schema)
+        key = f"{self.llm.provider}:{self.llm.model}:{self.cache_version}:{digest}"
+        cached = _response_cache.get(key)
+        if cached is not None:
+            logger.debug(f"{self.name}: Structured response cache HIT key={digest[:8]}")
+            return _parse_structured(cached, schema)
+
+        logger.debug(f"{self.name}: Structured response cache MISS key={digest[:8]}")
+        result = await self._generate_structured_response(
+            prompt, schema, system_prompt, cacheable_system=cacheable_system
+        )
+        payload = result.model_dump_json() if isinstance(result, BaseModel) else orjson.dumps(result)
+        _response_cache.set(key, payload, ttl)
+        return result
+
+    async def _generate_structured_stream(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        system_prompt: Optional[str] = None,
+        cacheable_system: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a structured response from LLM.
+
+        Yields progressively more complete dicts as the model generates them.
+        Closing the iterator early stops generation.
+        """
+        try:
+            async for partial in self.llm.generate_structured_stream(
+                prompt,
+                schema,
+                system_prompt,
+                cacheable_system=cacheable_system,
+                prompt_cache_key=self.name,
+                max_tokens=self.max_response_tokens,
+            ):
+                yield partial
+            logger.debug(f"{self.name}: Streamed structured response")
+        except Exception as e:
+            logger.error(f"{self.name}: Failed to stream structured response: {e}")
+            raise
+
+    async def _stream_list_items(
+        self,
+        stream: AsyncIterator[Dict[str, Any]],
+        field: str,
+        model: Type[BaseModel],
+        after_fields: AbstractSet[str] = frozenset(),
+    ) -> AsyncIterator[Any]:
+        """
+        Yield each element of a streamed list field as soon as it is complete.
+
+        Fields arrive in schema order, so every element but the last is
+        complete, and the last one is too once any of after_fields (the
+        fields that follow field in the schema) appears. The stream is
+        closed when iteration stops, which stops generation.
+
+        Args:
+            stream: Partial responses from _generate_structured_stream
+            field: Name of the list field
+            model: Model each element is validated into; malformed elements
+                are skipped
+            after_fields: Fields that follow field in the schema
+        """
+        emitted = 0
+        partial: Dict[str, Any] = {}
+
+        try:
+            async for partial in stream:
+                items = partial.get(field) or []
+                closed = len(items) if partial.keys() & after_fields else len(items) - 1
+                while emitted < closed:
+                    item = self._parse_streamed_item(items[emitted], model)
+                    emitted += 1
+                    if item is not None:
+                        yield item
+
+            for raw in (partial.get(field) or [])[emitted:]:
+                item = self._parse_streamed_item(raw, model)
+                if item is not None:
+                    yield item
+        finally:
+            await stream.aclose()
+
+    def _parse_streamed_item(self, raw: Optional[Dict[str, Any]], model: Type[BaseModel]) -> Optional[Any]:
+        """Validate a streamed element, skipping missing or malformed ones."""
+        if raw is None:
+            return None
+        try:
+            return model.model_validate(raw)
+        except ValidationError as e:
+            logger.warning(f"{self.name}: Skipping malformed streamed {model.__name__}: {e}")
+            return None
+
+    async def _generate_structured_batch(
+        self,
+        prompts: List[str],
+        schema: Dict[str, Any],
+        system_prompt: Optional[str] = None,
+        cacheable_system: bool = True,
+    ) -> List[Any]:
+        """
+        Generate structured responses for many prompts in a single submission.
+
+        All prompts are handed to the provider at once so they can be scheduled
+        together. Each element of the returned list is either the parsed
+        response or the exception raised for that prompt.
+        """
+        if not prompts:
+            return []
+
+        try:
+            responses = await self.llm.generate_structured_batch(
+                prompts,
+                schema,
+                system_prompt,
+                max_concurrency=self.max_concurrency,
+                cacheable_system=cacheable_system,
+                prompt_cache_key=self.name,
+                max_tokens=self.max_response_tokens,
+            )
+            responses = [
+                r if isinstance(r, Exception) else _parse_structured(r, schema)
+                for r in responses
+            ]
+            failures = sum(1 for r in responses if isinstance(r, Exception))
+            logger.debug(
+                f"{self.name}: Generated {len(responses) - failures}/{len(responses)} "
+                f"structured responses in batch"
+            )
+            return responses
+        except Exception as e:
+            logger.error(f"{self.name}: Failed to generate structured batch: {e}")
+            raise
+
+    async def _generate_packed_response(
+        self,
+        prompts: List[str],
+        schema: type,
+        system_prompt: Optional[str] = None,
+    ) -> List[Any]:
+        """
+        Generate structured responses for several prompts in one request.
+
+        The prompts are numbered in a single user message and the model
+        returns a list of schema results, so the system prompt and request
+        overhead are paid once for the whole group. Keep groups moderate
+        (8-32 prompts); very long outputs raise latency and failure rates.
+
+        Raises:
+            ValueError: If the model returns a different number of results
+        """
+        if not prompts:
+            return []
+
+        prompt = _PACKED_PROMPT_HEADER + "".join(
+            f"### Request {i}\n\n{p}\n\n" for i, p in enumerate(prompts, 1)
+        )
+        # Each packed result gets the budget of a single response
+        packed = await self._generate_structured_response(
+            prompt,
+            _packed_schema(schema),
+            system_prompt,
+            max_tokens=self.max_response_tokens and self.max_response_tokens * len(prompts),
+        )
+
+        if len(packed.results) != len(prompts):
+            raise ValueError(f"Expected {len(prompts)} results, got {len(packed.results)}")
+        return list(packed.results)
+
+    async def _generate_offline_batch(
+        self,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        poll_interval: float = 30.0,
+    ) -> List[Any]:
+        """
+        Generate responses through the provider's batch API.
+
+        Intended for latency-insensitive work (replays, bulk planning):
+        provider batch APIs are cheaper but may take minutes to complete.
+        Each element is either the response text or the exception for that
+        prompt.
+        """
+        if not prompts:
+            return []
+
+        try:
+            responses = await self.llm.generate_batch(
+                prompts, system_prompt, poll_interval=poll_interval
+            )
+            failures = sum(1 for r in responses if isinstance(r, Exception))
+            logger.debug(
+                f"{self.name}: Generated {len(responses) - failures}/{len(responses)} "
+                f"responses in offline batch"
+            )
+            return responses
+        except Exception as e:
+            logger.error(f"{self.name}: Failed to generate offline batch: {e}")
+            raise
+
+    async def _coalesce(
+        self, key: str, factory: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Share one in-flight call between concurrent callers with the same key.
+
+        The first caller starts the call; callers arriving while it is still
+        running await the same result instead of issuing a duplicate
+        request. Returns the result and whether it was shared.
+        """
+        task = self._inflight.get(key)
+        coalesced = task is not None
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key, None))
+        else:
+            logger.debug(f"{self.name}: Coalesced duplicate in-flight request")
+
+        # Shielded so a cancelled caller does not cancel the shared call
+        return await asyncio.shield(task), coalesced
+
+    async def _fan_out(self, coros: Iterable[Awaitable[Any]]) -> List[Any]:
+        """
+        Run independent coroutines concurrently, bounded by max_concurrency.
+
+        Results are returned in input order; a coroutine that raised is
+        returned as its exception.
+        """
+
+        async def bounded(coro: Awaitable[Any]) -> Any:
+            async with self._semaphore:
+                return await coro
+
+        return await asyncio.gather(*(bounded(c) for c in coros), return_exceptions=True)
@@ -5,16 +5,52 @@ Plans and executes controlled chaos experiments to test system resilience,
 identify weaknesses, and improve reliability.
 """
 
+import asyncio
+import re
 from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
-from datetime import datetime
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime, timezone
 from aiops.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+_LOG_ERROR_RE = re.compile(r"error|exception", re.IGNORECASE)
+
+
+# Per-service experiment templates; only {service} varies between services
+_NETWORK_LATENCY_CRITERIA = (
+    "Request timeout < 5 seconds",
+    "Error rate < 1%",
+    "Circuit breaker triggers appropriately",
+    "No cascading failures",
+)
+_NETWORK_LATENCY_COMMANDS = (
+    "tc qdisc add dev eth0 root netem delay 200ms",
+    "# Monitor for 10 minutes",
+    "tc qdisc del dev eth0 root",
+)
+_POD_FAILURE_CRITERIA = (
+    "Pod restarts within 30 seconds",
+    "No service downtime",
+    "Load balancer removes unhealthy pod",
+    "Requests routed to healthy pods",
+)
+_POD_FAILURE_COMMAND_TEMPLATES = (
+    "kubectl delete pod -l app={service} --grace-period=0",
+    "kubectl wait --for=condition=Ready pod -l app={service} --timeout=60s",
+)
+
+
+def _utc_timestamp() -> str:
+    """Current time as an ISO 8601 string with an explicit UTC offset."""
+    return datetime.now(timezone.utc).isoformat()
+
 
 class ChaosExperiment(BaseModel):
     """Chaos experiment definition"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     name: str = Field(description="Experiment name")
     type: str = Field(description="network, cpu, memory, disk, pod_failure, etc.")
     target: str = Field(description="Target resource/service")
@@ -30,8 +66,10 @@ class ChaosExperiment(BaseModel):
 
 class ChaosResult(BaseModel):
     """Chaos experiment result"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     experiment_name: str
-    executed_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+    executed_at: str = Field(default_factory=_utc_timestamp)
     status: str = Field(description="success, failed, partial")
     duration_seconds: int
     observations: List[str] = Field(description="What was observed")
@@ -43,7 +81,9 @@ class ChaosResult(BaseModel):
 
 class ChaosEngineeringPlan(BaseModel):
     """Complete chaos engineering plan"""
-    created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    created_at: str = Field(default_factory=_utc_timestamp)
     environment: str = Field(description="staging, production, etc.")
     experiments: List[ChaosExperiment] = Field(description="Planned experiments")
     total_risk_score: float = Field(description="Overall risk score")
@@ -54,8 +94,10 @@ class ChaosEngineeringPlan(BaseModel):
 class ChaosEngineer:
     """Chaos engineering agent"""
 
-    def __init__(self, llm_factory=None):
+    def __init__(self, llm_factory=None, max_concurrency: int = 16):
         self.llm_factory = llm_factory
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
         logger.info("Chaos Engineering Agent initialized")
 
     async def create_chaos_plan(
@@ -64,58 +106,17 @@ class ChaosEngineer:
         environment: str = "staging"
     ) -> ChaosEngineeringPlan:
         """Create a chaos engineering test plan"""
-        experiments = []
-
-        # Network chaos experiments
-        for service in services:
-            experiments.append(ChaosExperiment(
-                name=f"Network Latency - {service}",
-                type="network_latency",
-                target=service,
-                description=f"Inject 200ms latency to {service} to test timeout handling",
-                hypothesis="System should gracefully handle increased latency with proper timeouts and retries",
-                blast_radius="limited",
-                risk_level="low",
-                duration_minutes=10,
-                rollback_plan="Remove network policy/tc rules",
-                success_criteria=[
-                    "Request timeout < 5 seconds",
-                    "Error rate < 1%",
-                    "Circuit breaker triggers appropriately",
-                    "No cascading failures"
-                ],
-                commands=[
-                    f"tc qdisc add dev eth0 root netem delay 200ms",
-                    "# Monitor for 10 minutes",
-                    "tc qdisc del dev eth0 root"
-                ]
-            ))
-
-            # Pod failure
-            experiments.append(ChaosExperiment(
-                name=f"Pod Failure - {service}",
-                type="pod_failure",
-                target=service,
-                description=f"Kill random pod of {service} to test auto-recovery",
-                hypothesis="Kubernetes should automatically restart pod and service should remain available",
-                blast_radius="limited",
-                risk_level="low",
-                duration_minutes=5,
-                rollback_plan="Manual pod restart if needed",
-                success_criteria=[
-                    "Pod restarts within 30 seconds",
-                    "No service downtime",
-                    "Load balancer removes unhealthy pod",
-                    "Requests routed to healthy pods"
-                ],
-                commands=[
-                    f"kubectl delete pod -l app={service} --grace-period=0",
-                    "kubectl wait --for=condition=Ready pod -l app={service} --timeout=60s"
-                ]
-            ))
+        # Per-service experiments are built concurrently so that any
+        # network-bound enrichment fans out instead of running serially
+        per_service = await asyncio.gather(
+            *(self._build_service_experiments(service) for service in services)
+        )
+        experiments = [e for service_experiments in per_service for e in service_experiments]
 
-        # Resource exhaustion
-        experiments.append(ChaosExperiment(
+        # Resource exhaustion. Here and in _build_service_experiments,
+        # experiments are built from trusted literals with model_construct,
+        # which skips validation
+        experiments.append(ChaosExperiment.model_construct(
             name="CPU Stress Test",
             type="cpu_stress",
             target=services[0] if services else "app",
@@ -139,7 +140,7 @@ class ChaosEngineer:
 
         # Dependency failure
         if len(services) > 1:
-            experiments.append(ChaosExperiment(
+            experiments.append(ChaosExperiment.model_construct(
                 name="Database Connection Failure",
                 type="dependency_failure",
                 target="database",
@@ -177,6 +178,44 @@ class ChaosEngineer:
             summary=summary
         )
 
+    async def _build_service_experiments(self, service: str) -> List[ChaosExperiment]:
+        """Build the network and pod-failure experiments for one service."""
+        async with self._semaphore:
+            experiments = []
+            values = {"service": service}
+
+            # Network chaos
+            experiments.append(ChaosExperiment.model_construct(
+                name=f"Network Latency - {service}",
+                type="network_latency",
+                target=service,
+                description=f"Inject 200ms latency to {service} to test timeout handling",
+                hypothesis="System should gracefully handle increased latency with proper timeouts and retries",
+                blast_radius="limited",
+                risk_level="low",
+                duration_minutes=10,
+                rollback_plan="Remove network policy/tc rules",
+                success_criteria=list(_NETWORK_LATENCY_CRITERIA),
+                commands=list(_NETWORK_LATENCY_COMMANDS)
+            ))
+
+            # Pod failure
+            experiments.append(ChaosExperiment.model_construct(
+                name=f"Pod Failure - {service}",
+                type="pod_failure",
+                target=service,
+                description=f"Kill random pod of {service} to test auto-recovery",
+                hypothesis="Kubernetes should automatically restart pod and service should remain available",
+                blast_radius="limited",
+                risk_level="low",
+                duration_minutes=5,
+                rollback_plan="Manual pod restart if needed",
+                success_criteria=list(_POD_FAILURE_CRITERIA),
+                commands=[c.format_map(values) for c in _POD_FAILURE_COMMAND_TEMPLATES]
+            ))
+
+            return experiments
+
     async def analyze_chaos_result(
         self,
         experiment: ChaosExperiment,
@@ -189,43 +228,51 @@ class ChaosEngineer:
         issues_found = []
         recommendations = []
 
-        # Analyze metrics changes
-        metrics_impact = {}
-        for metric, before_value in metrics_before.items():
-            after_value = metrics_after.get(metric, before_value)
-            change_pct = ((after_value - before_value) / before_value * 100) if before_value != 0 else 0
-            metrics_impact[metric] = {
-                "before": before_value,
+        # Analyze metrics changes in one vectorized pass
+        metric_names = list(metrics_before)
+        after_values = [metrics_after.get(m, metrics_before[m]) for m in metric_names]
+        before = np.fromiter(metrics_before.values(), dtype=np.float64, count=len(metric_names))
+        after = np.array(after_values, dtype=np.float64)
+        change = np.zeros_like(before)
+        np.divide((after - before) * 100, before, out=change, where=before != 0)
+
+        change_pcts = change.tolist()
+        metrics_impact = {
+            metric: {
+                "before": metrics_before[metric],
                 "after": after_value,
                 "change_pct": round(change_pct, 2)
             }
-
-            if abs(change_pct) > 50:
-                observations.append(f"{metric} changed by {change_pct:.1f}%")
+            for metric, after_value, change_pct in zip(metric_names, after_values, change_pcts)
+        }
+        observations.extend(
+            f"{metric_names[i]} changed by {change_pcts[i]:.1f}%"
+            for i in np.flatnonzero(np.abs(change) > 50)
+        )
 
         # Check for errors in logs
-        error_count = sum(1 for log in logs if 'error' in log.lower() or 'exception' in log.lower())
+        error_count = sum(1 for log in logs if _LOG_ERROR_RE.search(log))
         if error_count > 10:
             issues_found.append(f"High error rate: {error_count} errors in logs")
             recommendations.append("Improve error handling and circuit breaker implementation")
 
         # Determine resilience
-        critical_issues = len([i for i in issues_found if 'critical' in i.lower()])
-        if critical_issues > 0:
+        issue_count = len(issues_found)
+        if any('critical' in i.casefold() for i in issues_found):
             resilience = "poor"
-        elif len(issues_found) > 3:
+        elif issue_count > 3:
             resilience = "fair"
-        elif len(issues_found) > 0:
+        elif issue_count > 0:
             resilience = "good"
         else:
             resilience = "excellent"
 
-        if resilience in ["fair", "poor"]:
+        if resilience in ("fair", "poor"):
             recommendations.append("Add retry logic with exponential backoff")
             recommendations.append("Implement health checks and readiness probes")
             recommendations.append("Configure resource limits and autoscaling")
 
-        status = "success" if resilience in ["excellent", "good"] else "partial"
+        status = "success" if resilience in ("excellent", "good") else "partial"
 
         return ChaosResult(
             experiment_name=experiment.name,
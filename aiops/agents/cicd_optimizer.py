@@ -1,16 +1,133 @@
 """CI/CD Optimizer Agent - Intelligent CI/CD pipeline optimization."""
 
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field
+import asyncio
+import functools
+from heapq import nlargest
+from operator import itemgetter
+from typing import AsyncIterator, Final, List, Dict, Any, Optional
+from pydantic import BaseModel, ConfigDict, Field
 from aiops.agents.base_agent import BaseAgent
+from aiops.core.failure_classifier import classify_failure
+from aiops.core.log_trim import trim_logs
 from aiops.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Prompts lead with static text so the prefix is byte-identical across calls
+# and eligible for provider prefix caching; per-call values come last.
+_CICD_SYSTEM_PROMPT: Final[str] = """You are an expert DevOps engineer specializing in CI/CD optimization.
+
+Your expertise includes:
+1. **Pipeline Performance**: Reducing build times, parallel execution
+2. **Reliability**: Improving success rates, handling flaky tests
+3. **Resource Optimization**: Right-sizing compute resources, caching
+4. **Security**: Secrets management, security scanning, compliance
+5. **Cost Optimization**: Reducing CI/CD costs while maintaining quality
+
+Optimization Strategies:
+- Parallelize independent stages
+- Implement smart caching (dependencies, build artifacts, Docker layers)
+- Optimize test execution (test splitting, fail-fast strategies)
+- Use appropriate resource sizing
+- Implement conditional execution
+- Reduce redundant steps
+
+Focus on:
+- Actionable recommendations
+- Measurable improvements
+- Quick wins and long-term optimizations
+- Trade-offs between speed, reliability, and cost
+
+For the pipeline in each request, provide:
+1. Identified issues and bottlenecks
+2. Specific optimization recommendations
+3. Parallelization opportunities
+4. Caching strategies
+5. Resource allocation recommendations
+6. Estimated improvement in pipeline duration
+"""
+
+_BUILD_FAILURE_SYSTEM_PROMPT: Final[str] = """You are an expert at diagnosing and fixing CI/CD build failures.
+
+Analyze failures systematically:
+1. Identify the exact failing step
+2. Determine root cause (not just symptoms)
+3. Provide quick fixes when possible
+4. Give detailed solution steps
+5. Suggest prevention strategies
+
+Common failure categories:
+- Test failures (unit, integration, e2e)
+- Compilation/build errors
+- Dependency issues
+- Infrastructure problems
+- Deployment failures
+- Configuration errors
+- Resource constraints
+
+For the failure in each request, provide root cause analysis and
+step-by-step fix instructions.
+"""
+
+_TEST_OPT_SYSTEM_PROMPT: Final[str] = """You are an expert in test optimization and test-driven development.
+
+Optimize test suites by:
+1. Identifying slow tests
+2. Suggesting test parallelization
+3. Recommending test splitting strategies
+4. Finding redundant tests
+5. Suggesting fail-fast approaches
+
+Focus on reducing CI time while maintaining coverage.
+
+For the test suite in each request, provide specific test optimization
+recommendations.
+"""
+
+# Token budgets for logs embedded in prompts
+_MAX_PIPELINE_LOG_TOKENS: Final[int] = 500
+_MAX_BUILD_LOG_TOKENS: Final[int] = 1500
+_MAX_PREVIOUS_BUILD_LOG_TOKENS: Final[int] = 250
+
+# Build failure analyses expire sooner than pipeline analyses, as what a
+# log means drifts with the infrastructure that produced it
+_BUILD_FAILURE_CACHE_TTL: Final[int] = 3600
+
+# Slowest tests listed in the prompt, and the duration (s) that counts as slow
+_MAX_LISTED_TESTS: Final[int] = 20
+_SLOW_TEST_SECONDS: Final[float] = 10
+
+_CICD_USER_TEMPLATE: Final[str] = """Analyze and optimize the following CI/CD pipeline:
+
+**Pipeline Configuration**:
+```
+{pipeline_config}
+```
+
+{logs_block}{metrics_block}"""
+
+_BUILD_FAILURE_USER_TEMPLATE: Final[str] = """Analyze this build failure:
+
+**Build Logs**:
+```
+{build_logs}
+```
+{config_block}{previous_block}"""
+
+_TEST_OPT_USER_TEMPLATE: Final[str] = """Optimize the following test suite:
+
+**Test Results**:
+```
+{test_results}
+```
+{durations_block}"""
+
 
 class PipelineIssue(BaseModel):
     """Represents a CI/CD pipeline issue."""
 
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     stage: str = Field(description="Pipeline stage where issue occurs")
     issue_type: str = Field(description="Type: performance, reliability, configuration, security")
     severity: str = Field(description="Severity: critical, high, medium, low")
@@ -22,6 +139,8 @@ class PipelineIssue(BaseModel):
 class PipelineOptimization(BaseModel):
     """CI/CD pipeline optimization recommendations."""
 
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     current_duration: Optional[float] = Field(default=None, description="Current pipeline duration (minutes)")
     estimated_duration: Optional[float] = Field(default=None, description="Estimated duration after optimization (minutes)")
     issues: List[PipelineIssue] = Field(description="Identified issues")
@@ -31,9 +150,18 @@ class PipelineOptimization(BaseModel):
     resource_recommendations: Dict[str, Any] = Field(description="Resource allocation recommendations")
 
 
+# Fields that follow issues in PipelineOptimization; seeing one means the
+# issues list is complete
+_AFTER_ISSUES: Final = frozenset(
+    {"optimizations", "parallel_opportunities", "caching_opportunities", "resource_recommendations"}
+)
+
+
 class BuildFailureAnalysis(BaseModel):
     """Analysis of build failures."""
 
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     failure_category: str = Field(description="Category: test, compilation, deployment, infrastructure")
     root_cause: str = Field(description="Root cause of failure")
     failed_step: str = Field(description="Step/stage that failed")
@@ -46,8 +174,24 @@ class BuildFailureAnalysis(BaseModel):
 class CICDOptimizerAgent(BaseAgent):
     """Agent for CI/CD pipeline optimization."""
 
-    def __init__(self, **kwargs):
-        super().__init__(name="CICDOptimizerAgent", **kwargs)
+    cache_version = "cicd-2026-10"
+
+    def __init__(
+        self,
+        llm_provider: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = 64,
+        cache_ttl: int = 86400,
+    ):
+        super().__init__(
+            name="CICDOptimizerAgent",
+            llm_provider=llm_provider,
+            model=model,
+            temperature=temperature,
+            max_concurrency=max_concurrency,
+            cache_ttl=cache_ttl,
+        )
 
     async def execute(
         self,
@@ -69,10 +213,13 @@ class CICDOptimizerAgent(BaseAgent):
         logger.info("Analyzing CI/CD pipeline for optimization")
 
         system_prompt = self._create_system_prompt()
-        user_prompt = self._create_user_prompt(pipeline_config, pipeline_logs, metrics)
+        # Log trimming is CPU-bound, so keep it off the event loop
+        user_prompt = await asyncio.to_thread(
+            self._create_user_prompt, pipeline_config, pipeline_logs, metrics
+        )
 
         try:
-            result = await self._generate_structured_response(
+            result = await self._cached_structured_response(
                 prompt=user_prompt,
                 system_prompt=system_prompt,
                 schema=PipelineOptimization,
@@ -95,130 +242,167 @@ class CICDOptimizerAgent(BaseAgent):
 
         except Exception as e:
             logger.error(f"Pipeline optimization failed: {e}")
-            return PipelineOptimization(
-                issues=[],
-                optimizations=[f"Analysis failed: {str(e)}"],
-                parallel_opportunities=[],
-                caching_opportunities=[],
-                resource_recommendations={},
-            )
+            return self._failed_result(e)
 
-    def _create_system_prompt(self) -> str:
-        """Create system prompt for CI/CD optimization."""
-        return """You are an expert DevOps engineer specializing in CI/CD optimization.
+    async def execute_batch(
+        self,
+        pipelines: List[str],
+        batch_size: int = 16,
+    ) -> List[PipelineOptimization]:
+        """
+        Analyze many pipelines, packing up to batch_size into each LLM request.
 
-Your expertise includes:
-1. **Pipeline Performance**: Reducing build times, parallel execution
-2. **Reliability**: Improving success rates, handling flaky tests
-3. **Resource Optimization**: Right-sizing compute resources, caching
-4. **Security**: Secrets management, security scanning, compliance
-5. **Cost Optimization**: Reducing CI/CD costs while maintaining quality
+        Packed requests share one system prompt and one round trip; groups
+        run concurrently.
 
-Optimization Strategies:
-- Parallelize independent stages
-- Implement smart caching (dependencies, build artifacts, Docker layers)
-- Optimize test execution (test splitting, fail-fast strategies)
-- Use appropriate resource sizing
-- Implement conditional execution
-- Reduce redundant steps
+        Args:
+            pipelines: Pipeline configurations (YAML, JSON, etc.)
+            batch_size: Maximum pipelines per request
 
-Focus on:
-- Actionable recommendations
-- Measurable improvements
-- Quick wins and long-term optimizations
-- Trade-offs between speed, reliability, and cost
-"""
+        Returns:
+            One PipelineOptimization per pipeline, in input order
+        """
+        logger.info(f"Analyzing {len(pipelines)} CI/CD pipelines in groups of {batch_size}")
 
-    def _create_user_prompt(
+        groups = [pipelines[i:i + batch_size] for i in range(0, len(pipelines), batch_size)]
+        responses = await self._fan_out(
+            self._generate_packed_response(
+                prompts=[self._create_user_prompt(config) for config in group],
+                schema=PipelineOptimization,
+                system_prompt=self._create_system_prompt(),
+            )
+            for group in groups
+        )
+
+        results = []
+        for group, response in zip(groups, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Pipeline optimization failed for {len(group)} pipelines: {response}")
+                results.extend(self._failed_result(response) for _ in group)
+            else:
+                results.extend(response)
+        return results
+
+    def _failed_result(self, error: Exception) -> PipelineOptimization:
+        """Build the result returned when an analysis fails."""
+        return PipelineOptimization(
+            issues=[],
+            optimizations=[f"Analysis failed: {str(error)}"],
+            parallel_opportunities=[],
+            caching_opportunities=[],
+            resource_recommendations={},
+        )
+
+    async def execute_stream(
         self,
         pipeline_config: str,
         pipeline_logs: Optional[str] = None,
         metrics: Optional[Dict[str, Any]] = None,
-    ) -> str:
-        """Create user prompt for pipeline optimization."""
-        prompt = "Analyze and optimize the following CI/CD pipeline:\n\n"
+    ) -> AsyncIterator[PipelineIssue]:
+        """
+        Analyze CI/CD pipeline, yielding each issue as soon as the model finishes it.
 
-        prompt += f"**Pipeline Configuration**:\n```\n{pipeline_config}\n```\n\n"
+        Callers can start acting on the first issues while the rest of the
+        analysis is still being generated. Stopping iteration early cancels
+        the remaining generation.
 
-        if pipeline_logs:
-            prompt += f"**Recent Execution Logs**:\n```\n{pipeline_logs[:2000]}\n```\n\n"
+        Args:
+            pipeline_config: Pipeline configuration (YAML, JSON, etc.)
+            pipeline_logs: Recent pipeline execution logs
+            metrics: Pipeline metrics (duration, success rate, etc.)
 
-        if metrics:
-            prompt += f"**Pipeline Metrics**:\n"
-            for key, value in metrics.items():
-                prompt += f"- {key}: {value}\n"
-            prompt += "\n"
+        Yields:
+            PipelineIssue objects in the order the model reports them
+        """
+        logger.info("Streaming CI/CD pipeline analysis")
+
+        stream = self._generate_structured_stream(
+            prompt=await asyncio.to_thread(
+                self._create_user_prompt, pipeline_config, pipeline_logs, metrics
+            ),
+            system_prompt=self._create_system_prompt(),
+            schema=PipelineOptimization,
+        )
+        items = self._stream_list_items(stream, "issues", PipelineIssue, _AFTER_ISSUES)
+        try:
+            async for issue in items:
+                yield issue
+        finally:
+            await items.aclose()
 
-        prompt += """Provide:
-1. Identified issues and bottlenecks
-2. Specific optimization recommendations
-3. Parallelization opportunities
-4. Caching strategies
-5. Resource allocation recommendations
-6. Estimated improvement in pipeline duration
-"""
+    def _create_system_prompt(self) -> str:
+        """Create system prompt for CI/CD optimization."""
+        return _CICD_SYSTEM_PROMPT
 
-        return prompt
+    def _create_user_prompt(
+        self,
+        pipeline_config: str,
+        pipeline_logs: Optional[str] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Create user prompt for pipeline optimization."""
+        logs_block = (
+            f"**Recent Execution Logs**:\n```\n"
+            f"{trim_logs(pipeline_logs, _MAX_PIPELINE_LOG_TOKENS, self.llm.model)}\n```\n\n"
+            if pipeline_logs
+            else ""
+        )
+        metrics_block = (
+            "**Pipeline Metrics**:\n" + "".join(f"- {key}: {value}\n" for key, value in metrics.items()) + "\n"
+            if metrics
+            else ""
+        )
+
+        return _CICD_USER_TEMPLATE.format_map({
+            "pipeline_config": pipeline_config,
+            "logs_block": logs_block,
+            "metrics_block": metrics_block,
+        })
 
     async def analyze_build_failure(
         self,
         build_logs: str,
         pipeline_config: Optional[str] = None,
         previous_successful_build: Optional[str] = None,
+        detailed: bool = False,
     ) -> BuildFailureAnalysis:
         """
         Analyze build failure and provide fix recommendations.
 
+        Failures with a known log signature (out of memory, image pull
+        errors, dependency resolution, compiler errors, failing tests, ...)
+        are classified locally without calling the LLM unless detailed is set.
+
         Args:
             build_logs: Build failure logs
             pipeline_config: Pipeline configuration
             previous_successful_build: Logs from last successful build
+            detailed: Always ask the LLM for a root cause and solution
+                specific to these logs
 
         Returns:
             BuildFailureAnalysis with root cause and solutions
         """
         logger.info(f"Analyzing build failure ({len(build_logs)} chars of logs)")
 
-        system_prompt = """You are an expert at diagnosing and fixing CI/CD build failures.
+        if not detailed:
+            classified = await asyncio.to_thread(classify_failure, build_logs)
+            if classified is not None:
+                logger.info(f"Build failure classified from logs: {classified['failure_category']}")
+                return BuildFailureAnalysis(**classified)
 
-Analyze failures systematically:
-1. Identify the exact failing step
-2. Determine root cause (not just symptoms)
-3. Provide quick fixes when possible
-4. Give detailed solution steps
-5. Suggest prevention strategies
+        system_prompt = _BUILD_FAILURE_SYSTEM_PROMPT
 
-Common failure categories:
-- Test failures (unit, integration, e2e)
-- Compilation/build errors
-- Dependency issues
-- Infrastructure problems
-- Deployment failures
-- Configuration errors
-- Resource constraints
-"""
-
-        user_prompt = f"""Analyze this build failure:
-
-**Build Logs**:
-```
-{build_logs}
-```
-"""
-
-        if pipeline_config:
-            user_prompt += f"\n**Pipeline Config**:\n```\n{pipeline_config}\n```\n"
-
-        if previous_successful_build:
-            user_prompt += f"\n**Previous Successful Build Logs** (for comparison):\n```\n{previous_successful_build[:1000]}\n```\n"
-
-        user_prompt += "\nProvide root cause analysis and step-by-step fix instructions."
+        user_prompt = await asyncio.to_thread(
+            self._create_build_failure_prompt, build_logs, pipeline_config, previous_successful_build
+        )
 
         try:
-            result = await self._generate_structured_response(
+            result = await self._cached_structured_response(
                 prompt=user_prompt,
                 system_prompt=system_prompt,
                 schema=BuildFailureAnalysis,
+                ttl=min(self.cache_ttl, _BUILD_FAILURE_CACHE_TTL),
             )
 
             logger.info(f"Build failure analysis completed: {result.failure_category}")
@@ -235,6 +419,26 @@ Common failure categories:
                 prevention=[],
             )
 
+    def _create_build_failure_prompt(
+        self,
+        build_logs: str,
+        pipeline_config: Optional[str] = None,
+        previous_successful_build: Optional[str] = None,
+    ) -> str:
+        """Create user prompt for build failure analysis."""
+        config_block = f"\n**Pipeline Config**:\n```\n{pipeline_config}\n```\n" if pipeline_config else ""
+        previous_block = (
+            f"\n**Previous Successful Build Logs** (for comparison):\n```\n"
+            f"{trim_logs(previous_successful_build, _MAX_PREVIOUS_BUILD_LOG_TOKENS, self.llm.model)}\n```\n"
+            if previous_successful_build
+            else ""
+        )
+        return _BUILD_FAILURE_USER_TEMPLATE.format_map({
+            "build_logs": trim_logs(build_logs, _MAX_BUILD_LOG_TOKENS, self.llm.model, dedupe_frames=True),
+            "config_block": config_block,
+            "previous_block": previous_block,
+        })
+
     async def suggest_test_optimization(
         self,
         test_results: str,
@@ -252,47 +456,43 @@ Common failure categories:
         """
         logger.info("Analyzing test suite for optimization")
 
-        system_prompt = """You are an expert in test optimization and test-driven development.
-
-Optimize test suites by:
-1. Identifying slow tests
-2. Suggesting test parallelization
-3. Recommending test splitting strategies
-4. Finding redundant tests
-5. Suggesting fail-fast approaches
-
-Focus on reducing CI time while maintaining coverage.
-"""
-
-        user_prompt = f"""Optimize the following test suite:
-
-**Test Results**:
-```
-{test_results}
-```
-"""
-
-        if test_duration_data:
-            user_prompt += "\n**Test Durations**:\n"
-            for test, duration in sorted(
-                test_duration_data.items(), key=lambda x: x[1], reverse=True
-            )[:20]:
-                user_prompt += f"- {test}: {duration}s\n"
+        system_prompt = _TEST_OPT_SYSTEM_PROMPT
 
-        user_prompt += "\nProvide specific test optimization recommendations."
+        durations_block = (
+            "\n**Test Durations**:\n"
+            + "".join(
+                f"- {test}: {duration}s\n"
+                for test, duration in nlargest(
+                    _MAX_LISTED_TESTS, test_duration_data.items(), key=itemgetter(1)
+                )
+            )
+            if test_duration_data
+            else ""
+        )
+        user_prompt = _TEST_OPT_USER_TEMPLATE.format_map({
+            "test_results": test_results,
+            "durations_block": durations_block,
+        })
+        slow_tests = [
+            test
+            for test, duration in (test_duration_data or {}).items()
+            if duration > _SLOW_TEST_SECONDS
+        ]
 
         try:
             response = await self._generate_response(user_prompt, system_prompt)
 
             return {
                 "recommendations": response,
-                "slow_tests": [
-                    test
-                    for test, duration in (test_duration_data or {}).items()
-                    if duration > 10
-                ],
+                "slow_tests": slow_tests,
             }
 
         except Exception as e:
             logger.error(f"Test optimization failed: {e}")
             return {"recommendations": f"Analysis failed: {str(e)}", "slow_tests": []}
+
+
+@functools.lru_cache(maxsize=None)
+def get_cicd_agent() -> CICDOptimizerAgent:
+    """Shared CICDOptimizerAgent with the default configuration."""
+    return CICDOptimizerAgent()
@@ -1,111 +1,41 @@
 """Code Quality Agent - Comprehensive code quality analysis."""
 
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field
+import asyncio
+import functools
+import re
+import sys
+from typing import Annotated, Final, List, Dict, Any, Optional
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
 from aiops.agents.base_agent import BaseAgent
 from aiops.core.logger import get_logger
+from aiops.tools.code_metrics import find_duplicate_blocks, python_complexity, split_top_level
 
 logger = get_logger(__name__)
 
+# Searched case-insensitively instead of lowercasing a copy of the response
+_DUPLICATE_RE = re.compile(r"duplicate", re.IGNORECASE)
 
-class QualityMetric(BaseModel):
-    """Code quality metric."""
-
-    name: str = Field(description="Metric name")
-    score: float = Field(description="Score (0-100)")
-    status: str = Field(description="Status: excellent, good, fair, poor")
-    details: str = Field(description="Metric details")
-    recommendations: List[str] = Field(description="Improvement recommendations")
-
-
-class CodeSmell(BaseModel):
-    """Code smell detection."""
-
-    type: str = Field(description="Smell type: long_method, god_class, duplicate_code, etc.")
-    severity: str = Field(description="Severity: high, medium, low")
-    location: str = Field(description="Location (file:line or class/method)")
-    description: str = Field(description="Description of the smell")
-    refactoring_suggestion: str = Field(description="How to refactor")
-    impact: str = Field(description="Impact on maintainability")
-
-
-class CodeQualityResult(BaseModel):
-    """Comprehensive code quality result."""
-
-    overall_quality_score: float = Field(description="Overall quality score (0-100)")
-    grade: str = Field(description="Quality grade: A, B, C, D, F")
-    summary: str = Field(description="Quality summary")
-    metrics: List[QualityMetric] = Field(description="Individual quality metrics")
-    code_smells: List[CodeSmell] = Field(description="Detected code smells")
-    maintainability_index: float = Field(description="Maintainability index (0-100)")
-    technical_debt: Dict[str, Any] = Field(description="Technical debt estimate")
-    best_practices: Dict[str, str] = Field(description="Best practices compliance")
-    recommendations: List[str] = Field(description="Priority recommendations")
-
-
-class CodeQualityAgent(BaseAgent):
-    """Agent for comprehensive code quality analysis."""
-
-    def __init__(self, **kwargs):
-        super().__init__(name="CodeQualityAgent", **kwargs)
-
-    async def execute(
-        self,
-        code: str,
-        language: str = "python",
-        project_type: Optional[str] = None,
-    ) -> CodeQualityResult:
-        """
-        Perform comprehensive code quality analysis.
-
-        Args:
-            code: Code to analyze
-            language: Programming language
-            project_type: Project type (web, api, library, etc.)
-
-        Returns:
-            CodeQualityResult with detailed analysis
-        """
-        logger.info(f"Analyzing code quality for {language} code")
-
-        system_prompt = self._create_system_prompt(language, project_type)
-        user_prompt = self._create_user_prompt(code)
+_SUMMARY_CHARS = 200
 
-        try:
-            result = await self._generate_structured_response(
-                prompt=user_prompt,
-                system_prompt=system_prompt,
-                schema=CodeQualityResult,
-            )
+# Output budget: decode time grows with every generated token, so each
+# response is capped and asked for its most impactful items only
+_MAX_METRICS: Final[int] = 6
+_MAX_CODE_SMELLS: Final[int] = 15
+_MAX_RECOMMENDATIONS: Final[int] = 8
+_MAX_RESPONSE_TOKENS: Final[int] = 1500
 
-            logger.info(
-                f"Quality analysis completed: score {result.overall_quality_score}/100, "
-                f"grade {result.grade}, {len(result.code_smells)} smells detected"
-            )
-
-            return result
+# Prompts lead with static text so the prefix is byte-identical across calls
+# and eligible for provider prefix caching; per-call values come last.
+_QUALITY_ROLE: Final[str] = "You are an expert code quality analyst.\n\n"
 
-        except Exception as e:
-            logger.error(f"Code quality analysis failed: {e}")
-            return CodeQualityResult(
-                overall_quality_score=0,
-                grade="F",
-                summary=f"Analysis failed: {str(e)}",
-                metrics=[],
-                code_smells=[],
-                maintainability_index=0,
-                technical_debt={},
-                best_practices={},
-                recommendations=[],
-            )
+_QUALITY_GUIDANCE: Final[str] = """Provide honest, actionable feedback.
+Focus on highest-impact improvements.
 
-    def _create_system_prompt(
-        self, language: str, project_type: Optional[str] = None
-    ) -> str:
-        """Create system prompt for quality analysis."""
-        prompt = f"""You are an expert code quality analyst specializing in {language}.
+"""
 
-Analyze code quality across multiple dimensions:
+# Each analysis focus runs as its own request so they can proceed concurrently
+_QUALITY_FOCUS_PROMPTS: Final[Dict[str, str]] = {
+    "metrics": _QUALITY_ROLE + """Analyze code quality across multiple dimensions:
 
 1. **Maintainability** (0-100):
    - Code complexity
@@ -149,7 +79,18 @@ Analyze code quality across multiple dimensions:
    - Space complexity
    - Optimization opportunities
 
-**Code Smells to Detect**:
+**Maintainability Index**: Calculate based on:
+- Cyclomatic complexity
+- Lines of code
+- Halstead volume
+- Comment percentage
+
+""" + _QUALITY_GUIDANCE + """For the code in each request, provide:
+1. A score, status, details and recommendations for each quality dimension
+2. Maintainability index
+3. Overall quality score, grade and summary
+""",
+    "smells": _QUALITY_ROLE + """**Code Smells to Detect**:
 - Long Method (>50 lines)
 - Long Parameter List (>5 parameters)
 - God Class (>500 lines or >20 methods)
@@ -171,97 +112,479 @@ Analyze code quality across multiple dimensions:
 - Refused Bequest
 - Comments (excessive comments masking bad code)
 
-**Maintainability Index**: Calculate based on:
-- Cyclomatic complexity
-- Lines of code
-- Halstead volume
-- Comment percentage
+""" + _QUALITY_GUIDANCE + f"""For the code in each request, list at most the {_MAX_CODE_SMELLS} most impactful code
+smells, each with its location, severity, description, refactoring
+suggestion and impact.
+""",
+    "debt": _QUALITY_ROLE + """**Technical Debt**: Estimate refactoring effort in hours.
+
+**Best Practices**: Assess compliance with the language's idioms, style
+conventions, error handling and security practices.
+
+""" + _QUALITY_GUIDANCE + f"""For the code in each request, provide:
+1. Technical debt estimate
+2. Best practices compliance
+3. At most {_MAX_RECOMMENDATIONS} priority improvement recommendations
+""",
+}
+
+# Code larger than this is split into top-level definitions for smell detection
+_MAX_CHUNK_CHARS: Final[int] = 12000
+
+# Smaller chunks for execute_exhaustive, so each gets its own smell budget
+_EXHAUSTIVE_CHUNK_CHARS: Final[int] = 3000
 
-**Technical Debt**: Estimate refactoring effort in hours.
+_QUALITY_USER_PROMPT_HEADER: Final[str] = "Perform comprehensive code quality analysis:\n\n**Code**:\n```\n"
 
+_COMPLEXITY_SYSTEM_PROMPT: Final[str] = """You are an expert in code complexity analysis.
+
+Calculate:
+- Cyclomatic Complexity (McCabe)
+- Cognitive Complexity
+- Nesting Depth
+- Lines of Code (LOC)
+- Maintainability Index
+
+Provide per-function and overall metrics.
+
+For the code in each request, provide:
+1. Cyclomatic complexity per function
+2. Overall complexity score
+3. Most complex functions
+4. Recommendations for simplification
 """
 
-        if project_type:
-            prompt += f"\n**Project Type**: {project_type}\nApply domain-specific quality standards.\n"
+_DUPLICATE_SYSTEM_PROMPT: Final[str] = """You are an expert at detecting code duplication.
 
-        prompt += """
-Provide honest, actionable feedback.
-Focus on highest-impact improvements.
+Identify:
+- Exact duplicates
+- Similar code blocks (>80% similarity)
+- Copy-paste patterns
+- Refactoring opportunities
+
+Suggest DRY refactoring approaches.
+
+For the code in each request, find code blocks that are duplicated or very
+similar and suggest refactoring to eliminate duplication.
 """
 
-        return prompt
+_REFACTOR_SYSTEM_PROMPT: Final[str] = """You are an expert in code refactoring and clean code principles.
 
-    def _create_user_prompt(self, code: str) -> str:
-        """Create user prompt for quality analysis."""
-        prompt = "Perform comprehensive code quality analysis:\n\n"
+Suggest refactorings following:
+- SOLID principles
+- DRY (Don't Repeat Yourself)
+- KISS (Keep It Simple, Stupid)
+- YAGNI (You Aren't Gonna Need It)
+- Clean Code principles
+
+Provide before/after examples when possible.
+
+For the code in each request, provide:
+1. Specific refactoring recommendations
+2. Priority order
+3. Expected benefits
+4. Code examples where helpful
+"""
+
+
+# Markdown quality report sections
+_REPORT_HEADER: Final[str] = """# Code Quality Report
+
+## Overall Score: {score}/100 (Grade: {grade})
+
+{summary}
+
+## Quality Metrics
+
+"""
+
+_REPORT_METRIC: Final[str] = """
+### {name}: {score}/100 ({status})
+
+{details}
+
+**Recommendations:**
+"""
+
+_REPORT_SMELL: Final[str] = """
+### [{severity}] {type}
+
+**Location**: {location}
+
+**Description**: {description}
 
-        prompt += f"**Code**:\n```\n{code}\n```\n\n"
+**Refactoring**: {refactoring}
 
-        prompt += """Analyze:
-1. All quality metrics (maintainability, readability, reliability, etc.)
-2. Code smells and anti-patterns
-3. Maintainability index
-4. Technical debt estimate
-5. Best practices compliance
-6. Priority improvement recommendations
+**Impact**: {impact}
 
-Provide specific, actionable feedback.
 """
 
+
+@functools.lru_cache(maxsize=256)
+def _quality_system_prompt(focus: str, language: str, project_type: Optional[str]) -> str:
+    """
+    Build the system prompt for one analysis focus, language and project type.
+
+    Each combination is built once and interned, so every request for it
+    sends the same string object.
+    """
+    prompt = _QUALITY_FOCUS_PROMPTS[focus] + f"\n**Language**: {language}\n"
+    if project_type:
+        prompt += f"**Project Type**: {project_type}\nApply domain-specific quality standards.\n"
+    return sys.intern(prompt)
+
+
+class QualityMetric(BaseModel):
+    """Code quality metric."""
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    name: str = Field(description="Metric name")
+    score: float = Field(description="Score (0-100)")
+    status: str = Field(description="Status: excellent, good, fair, poor")
+    details: str = Field(description="Metric details")
+    recommendations: List[str] = Field(description="Improvement recommendations")
+
+
+class CodeSmell(BaseModel):
+    """Code smell detection."""
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    type: str = Field(description="Smell type: long_method, god_class, duplicate_code, etc.")
+    severity: str = Field(description="Severity: high, medium, low")
+    location: str = Field(description="Location (file:line or class/method)")
+    description: str = Field(description="Description of the smell")
+    refactoring_suggestion: str = Field(description="How to refactor")
+    impact: str = Field(description="Impact on maintainability")
+
+
+class CodeQualityResult(BaseModel):
+    """Comprehensive code quality result."""
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    overall_quality_score: float = Field(description="Overall quality score (0-100)")
+    grade: str = Field(description="Quality grade: A, B, C, D, F")
+    summary: str = Field(description="Quality summary")
+    metrics: List[QualityMetric] = Field(description="Individual quality metrics")
+    code_smells: List[CodeSmell] = Field(description="Detected code smells")
+    maintainability_index: float = Field(description="Maintainability index (0-100)")
+    technical_debt: Dict[str, Any] = Field(description="Technical debt estimate")
+    best_practices: Dict[str, str] = Field(description="Best practices compliance")
+    recommendations: List[str] = Field(description="Priority recommendations")
+
+
+def _keep_first(limit: int) -> BeforeValidator:
+    """Keep the first limit items of a list; models do not always respect maxItems."""
+    return BeforeValidator(lambda items: items[:limit] if isinstance(items, list) else items)
+
+
+class QualityMetricsAnalysis(BaseModel):
+    """Quality scores and metrics, one part of a CodeQualityResult."""
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    overall_quality_score: float = Field(description="Overall quality score (0-100)")
+    grade: str = Field(description="Quality grade: A, B, C, D, F")
+    summary: str = Field(description="Quality summary")
+    metrics: Annotated[List[QualityMetric], _keep_first(_MAX_METRICS)] = Field(
+        max_length=_MAX_METRICS, description="Individual quality metrics"
+    )
+    maintainability_index: float = Field(description="Maintainability index (0-100)")
+
+
+class CodeSmellAnalysis(BaseModel):
+    """Detected code smells, one part of a CodeQualityResult."""
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    code_smells: Annotated[List[CodeSmell], _keep_first(_MAX_CODE_SMELLS)] = Field(
+        max_length=_MAX_CODE_SMELLS, description="Most impactful code smells"
+    )
+
+
+class TechnicalDebtAnalysis(BaseModel):
+    """Technical debt and practices, one part of a CodeQualityResult."""
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    technical_debt: Dict[str, Any] = Field(description="Technical debt estimate")
+    best_practices: Dict[str, str] = Field(description="Best practices compliance")
+    recommendations: Annotated[List[str], _keep_first(_MAX_RECOMMENDATIONS)] = Field(
+        max_length=_MAX_RECOMMENDATIONS, description="Priority recommendations"
+    )
+
+
+class CodeQualityAgent(BaseAgent):
+    """Agent for comprehensive code quality analysis."""
+
+    cache_version = "quality-2026-10"
+
+    def __init__(
+        self,
+        llm_provider: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_concurrency: int = 64,
+        cache_ttl: int = 3600,
+        max_response_tokens: Optional[int] = _MAX_RESPONSE_TOKENS,
+    ):
+        super().__init__(
+            name="CodeQualityAgent",
+            llm_provider=llm_provider,
+            model=model,
+            temperature=temperature,
+            max_concurrency=max_concurrency,
+            cache_ttl=cache_ttl,
+            max_response_tokens=max_response_tokens,
+        )
+
+    async def execute(
+        self,
+        code: str,
+        language: str = "python",
+        project_type: Optional[str] = None,
+    ) -> CodeQualityResult:
+        """
+        Perform comprehensive code quality analysis.
+
+        Metrics, code smells and technical debt are analyzed by separate
+        concurrent requests. Large Python code is split into top-level
+        definitions for smell detection, with the chunks analyzed concurrently.
+        Each chunk reports at most its 15 most impactful smells; use
+        execute_exhaustive for a more complete list.
+
+        Args:
+            code: Code to analyze
+            language: Programming language
+            project_type: Project type (web, api, library, etc.)
+
+        Returns:
+            CodeQualityResult with detailed analysis
+        """
+        return await self._execute(code, language, project_type, _MAX_CHUNK_CHARS)
+
+    async def execute_exhaustive(
+        self,
+        code: str,
+        language: str = "python",
+        project_type: Optional[str] = None,
+    ) -> CodeQualityResult:
+        """
+        Perform code quality analysis reporting smells from every part of the code.
+
+        Python code is split into much smaller chunks than in execute, each
+        with its own smell budget, at the cost of more requests. Other
+        languages are analyzed as with execute.
+
+        Args:
+            code: Code to analyze
+            language: Programming language
+            project_type: Project type (web, api, library, etc.)
+
+        Returns:
+            CodeQualityResult with detailed analysis
+        """
+        return await self._execute(code, language, project_type, _EXHAUSTIVE_CHUNK_CHARS)
+
+    async def _execute(
+        self,
+        code: str,
+        language: str,
+        project_type: Optional[str],
+        chunk_chars: int,
+    ) -> CodeQualityResult:
+        """Run the quality analysis, detecting smells in chunks of chunk_chars."""
+        logger.info(f"Analyzing code quality for {language} code")
+
+        chunks = (
+            await asyncio.to_thread(split_top_level, code, chunk_chars)
+            if language.lower() == "python"
+            else [(1, code)]
+        )
+
+        try:
+            metrics, debt, *smells = await asyncio.gather(
+                self._analyze(code, "metrics", language, project_type, QualityMetricsAnalysis),
+                self._analyze(code, "debt", language, project_type, TechnicalDebtAnalysis),
+                *(
+                    self._analyze(chunk, "smells", language, project_type, CodeSmellAnalysis, first_line)
+                    for first_line, chunk in chunks
+                ),
+            )
+            result = CodeQualityResult(
+                **metrics.model_dump(),
+                **debt.model_dump(),
+                code_smells=[smell for analysis in smells for smell in analysis.code_smells],
+            )
+
+            logger.info(
+                f"Quality analysis completed: score {result.overall_quality_score}/100, "
+                f"grade {result.grade}, {len(result.code_smells)} smells detected"
+            )
+
+            return result
+
+        except Exception as e:
+            logger.error(f"Code quality analysis failed: {e}")
+            return self._failed_result(e)
+
+    async def execute_batch(
+        self,
+        code_files: List[str],
+        language: str = "python",
+        project_type: Optional[str] = None,
+        batch_size: int = 8,
+    ) -> List[CodeQualityResult]:
+        """
+        Analyze many files, packing up to batch_size into each LLM request.
+
+        Each group of files takes one metrics, one smells and one technical
+        debt request instead of three per file. Files are not split into
+        chunks, so very large files are better analyzed with execute.
+
+        Args:
+            code_files: Source of each file to analyze
+            language: Programming language of all files
+            project_type: Project type (web, api, library, etc.)
+            batch_size: Maximum files per request
+
+        Returns:
+            One CodeQualityResult per file, in input order
+        """
+        logger.info(f"Analyzing code quality for {len(code_files)} {language} files in groups of {batch_size}")
+
+        groups = [code_files[i:i + batch_size] for i in range(0, len(code_files), batch_size)]
+        responses = await self._fan_out(self._analyze_group(group, language, project_type) for group in groups)
+
+        results = []
+        for group, response in zip(groups, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Code quality analysis failed for {len(group)} files: {response}")
+                results.extend(self._failed_result(response) for _ in group)
+            else:
+                results.extend(response)
+        return results
+
+    async def _analyze_group(
+        self,
+        code_files: List[str],
+        language: str,
+        project_type: Optional[str],
+    ) -> List[CodeQualityResult]:
+        """Run all three focused analyses for a group of files in packed requests."""
+        prompts = [self._create_user_prompt(code) for code in code_files]
+        metrics, debt, smells = await asyncio.gather(*(
+            self._generate_packed_response(
+                prompts=prompts,
+                schema=schema,
+                system_prompt=self._create_system_prompt(language, project_type, focus),
+            )
+            for focus, schema in (
+                ("metrics", QualityMetricsAnalysis),
+                ("debt", TechnicalDebtAnalysis),
+                ("smells", CodeSmellAnalysis),
+            )
+        ))
+        return [
+            CodeQualityResult(**m.model_dump(), **d.model_dump(), **s.model_dump())
+            for m, d, s in zip(metrics, debt, smells)
+        ]
+
+    def _failed_result(self, error: Exception) -> CodeQualityResult:
+        """Build the result returned when an analysis fails."""
+        return CodeQualityResult(
+            overall_quality_score=0,
+            grade="F",
+            summary=f"Analysis failed: {str(error)}",
+            metrics=[],
+            code_smells=[],
+            maintainability_index=0,
+            technical_debt={},
+            best_practices={},
+            recommendations=[],
+        )
+
+    async def _analyze(
+        self,
+        code: str,
+        focus: str,
+        language: str,
+        project_type: Optional[str],
+        schema: type,
+        first_line: int = 1,
+    ) -> Any:
+        """Run one focused part of the quality analysis."""
+        return await self._cached_structured_response(
+            prompt=self._create_user_prompt(code, first_line),
+            system_prompt=self._create_system_prompt(language, project_type, focus),
+            schema=schema,
+        )
+
+    def _create_system_prompt(
+        self, language: str, project_type: Optional[str] = None, focus: str = "metrics"
+    ) -> str:
+        """Create system prompt for one focus of the quality analysis."""
+        # Normalized so that spelling variants share one cached prompt
+        return _quality_system_prompt(
+            focus,
+            language.strip().lower(),
+            project_type.strip().lower() if project_type else None,
+        )
+
+    def _create_user_prompt(self, code: str, first_line: int = 1) -> str:
+        """Create user prompt for quality analysis."""
+        prompt = f"{_QUALITY_USER_PROMPT_HEADER}{code}\n```\n"
+        if first_line > 1:
+            prompt += f"\nThis excerpt starts at line {first_line}; report locations with line numbers of the full file.\n"
         return prompt
 
     async def calculate_complexity(
         self,
         code: str,
         language: str = "python",
+        deep: bool = False,
     ) -> Dict[str, Any]:
         """
         Calculate code complexity metrics.
 
+        Python code is measured directly from its AST. Other languages, and
+        Python code that does not parse, are analyzed by the LLM.
+
         Args:
             code: Code to analyze
             language: Programming language
+            deep: Also ask the LLM for a written analysis of measured code
 
         Returns:
             Complexity metrics
         """
         logger.info("Calculating code complexity")
 
-        system_prompt = f"""You are an expert in code complexity analysis for {language}.
-
-Calculate:
-- Cyclomatic Complexity (McCabe)
-- Cognitive Complexity
-- Nesting Depth
-- Lines of Code (LOC)
-- Maintainability Index
+        metrics = None
+        if language.lower() == "python":
+            try:
+                # Parsing and measuring is CPU-bound, so keep it off the event loop
+                metrics = await asyncio.to_thread(python_complexity, code)
+            except SyntaxError as e:
+                logger.warning(f"Could not parse code for complexity metrics: {e}")
 
-Provide per-function and overall metrics.
-"""
+        if metrics is not None and not deep:
+            logger.info("Complexity calculation completed")
+            return metrics
 
         user_prompt = f"""Calculate complexity metrics:
 
 ```{language}
 {code}
 ```
-
-Provide:
-1. Cyclomatic complexity per function
-2. Overall complexity score
-3. Most complex functions
-4. Recommendations for simplification
 """
 
         try:
-            response = await self._generate_response(user_prompt, system_prompt)
+            response = await self._generate_response(user_prompt, _COMPLEXITY_SYSTEM_PROMPT)
 
-            # In production, calculate actual metrics
-            complexity = {
-                "cyclomatic_complexity": 10,  # Placeholder
-                "cognitive_complexity": 15,  # Placeholder
-                "average_nesting": 2,
-                "analysis": response,
-            }
+            complexity = {**(metrics or {}), "analysis": response}
 
             logger.info("Complexity calculation completed")
             return complexity
@@ -274,49 +597,53 @@ Provide:
         self,
         code: str,
         threshold: int = 6,  # Minimum lines to consider as duplicate
+        deep: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         Detect duplicate code blocks.
 
+        Blocks are matched on normalized lines, so copies with renamed
+        identifiers or changed literals are found too.
+
         Args:
             code: Code to analyze
             threshold: Minimum lines to consider duplicate
+            deep: Also ask the LLM for similar (not just repeated) code
 
         Returns:
             List of duplicate code blocks
         """
         logger.info(f"Detecting duplicate code (threshold: {threshold} lines)")
 
-        system_prompt = """You are an expert at detecting code duplication.
+        duplicates = [
+            {
+                "description": f"{block['lines']}-line block duplicated",
+                "locations": [f"lines {start}-{end}" for start, end in block["locations"]],
+                "lines": block["lines"],
+            }
+            for block in await asyncio.to_thread(find_duplicate_blocks, code, threshold)
+        ]
 
-Identify:
-- Exact duplicates
-- Similar code blocks (>80% similarity)
-- Copy-paste patterns
-- Refactoring opportunities
+        if not deep:
+            logger.info(f"Detected {len(duplicates)} duplicate blocks")
+            return duplicates
 
-Suggest DRY refactoring approaches.
-"""
+        system_prompt = _DUPLICATE_SYSTEM_PROMPT
 
         user_prompt = f"""Detect duplicate code:
 
 ```
 {code}
 ```
-
-Find code blocks that are duplicated or very similar.
-Suggest refactoring to eliminate duplication.
 """
 
         try:
             response = await self._generate_response(user_prompt, system_prompt)
 
-            # Parse duplicates from response
-            duplicates = []
-            if "duplicate" in response.lower():
+            if _DUPLICATE_RE.search(response):
                 duplicates.append({
                     "description": "Potential duplicates found",
-                    "details": response[:200],
+                    "details": response[:_SUMMARY_CHARS],
                 })
 
             logger.info(f"Detected {len(duplicates)} duplicate blocks")
@@ -324,7 +651,7 @@ Suggest refactoring to eliminate duplication.
 
         except Exception as e:
             logger.error(f"Duplicate detection failed: {e}")
-            return []
+            return duplicates
 
     async def suggest_refactoring(
         self,
@@ -343,17 +670,7 @@ Suggest refactoring to eliminate duplication.
         """
         logger.info(f"Generating refactoring suggestions (focus: {focus or 'general'})")
 
-        system_prompt = """You are an expert in code refactoring and clean code principles.
-
-Suggest refactorings following:
-- SOLID principles
-- DRY (Don't Repeat Yourself)
-- KISS (Keep It Simple, Stupid)
-- YAGNI (You Aren't Gonna Need It)
-- Clean Code principles
-
-Provide before/after examples when possible.
-"""
+        system_prompt = _REFACTOR_SYSTEM_PROMPT
 
         focus_text = f"Focus on: {focus}" if focus else "General refactoring"
 
@@ -364,19 +681,13 @@ Provide before/after examples when possible.
 ```
 {code}
 ```
-
-Provide:
-1. Specific refactoring recommendations
-2. Priority order
-3. Expected benefits
-4. Code examples where helpful
 """
 
         try:
             response = await self._generate_response(user_prompt, system_prompt)
 
             suggestions = {
-                "summary": response[:200],
+                "summary": response[:_SUMMARY_CHARS],
                 "detailed_suggestions": response,
                 "priority": "medium",
             }
@@ -406,53 +717,44 @@ Provide:
         logger.info(f"Generating {format} quality report")
 
         if format == "markdown":
-            report = f"""# Code Quality Report
+            parts = [_REPORT_HEADER.format_map({
+                "score": result.overall_quality_score,
+                "grade": result.grade,
+                "summary": result.summary,
+            })]
 
-## Overall Score: {result.overall_quality_score}/100 (Grade: {result.grade})
-
-{result.summary}
-
-## Quality Metrics
-
-"""
             for metric in result.metrics:
-                report += f"""
-### {metric.name}: {metric.score}/100 ({metric.status})
-
-{metric.details}
-
-**Recommendations:**
-"""
-                for rec in metric.recommendations:
-                    report += f"- {rec}\n"
+                parts.append(_REPORT_METRIC.format_map({
+                    "name": metric.name,
+                    "score": metric.score,
+                    "status": metric.status,
+                    "details": metric.details,
+                }))
+                parts.extend(f"- {rec}\n" for rec in metric.recommendations)
 
             if result.code_smells:
-                report += f"\n## Code Smells ({len(result.code_smells)} detected)\n\n"
-                for smell in result.code_smells:
-                    report += f"""
-### [{smell.severity.upper()}] {smell.type}
-
-**Location**: {smell.location}
-
-**Description**: {smell.description}
-
-**Refactoring**: {smell.refactoring_suggestion}
-
-**Impact**: {smell.impact}
-
-"""
-
-            report += f"\n## Maintainability Index: {result.maintainability_index}/100\n\n"
+                parts.append(f"\n## Code Smells ({len(result.code_smells)} detected)\n\n")
+                parts.extend(
+                    _REPORT_SMELL.format_map({
+                        "severity": smell.severity.upper(),
+                        "type": smell.type,
+                        "location": smell.location,
+                        "description": smell.description,
+                        "refactoring": smell.refactoring_suggestion,
+                        "impact": smell.impact,
+                    })
+                    for smell in result.code_smells
+                )
+
+            parts.append(f"\n## Maintainability Index: {result.maintainability_index}/100\n\n")
 
             if result.technical_debt:
-                report += "## Technical Debt\n\n"
-                for key, value in result.technical_debt.items():
-                    report += f"- **{key}**: {value}\n"
+                parts.append("## Technical Debt\n\n")
+                parts.extend(f"- **{key}**: {value}\n" for key, value in result.technical_debt.items())
 
-            report += "\n## Priority Recommendations\n\n"
-            for i, rec in enumerate(result.recommendations, 1):
-                report += f"{i}. {rec}\n"
+            parts.append("\n## Priority Recommendations\n\n")
+            parts.extend(f"{i}. {rec}\n" for i, rec in enumerate(result.recommendations, 1))
 
-            return report
+            return "".join(parts)
 
         return f"Format {format} not yet implemented"
@@ -1,16 +1,78 @@
 """Code Review Agent - Automated code review using LLM."""
 
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field
+import asyncio
+from typing import AsyncIterator, Final, List, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, Field
 from aiops.agents.base_agent import BaseAgent
 from aiops.core.logger import get_logger
+from aiops.tools.code_metrics import split_top_level
 
 logger = get_logger(__name__)
 
+# Prompts lead with static text so the prefix is byte-identical across calls
+# and eligible for provider prefix caching; per-call values come last.
+_REVIEW_SYSTEM_PROMPT: Final[str] = """You are an expert code reviewer.
+
+Your task is to review code and provide constructive feedback focusing on:
+
+1. **Security Issues**: Identify vulnerabilities like SQL injection, XSS, command injection, etc.
+2. **Performance**: Spot inefficient algorithms, memory leaks, unnecessary computations
+3. **Code Quality**: Check for maintainability, readability, and adherence to best practices
+4. **Bugs**: Identify potential runtime errors, edge cases, and logical errors
+5. **Design Patterns**: Suggest better architectural patterns when applicable
+
+Severity Levels:
+- critical: Security vulnerabilities, data loss risks, critical bugs
+- high: Major bugs, significant performance issues, poor design
+- medium: Code smells, minor bugs, style inconsistencies
+- low: Minor improvements, style suggestions
+- info: Informational notes, educational tips
+
+Provide honest, objective feedback. Be constructive and specific.
+For each issue, provide a clear suggestion for improvement.
+Also highlight what the code does well.
+
+Provide a comprehensive code review with issues, strengths, and recommendations.
+"""
+
+_REVIEW_USER_PROMPT_HEADER: Final[str] = "Please review the following code:\n\n"
+
+_DIFF_SYSTEM_PROMPT: Final[str] = """You are an expert code reviewer analyzing code changes (diffs).
+
+Focus on:
+1. Impact of changes on existing functionality
+2. Potential breaking changes
+3. New bugs or security issues introduced
+4. Code quality of the changes
+5. Test coverage for new/modified code
+
+Provide specific feedback on the changes, not the entire codebase.
+Analyze the changes and provide feedback.
+"""
+
+_DIFF_USER_PROMPT_HEADER: Final[str] = "Review the following code changes:\n\n"
+
+# Python code larger than this is split into top-level definitions that are
+# reviewed concurrently
+_MAX_CHUNK_CHARS: Final[int] = 8000
+
+# Repeat reviews of unchanged code (e.g. parallel CI jobs) are answered from
+# the response cache for this long
+_REVIEW_CACHE_TTL: Final[int] = 300
+
+# Reviews slower than this make the agent lower its concurrency
+_REVIEW_TARGET_LATENCY: Final[float] = 5.0
+
+# CodeReviewResult fields generated after issues; once one appears in a
+# streamed partial, the issues list is complete
+_AFTER_ISSUES: Final = frozenset({"strengths", "recommendations"})
+
 
 class CodeIssue(BaseModel):
     """Represents a code issue found during review."""
 
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     severity: str = Field(description="Severity level: critical, high, medium, low, info")
     category: str = Field(description="Issue category: security, performance, style, bug, maintainability")
     line_number: Optional[int] = Field(default=None, description="Line number where issue was found")
@@ -22,6 +84,8 @@ class CodeIssue(BaseModel):
 class CodeReviewResult(BaseModel):
     """Result of code review."""
 
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     overall_score: float = Field(description="Overall code quality score (0-100)")
     summary: str = Field(description="Summary of the review")
     issues: List[CodeIssue] = Field(description="List of issues found")
@@ -32,8 +96,8 @@ class CodeReviewResult(BaseModel):
 class CodeReviewAgent(BaseAgent):
     """Agent for automated code review."""
 
-    def __init__(self, **kwargs):
-        super().__init__(name="CodeReviewAgent", **kwargs)
+    def __init__(self, target_latency: Optional[float] = _REVIEW_TARGET_LATENCY, **kwargs):
+        super().__init__(name="CodeReviewAgent", target_latency=target_latency, **kwargs)
 
     async def execute(
         self,
@@ -45,6 +109,13 @@ class CodeReviewAgent(BaseAgent):
         """
         Review code and provide feedback.
 
+        Large Python code is split into chunks of whole top-level
+        definitions that are reviewed concurrently and merged, so the
+        provider sees several medium prompts instead of one huge one.
+        Concurrent identical reviews share one LLM call, and repeats within
+        five minutes are served from cache when sampling is deterministic
+        enough to cache.
+
         Args:
             code: Code to review
             language: Programming language
@@ -56,16 +127,42 @@ class CodeReviewAgent(BaseAgent):
         """
         logger.info(f"Starting code review for {language} code ({len(code)} chars)")
 
+        if not code.strip():
+            return CodeReviewResult(
+                overall_score=100,
+                summary="No code provided",
+                issues=[],
+                strengths=[],
+                recommendations=[],
+            )
+
         system_prompt = self._create_system_prompt(language, standards)
-        user_prompt = self._create_user_prompt(code, context)
+        chunks = (
+            await asyncio.to_thread(split_top_level, code, _MAX_CHUNK_CHARS)
+            if language.lower() == "python"
+            else [(1, code)]
+        )
 
         try:
-            # Generate structured response
-            result = await self._generate_structured_response(
-                prompt=user_prompt,
-                system_prompt=system_prompt,
-                schema=CodeReviewResult,
-            )
+            if len(chunks) == 1:
+                # Generate structured response
+                result = await self._cached_structured_response(
+                    prompt=self._create_user_prompt(code, context),
+                    system_prompt=system_prompt,
+                    schema=CodeReviewResult,
+                    ttl=min(self.cache_ttl, _REVIEW_CACHE_TTL),
+                )
+            else:
+                reviews = await asyncio.gather(*(
+                    self._cached_structured_response(
+                        prompt=self._create_user_prompt(chunk, context),
+                        system_prompt=system_prompt,
+                        schema=CodeReviewResult,
+                        ttl=min(self.cache_ttl, _REVIEW_CACHE_TTL),
+                    )
+                    for _, chunk in chunks
+                ))
+                result = self._merge_reviews(chunks, reviews)
 
             logger.info(
                 f"Code review completed: {len(result.issues)} issues found, "
@@ -77,58 +174,114 @@ class CodeReviewAgent(BaseAgent):
         except Exception as e:
             logger.error(f"Code review failed: {e}")
             # Return a fallback result
-            return CodeReviewResult(
-                overall_score=0,
-                summary=f"Review failed: {str(e)}",
-                issues=[],
-                strengths=[],
-                recommendations=["Please retry the review"],
-            )
+            return self._failed_result(e)
 
-    def _create_system_prompt(
-        self, language: str, standards: Optional[List[str]] = None
-    ) -> str:
-        """Create system prompt for code review."""
-        prompt = f"""You are an expert code reviewer specializing in {language}.
+    def _merge_reviews(
+        self, chunks: List[Tuple[int, str]], reviews: List[CodeReviewResult]
+    ) -> CodeReviewResult:
+        """
+        Merge the reviews of consecutive chunks of one file.
 
-Your task is to review code and provide constructive feedback focusing on:
+        Issue line numbers are shifted from chunk-relative to file lines, the
+        score is averaged weighted by chunk size, and repeated strengths and
+        recommendations are dropped.
+        """
+        sizes = [len(chunk) for _, chunk in chunks]
+        issues = [
+            issue.model_copy(update={"line_number": issue.line_number + first_line - 1})
+            if issue.line_number is not None else issue
+            for (first_line, _), review in zip(chunks, reviews)
+            for issue in review.issues
+        ]
+        return CodeReviewResult(
+            overall_score=round(
+                sum(r.overall_score * size for r, size in zip(reviews, sizes)) / sum(sizes), 2
+            ),
+            summary=" ".join(r.summary for r in reviews),
+            issues=issues,
+            strengths=list(dict.fromkeys(s for r in reviews for s in r.strengths)),
+            recommendations=list(dict.fromkeys(s for r in reviews for s in r.recommendations)),
+        )
+
+    async def review_many(
+        self,
+        codes: List[str],
+        language: str = "python",
+        context: Optional[str] = None,
+        standards: Optional[List[str]] = None,
+    ) -> List[CodeReviewResult]:
+        """
+        Review many pieces of code in one LLM submission.
 
-1. **Security Issues**: Identify vulnerabilities like SQL injection, XSS, command injection, etc.
-2. **Performance**: Spot inefficient algorithms, memory leaks, unnecessary computations
-3. **Code Quality**: Check for maintainability, readability, and adherence to best practices
-4. **Bugs**: Identify potential runtime errors, edge cases, and logical errors
-5. **Design Patterns**: Suggest better architectural patterns when applicable
+        All prompts are submitted at once so the provider can schedule them
+        together instead of receiving independent one-off requests.
 
-Severity Levels:
-- critical: Security vulnerabilities, data loss risks, critical bugs
-- high: Major bugs, significant performance issues, poor design
-- medium: Code smells, minor bugs, style inconsistencies
-- low: Minor improvements, style suggestions
-- info: Informational notes, educational tips
+        Args:
+            codes: Code to review
+            language: Programming language of all the code
+            context: Additional context shared by all the code
+            standards: Specific coding standards to check against
 
-"""
-        if standards:
-            prompt += f"\nAdditional Standards to Check:\n"
-            for standard in standards:
-                prompt += f"- {standard}\n"
+        Returns:
+            One CodeReviewResult per piece of code, in input order
+        """
+        logger.info(f"Starting batch code review of {len(codes)} {language} sources")
 
-        prompt += """
-Provide honest, objective feedback. Be constructive and specific.
-For each issue, provide a clear suggestion for improvement.
-Also highlight what the code does well.
-"""
+        system_prompt = self._create_system_prompt(language, standards)
+        prompts = [self._create_user_prompt(code, context) for code in codes]
 
+        try:
+            responses = await self._generate_structured_batch(
+                prompts=prompts,
+                system_prompt=system_prompt,
+                schema=CodeReviewResult,
+            )
+        except Exception as e:
+            logger.error(f"Batch code review failed: {e}")
+            return [self._failed_result(e) for _ in codes]
+
+        results = []
+        for response in responses:
+            if isinstance(response, Exception):
+                logger.error(f"Code review failed: {response}")
+                results.append(self._failed_result(response))
+            else:
+                results.append(response)
+
+        logger.info(
+            f"Batch code review completed: "
+            f"{sum(len(r.issues) for r in results)} issues across {len(results)} sources"
+        )
+        return results
+
+    def _failed_result(self, error: Exception) -> CodeReviewResult:
+        """Build the fallback result for a failed review."""
+        return CodeReviewResult(
+            overall_score=0,
+            summary=f"Review failed: {str(error)}",
+            issues=[],
+            strengths=[],
+            recommendations=["Please retry the review"],
+        )
+
+    def _create_system_prompt(
+        self, language: str, standards: Optional[List[str]] = None
+    ) -> str:
+        """Create system prompt for code review."""
+        prompt = f"{_REVIEW_SYSTEM_PROMPT}\n**Language**: {language}\n"
+        if standards:
+            prompt += "\nAdditional Standards to Check:\n"
+            prompt += "".join(f"- {standard}\n" for standard in standards)
         return prompt
 
     def _create_user_prompt(self, code: str, context: Optional[str] = None) -> str:
         """Create user prompt for code review."""
-        prompt = "Please review the following code:\n\n"
+        prompt = _REVIEW_USER_PROMPT_HEADER
 
         if context:
             prompt += f"**Context**: {context}\n\n"
 
-        prompt += f"```\n{code}\n```\n\n"
-        prompt += "Provide a comprehensive code review with issues, strengths, and recommendations."
+        prompt += f"```\n{code}\n```\n"
 
         return prompt
 
@@ -149,34 +302,10 @@ Also highlight what the code does well.
         """
         logger.info(f"Reviewing code diff ({len(diff)} chars)")
 
-        system_prompt = """You are an expert code reviewer analyzing code changes (diffs).
-
-Focus on:
-1. Impact of changes on existing functionality
-2. Potential breaking changes
-3. New bugs or security issues introduced
-4. Code quality of the changes
-5. Test coverage for new/modified code
-
-Provide specific feedback on the changes, not the entire codebase.
-"""
-
-        user_prompt = f"""Review the following code changes:
-
-{f"**Base Context**: {base_context}" if base_context else ""}
-
-**Diff**:
-```
-{diff}
-```
-
-Analyze the changes and provide feedback.
-"""
-
         try:
             result = await self._generate_structured_response(
-                prompt=user_prompt,
-                system_prompt=system_prompt,
+                prompt=self._create_diff_prompt(diff, base_context),
+                system_prompt=_DIFF_SYSTEM_PROMPT,
                 schema=CodeReviewResult,
             )
 
@@ -192,3 +321,44 @@ Analyze the changes and provide feedback.
                 strengths=[],
                 recommendations=[],
             )
+
+    async def review_diff_stream(
+        self,
+        diff: str,
+        base_context: Optional[str] = None,
+    ) -> AsyncIterator[CodeIssue]:
+        """
+        Review code changes, yielding each issue as soon as the model finishes it.
+
+        Callers can show or act on the first issues while the rest of the
+        review is still being generated. Stopping iteration early cancels
+        the remaining generation.
+
+        Args:
+            diff: Git diff or code changes
+            base_context: Context about the codebase
+
+        Yields:
+            CodeIssue objects in the order the model reports them
+        """
+        logger.info(f"Streaming diff review ({len(diff)} chars)")
+
+        stream = self._generate_structured_stream(
+            prompt=self._create_diff_prompt(diff, base_context),
+            system_prompt=_DIFF_SYSTEM_PROMPT,
+            schema=CodeReviewResult,
+        )
+        items = self._stream_list_items(stream, "issues", CodeIssue, _AFTER_ISSUES)
+        try:
+            async for issue in items:
+                yield issue
+        finally:
+            await items.aclose()
+
+    def _create_diff_prompt(self, diff: str, base_context: Optional[str] = None) -> str:
+        """Create user prompt for diff review."""
+        prompt = _DIFF_USER_PROMPT_HEADER
+        if base_context:
+            prompt += f"**Base Context**: {base_context}\n\n"
+        prompt += f"**Diff**:\n```\n{diff}\n```\n"
+        return prompt
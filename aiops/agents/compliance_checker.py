@@ -5,17 +5,127 @@ This agent validates infrastructure, code, and configurations against
 security and regulatory compliance standards (SOC2, HIPAA, PCI-DSS, GDPR, etc.)
 """
 
-from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
+import asyncio
+from collections import defaultdict
+from itertools import islice
+from typing import ClassVar, DefaultDict, Dict, Final, FrozenSet, List, Any, Optional
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from datetime import datetime
 from aiops.agents.base_agent import BaseAgent
+from aiops.core.audit_sink import AuditTrailSink, summarize_audit_trail
 from aiops.core.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+# Response schema and system prompt shared by single and batched checks
+_COMPLIANCE_SCHEMA: Final[Dict[str, Any]] = {
+    "title": "ComplianceAnalysis",
+    "description": "Compliance analysis of an environment against the requested standards",
+    "type": "object",
+    "properties": {
+        "overall_score": {"type": "number", "minimum": 0, "maximum": 100},
+        "scores_by_standard": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "standard": {"type": "string"},
+                    "score": {"type": "number"},
+                    "total_controls": {"type": "integer"},
+                    "passing_controls": {"type": "integer"},
+                    "failing_controls": {"type": "integer"},
+                    "exempted_controls": {"type": "integer"},
+                },
+            },
+        },
+        "violations": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "rule_id": {"type": "string"},
+                    "standard": {"type": "string"},
+                    "severity": {"type": "string"},
+                    "category": {"type": "string"},
+                    "resource": {"type": "string"},
+                    "description": {"type": "string"},
+                    "current_state": {"type": "string"},
+                    "required_state": {"type": "string"},
+                    "remediation": {"type": "string"},
+                    "automation_available": {"type": "boolean"},
+                    "compliance_control": {"type": "string"},
+                },
+            },
+        },
+        "recommendations": {"type": "array", "items": {"type": "string"}},
+        "audit_trail": {"type": "array"},
+        "next_review_date": {"type": "string"},
+        "executive_summary": {"type": "string"},
+    },
+    "required": ["overall_score", "violations", "executive_summary"],
+}
+
+# Static auditor instructions and checklist, sent as the system prompt so the
+# prefix is byte-identical across checks; environment, standards and
+# configuration follow in the user prompt.
+_COMPLIANCE_CHECKLIST: Final[str] = """## Compliance Requirements
+
+For each requested standard, check:
+
+### SOC2 (if applicable)
+- Security: Access controls, encryption, monitoring
+- Availability: Uptime, redundancy, backup/recovery
+- Processing Integrity: Quality controls, error handling
+- Confidentiality: Data protection, access restrictions
+- Privacy: Data handling, consent, deletion
+
+### HIPAA (if applicable)
+- Administrative Safeguards: Policies, training, access management
+- Physical Safeguards: Facility access, workstation security
+- Technical Safeguards: Encryption, audit controls, authentication
+- PHI Protection: Data encryption at rest and in transit
+
+### PCI-DSS (if applicable)
+- Network Security: Firewalls, encryption, secure transmission
+- Data Protection: Cardholder data storage and transmission
+- Access Control: Authentication, authorization, monitoring
+- Vulnerability Management: Patching, secure coding
+
+### GDPR (if applicable)
+- Data Protection: Encryption, pseudonymization
+- Privacy by Design: Data minimization, purpose limitation
+- Subject Rights: Access, deletion, portability
+- Breach Notification: Detection and reporting procedures
+
+### ISO27001 (if applicable)
+- Information Security Controls: 114 controls across 14 domains
+- Risk Management: Assessment, treatment, monitoring
+- ISMS: Documentation, policies, procedures
+
+Provide:
+1. Overall compliance score (0-100)
+2. Score per standard
+3. List of all violations with severity, description, and remediation
+4. High-level recommendations for improving compliance
+5. Suggested next review date
+6. Executive summary
+"""
+
+_COMPLIANCE_SYSTEM_PROMPT: Final[str] = """You are an expert compliance auditor with deep knowledge of SOC2, HIPAA,
+PCI-DSS, GDPR, ISO27001, and other security standards. Evaluate configurations against
+compliance requirements, identify violations, and provide clear remediation steps.
+Be thorough but practical in your recommendations.
+
+""" + _COMPLIANCE_CHECKLIST
+
+
 class ComplianceViolation(BaseModel):
     """Single compliance violation"""
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     rule_id: str = Field(description="Compliance rule identifier")
     standard: str = Field(description="Compliance standard (SOC2, HIPAA, etc.)")
     severity: str = Field(description="critical, high, medium, low")
@@ -31,6 +141,9 @@ class ComplianceViolation(BaseModel):
 
 class ComplianceScore(BaseModel):
     """Compliance score for a standard"""
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     standard: str = Field(description="Compliance standard name")
     score: float = Field(description="Compliance score (0-100)")
     total_controls: int = Field(description="Total controls checked")
@@ -39,8 +152,32 @@ class ComplianceScore(BaseModel):
     exempted_controls: int = Field(description="Exempted controls")
 
 
+_COMPLIANCE_CACHE_TTL: Final[int] = 300
+
+# Compliance analyses slower than this make the agent lower its concurrency
+_COMPLIANCE_TARGET_LATENCY: Final[float] = 15.0
+
+# Violations of each severity listed in a remediation plan prompt
+_PLAN_MAX_LISTED: Final[int] = 10
+
+# Validators for the lists in a compliance response, built once at import
+_VIOLATIONS: Final[TypeAdapter[List[ComplianceViolation]]] = TypeAdapter(List[ComplianceViolation])
+_SCORES: Final[TypeAdapter[List[ComplianceScore]]] = TypeAdapter(List[ComplianceScore])
+
+
+def _by_severity(violations: List[ComplianceViolation]) -> DefaultDict[str, List[ComplianceViolation]]:
+    """Group violations by severity in one pass, keeping their order"""
+    buckets: DefaultDict[str, List[ComplianceViolation]] = defaultdict(list)
+    for violation in violations:
+        buckets[violation.severity].append(violation)
+    return buckets
+
+
 class ComplianceReport(BaseModel):
     """Complete compliance check report"""
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     report_id: str = Field(description="Unique report identifier")
     generated_at: str = Field(default_factory=lambda: datetime.now().isoformat())
     environment: str = Field(description="Environment checked (prod, staging, etc.)")
@@ -50,7 +187,12 @@ class ComplianceReport(BaseModel):
     violations: List[ComplianceViolation] = Field(description="All violations found")
     critical_violations: int = Field(description="Count of critical violations")
     recommendations: List[str] = Field(description="High-level recommendations")
-    audit_trail: List[Dict[str, Any]] = Field(description="Audit trail of checks")
+    audit_trail_uri: Optional[str] = Field(
+        default=None, description="URI of the NDJSON audit trail of checks, if any"
+    )
+    audit_trail_summary: Dict[str, int] = Field(
+        default_factory=dict, description="Audit trail entries per status"
+    )
     next_review_date: str = Field(description="Recommended next review date")
     executive_summary: str = Field(description="Executive summary")
 
@@ -68,7 +210,7 @@ class ComplianceCheckerAgent(BaseAgent):
     - Automated remediation suggestions
     """
 
-    SUPPORTED_STANDARDS = [
+    SUPPORTED_STANDARDS: ClassVar[FrozenSet[str]] = frozenset({
         "SOC2",
         "HIPAA",
         "PCI-DSS",
@@ -76,20 +218,25 @@ class ComplianceCheckerAgent(BaseAgent):
         "ISO27001",
         "NIST",
         "CIS",
-    ]
+    })
 
     def __init__(
         self,
         llm_provider: Optional[str] = None,
         model: Optional[str] = None,
         temperature: Optional[float] = 0.2,
+        target_latency: Optional[float] = _COMPLIANCE_TARGET_LATENCY,
+        audit_dir: Optional[str] = None,
     ):
         super().__init__(
             name="ComplianceChecker",
             llm_provider=llm_provider,
             model=model,
             temperature=temperature,
+            target_latency=target_latency,
         )
+        # Without a directory, reports only summarize their audit trail
+        self.audit_sink = AuditTrailSink(audit_dir) if audit_dir else None
 
     async def execute(
         self,
@@ -105,6 +252,9 @@ class ComplianceCheckerAgent(BaseAgent):
         """
         Check compliance against specified standards.
 
+        Each standard is checked by its own, shorter LLM call; the calls run
+        concurrently and their analyses are merged into one report.
+
         Args:
             environment: Environment name (production, staging, etc.)
             standards: List of compliance standards to check against
@@ -125,80 +275,151 @@ class ComplianceCheckerAgent(BaseAgent):
         if invalid_standards:
             logger.warning(f"Unsupported standards: {invalid_standards}")
 
-        # Build compliance check prompt
-        prompt = self._build_compliance_prompt(
-            environment, standards, infrastructure_config, code_repositories,
-            access_policies, encryption_config, logging_config, data_flows
-        )
+        if not any((
+            infrastructure_config, code_repositories, access_policies,
+            encryption_config, logging_config, data_flows,
+        )):
+            logger.info("No configuration provided, skipping compliance analysis")
+            return await asyncio.to_thread(self._build_report, environment, standards, {
+                "overall_score": 100,
+                "violations": [],
+                "executive_summary": "No artifacts provided",
+            })
+
+        # Identical concurrent checks share one LLM call; repeats within the
+        # TTL are served from the response cache. All calls share the static
+        # system prompt, so its prefix is cached once for every standard.
+        responses = await asyncio.gather(*(
+            self._cached_structured_response(
+                self._build_compliance_prompt(
+                    environment, group, infrastructure_config, code_repositories,
+                    access_policies, encryption_config, logging_config, data_flows
+                ),
+                _COMPLIANCE_SCHEMA,
+                _COMPLIANCE_SYSTEM_PROMPT,
+                ttl=min(self.cache_ttl, _COMPLIANCE_CACHE_TTL),
+            )
+            for group in [[standard] for standard in standards] or [standards]
+        ))
+        response = responses[0] if len(responses) == 1 else self._merge_analyses(standards, responses)
+        return await asyncio.to_thread(self._build_report, environment, standards, response)
+
+    def _merge_analyses(
+        self, standards: List[str], responses: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Merge per-standard analyses into one analysis of all standards.
 
-        # Define response schema
-        schema = {
-            "type": "object",
-            "properties": {
-                "overall_score": {"type": "number", "minimum": 0, "maximum": 100},
-                "scores_by_standard": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "standard": {"type": "string"},
-                            "score": {"type": "number"},
-                            "total_controls": {"type": "integer"},
-                            "passing_controls": {"type": "integer"},
-                            "failing_controls": {"type": "integer"},
-                            "exempted_controls": {"type": "integer"},
-                        },
-                    },
-                },
-                "violations": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "rule_id": {"type": "string"},
-                            "standard": {"type": "string"},
-                            "severity": {"type": "string"},
-                            "category": {"type": "string"},
-                            "resource": {"type": "string"},
-                            "description": {"type": "string"},
-                            "current_state": {"type": "string"},
-                            "required_state": {"type": "string"},
-                            "remediation": {"type": "string"},
-                            "automation_available": {"type": "boolean"},
-                            "compliance_control": {"type": "string"},
-                        },
-                    },
-                },
-                "recommendations": {"type": "array", "items": {"type": "string"}},
-                "audit_trail": {"type": "array"},
-                "next_review_date": {"type": "string"},
-                "executive_summary": {"type": "string"},
-            },
-            "required": ["overall_score", "violations", "executive_summary"],
+        The overall score is the mean of the per-standard scores weighted by
+        the number of controls each checked; lists are concatenated and the
+        earliest suggested review date is kept.
+        """
+        weights = [
+            sum(score.get("total_controls") or 0 for score in r.get("scores_by_standard", [])) or 1
+            for r in responses
+        ]
+        return {
+            "overall_score": round(
+                sum(r.get("overall_score", 0) * w for r, w in zip(responses, weights)) / sum(weights), 2
+            ),
+            "scores_by_standard": [score for r in responses for score in r.get("scores_by_standard", [])],
+            "violations": [v for r in responses for v in r.get("violations", [])],
+            "recommendations": list(dict.fromkeys(
+                rec for r in responses for rec in r.get("recommendations", [])
+            )),
+            "audit_trail": [entry for r in responses for entry in r.get("audit_trail", [])],
+            "next_review_date": min(
+                (r["next_review_date"] for r in responses if r.get("next_review_date")), default=""
+            ),
+            "executive_summary": "\n".join(
+                f"{standard}: {r.get('executive_summary', '')}" for standard, r in zip(standards, responses)
+            ),
         }
 
-        # Generate compliance analysis
-        system_prompt = """You are an expert compliance auditor with deep knowledge of SOC2, HIPAA,
-        PCI-DSS, GDPR, ISO27001, and other security standards. Evaluate configurations against
-        compliance requirements, identify violations, and provide clear remediation steps.
-        Be thorough but practical in your recommendations."""
+    async def check_many(self, checks: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Run many compliance checks in one LLM submission.
+
+        All prompts are submitted at once so the provider can schedule them
+        together instead of receiving independent one-off requests.
 
-        response = await self._generate_structured_response(prompt, schema, system_prompt)
+        Args:
+            checks: Keyword arguments for each execute() call
+
+        Returns:
+            One ComplianceReport per check, in input order; a check that
+            failed is returned as its exception
+        """
+        logger.info(f"Checking compliance for {len(checks)} environments in one batch")
+
+        prompts = [
+            self._build_compliance_prompt(
+                check["environment"],
+                check["standards"],
+                check.get("infrastructure_config"),
+                check.get("code_repositories"),
+                check.get("access_policies"),
+                check.get("encryption_config"),
+                check.get("logging_config"),
+                check.get("data_flows"),
+            )
+            for check in checks
+        ]
+        responses = await self._generate_structured_batch(
+            prompts=prompts,
+            schema=_COMPLIANCE_SCHEMA,
+            system_prompt=_COMPLIANCE_SYSTEM_PROMPT,
+        )
 
-        # Create report
-        violations = [ComplianceViolation(**v) for v in response.get("violations", [])]
+        reports: List[Any] = []
+        for check, response in zip(checks, responses):
+            if not isinstance(response, Exception):
+                try:
+                    response = await asyncio.to_thread(
+                        self._build_report, check["environment"], check["standards"], response
+                    )
+                except Exception as e:
+                    response = e
+            if isinstance(response, Exception):
+                logger.error(f"Compliance check for {check['environment']} failed: {response}")
+            reports.append(response)
+        return reports
+
+    def _build_report(
+        self, environment: str, standards: List[str], response: Dict[str, Any]
+    ) -> ComplianceReport:
+        """
+        Build a compliance report from the LLM's analysis.
+
+        The audit trail is written to the audit sink, if there is one; the
+        report keeps its URI and per-status summary.
+        """
+        violations = _VIOLATIONS.validate_python(response.get("violations", []))
         critical_violations = sum(1 for v in violations if v.severity == "critical")
+        scores_by_standard = _SCORES.validate_python(response.get("scores_by_standard", []))
+
+        # One timestamp for both, so the ID and generated_at always agree
+        now = datetime.now()
+        report_id = f"COMP-{environment}-{now.strftime('%Y%m%d-%H%M%S')}"
+        audit_trail_uri, audit_trail_summary = None, {}
+        if response.get("audit_trail"):
+            if self.audit_sink is not None:
+                audit_trail_uri, audit_trail_summary = self.audit_sink.write(report_id, response["audit_trail"])
+            else:
+                audit_trail_summary = summarize_audit_trail(response["audit_trail"])
 
         report = ComplianceReport(
-            report_id=f"COMP-{environment}-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
+            report_id=report_id,
+            generated_at=now.isoformat(),
             environment=environment,
             standards_checked=standards,
             overall_score=response.get("overall_score", 0),
-            scores_by_standard=[ComplianceScore(**s) for s in response.get("scores_by_standard", [])],
+            scores_by_standard=scores_by_standard,
             violations=violations,
             critical_violations=critical_violations,
             recommendations=response.get("recommendations", []),
-            audit_trail=response.get("audit_trail", []),
+            audit_trail_uri=audit_trail_uri,
+            audit_trail_summary=audit_trail_summary,
             next_review_date=response.get("next_review_date", ""),
             executive_summary=response.get("executive_summary", ""),
         )
@@ -223,73 +444,32 @@ class ComplianceCheckerAgent(BaseAgent):
     ) -> str:
         """Build comprehensive compliance check prompt"""
         prompt_parts = [
-            f"# Compliance Check Request\n",
+            "# Compliance Check Request\n",
             f"Environment: {environment}\n",
             f"Standards: {', '.join(standards)}\n\n",
         ]
 
-        if infrastructure_config:
-            prompt_parts.append(f"## Infrastructure Configuration\n```yaml\n{infrastructure_config}\n```\n\n")
-
-        if access_policies:
-            prompt_parts.append(f"## Access Control Policies\n```json\n{access_policies}\n```\n\n")
-
-        if encryption_config:
-            prompt_parts.append(f"## Encryption Configuration\n```yaml\n{encryption_config}\n```\n\n")
-
-        if logging_config:
-            prompt_parts.append(f"## Audit Logging Configuration\n```yaml\n{logging_config}\n```\n\n")
+        # Configurations are embedded as compact JSON rather than Python
+        # reprs: cheaper to build, fewer tokens, and valid for the model
+        for heading, config in (
+            ("Infrastructure Configuration", infrastructure_config),
+            ("Access Control Policies", access_policies),
+            ("Encryption Configuration", encryption_config),
+            ("Audit Logging Configuration", logging_config),
+        ):
+            if config:
+                prompt_parts += (
+                    "## ", heading, "\n```json\n", orjson.dumps(config, default=str).decode(), "\n```\n\n"
+                )
 
         if data_flows:
             prompt_parts.append("## Data Flows\n")
-            for i, flow in enumerate(data_flows, 1):
-                prompt_parts.append(f"{i}. {flow.get('name', 'Unknown')}: {flow.get('description', '')}\n")
+            prompt_parts += (
+                f"{i}. {flow.get('name', 'Unknown')}: {flow.get('description', '')}\n"
+                for i, flow in enumerate(data_flows, 1)
+            )
             prompt_parts.append("\n")
 
-        prompt_parts.append(f"""
-## Compliance Requirements
-
-For each standard ({', '.join(standards)}), check:
-
-### SOC2 (if applicable)
-- Security: Access controls, encryption, monitoring
-- Availability: Uptime, redundancy, backup/recovery
-- Processing Integrity: Quality controls, error handling
-- Confidentiality: Data protection, access restrictions
-- Privacy: Data handling, consent, deletion
-
-### HIPAA (if applicable)
-- Administrative Safeguards: Policies, training, access management
-- Physical Safeguards: Facility access, workstation security
-- Technical Safeguards: Encryption, audit controls, authentication
-- PHI Protection: Data encryption at rest and in transit
-
-### PCI-DSS (if applicable)
-- Network Security: Firewalls, encryption, secure transmission
-- Data Protection: Cardholder data storage and transmission
-- Access Control: Authentication, authorization, monitoring
-- Vulnerability Management: Patching, secure coding
-
-### GDPR (if applicable)
-- Data Protection: Encryption, pseudonymization
-- Privacy by Design: Data minimization, purpose limitation
-- Subject Rights: Access, deletion, portability
-- Breach Notification: Detection and reporting procedures
-
-### ISO27001 (if applicable)
-- Information Security Controls: 114 controls across 14 domains
-- Risk Management: Assessment, treatment, monitoring
-- ISMS: Documentation, policies, procedures
-
-Provide:
-1. Overall compliance score (0-100)
-2. Score per standard
-3. List of all violations with severity, description, and remediation
-4. High-level recommendations for improving compliance
-5. Suggested next review date
-6. Executive summary
-""")
-
         return "".join(prompt_parts)
 
     async def generate_remediation_plan(
@@ -307,8 +487,8 @@ Provide:
         Returns:
             Detailed remediation plan
         """
-        critical = [v for v in compliance_report.violations if v.severity == "critical"]
-        high = [v for v in compliance_report.violations if v.severity == "high"]
+        by_severity = _by_severity(compliance_report.violations)
+        high = by_severity["high"]
 
         prompt = f"""Generate a {timeline_weeks}-week remediation plan for the following compliance violations:
 
@@ -316,14 +496,14 @@ Provide:
 - Environment: {compliance_report.environment}
 - Overall Score: {compliance_report.overall_score}%
 - Total Violations: {len(compliance_report.violations)}
-- Critical: {len(critical)}
+- Critical: {compliance_report.critical_violations}
 - High: {len(high)}
 
 # Critical Violations
-{chr(10).join(f"- {v.rule_id}: {v.description}" for v in critical[:10])}
+{chr(10).join(f"- {v.rule_id}: {v.description}" for v in islice(by_severity["critical"], _PLAN_MAX_LISTED))}
 
 # High Severity Violations
-{chr(10).join(f"- {v.rule_id}: {v.description}" for v in high[:10])}
+{chr(10).join(f"- {v.rule_id}: {v.description}" for v in islice(high, _PLAN_MAX_LISTED))}
 
 Create a detailed remediation plan including:
 1. Prioritized task list (critical first)
@@ -5,17 +5,32 @@ Detects configuration drift across environments, compares configurations,
 and ensures consistency between dev, staging, and production.
 """
 
-from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
+import functools
+import re
+from typing import Dict, List, Any, Optional, Pattern, Tuple
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from aiops.core.logger import get_logger
-import json
 
 logger = get_logger(__name__)
 
+_DEFAULT_CRITICAL_KEYS = ('database_url', 'api_keys', 'security', 'auth', 'encryption')
+
+# Exact types compared as numbers; unlike isinstance, this leaves out bools
+_NUMERIC_TYPES = frozenset({int, float})
+
+
+@functools.lru_cache(maxsize=32)
+def _critical_key_pattern(critical_keys: Tuple[str, ...]) -> Pattern[str]:
+    """Case-insensitive pattern matching keys that contain any critical key, built once per key set."""
+    return re.compile("|".join(map(re.escape, critical_keys)), re.IGNORECASE)
+
 
 class ConfigDrift(BaseModel):
     """Configuration drift detected"""
+
+    model_config = ConfigDict(frozen=True)
+
     config_key: str = Field(description="Configuration key that drifted")
     expected_value: Any = Field(description="Expected value (from baseline)")
     actual_value: Any = Field(description="Actual value found")
@@ -67,51 +82,68 @@ class ConfigurationDriftDetector:
         Returns:
             DriftDetectionResult with detected drifts
         """
+        # Identical configs (e.g. both read from one source) cannot drift;
+        # dict equality settles that without the per-key comparison
+        if baseline_config is target_config or baseline_config == target_config:
+            total_configs = len(baseline_config)
+            return DriftDetectionResult(
+                baseline_environment=baseline_env,
+                compared_environment=target_env,
+                total_configs=total_configs,
+                drifts_detected=0,
+                drifts=[],
+                drift_score=100.0,
+                compliance_status="compliant",
+                summary=self._generate_summary(baseline_env, target_env, total_configs, 0, 100.0, 0),
+                recommendations=[]
+            )
+
+        # Drifts are built from values already in hand, so they are
+        # constructed without validation
         drifts = []
-        critical_keys = critical_keys or [
-            'database_url', 'api_keys', 'security', 'auth', 'encryption'
-        ]
-
-        # Compare configurations
-        all_keys = set(baseline_config.keys()) | set(target_config.keys())
-
-        for key in all_keys:
-            baseline_value = baseline_config.get(key)
-            target_value = target_config.get(key)
-
-            # Check for missing keys
-            if key in baseline_config and key not in target_config:
-                severity = "critical" if any(ck in key.lower() for ck in critical_keys) else "high"
-                drifts.append(ConfigDrift(
-                    config_key=key,
-                    expected_value=baseline_value,
-                    actual_value=None,
-                    environment=target_env,
-                    severity=severity,
-                    impact=f"Configuration '{key}' missing in {target_env}. May cause runtime errors.",
-                    recommendation=f"Add '{key}' to {target_env} configuration"
-                ))
-                continue
-
-            if key not in baseline_config and key in target_config:
-                drifts.append(ConfigDrift(
-                    config_key=key,
-                    expected_value=None,
-                    actual_value=target_value,
-                    environment=target_env,
-                    severity="medium",
-                    impact=f"Extra configuration '{key}' in {target_env} not present in {baseline_env}",
-                    recommendation=f"Review if '{key}' should be in {baseline_env} or removed from {target_env}"
-                ))
-                continue
+        is_critical = _critical_key_pattern(tuple(critical_keys or _DEFAULT_CRITICAL_KEYS)).search
+
+        # Key view set operations split the keys without membership checks
+        baseline_keys = baseline_config.keys()
+        target_keys = target_config.keys()
+
+        # Check for missing keys
+        for key in baseline_keys - target_keys:
+            severity = "critical" if is_critical(key) else "high"
+            drifts.append(ConfigDrift.model_construct(
+                config_key=key,
+                expected_value=baseline_config[key],
+                actual_value=None,
+                environment=target_env,
+                severity=severity,
+                impact=f"Configuration '{key}' missing in {target_env}. May cause runtime errors.",
+                recommendation=f"Add '{key}' to {target_env} configuration"
+            ))
+
+        # Check for extra keys
+        for key in target_keys - baseline_keys:
+            drifts.append(ConfigDrift.model_construct(
+                config_key=key,
+                expected_value=None,
+                actual_value=target_config[key],
+                environment=target_env,
+                severity="medium",
+                impact=f"Extra configuration '{key}' in {target_env} not present in {baseline_env}",
+                recommendation=f"Review if '{key}' should be in {baseline_env} or removed from {target_env}"
+            ))
+
+        common_keys = baseline_keys & target_keys
+        for key in common_keys:
+            baseline_value = baseline_config[key]
+            target_value = target_config[key]
 
             # Check for value differences
             if baseline_value != target_value:
                 # Determine severity
-                if any(ck in key.lower() for ck in critical_keys):
+                if is_critical(key):
                     severity = "critical"
                     impact = f"Critical configuration mismatch. May cause security or data integrity issues."
-                elif isinstance(baseline_value, (int, float)) and isinstance(target_value, (int, float)):
+                elif type(baseline_value) in _NUMERIC_TYPES and type(target_value) in _NUMERIC_TYPES:
                     # Numeric configuration
                     diff_pct = abs(baseline_value - target_value) / baseline_value * 100 if baseline_value != 0 else 100
                     if diff_pct > 50:
@@ -124,7 +156,7 @@ class ConfigurationDriftDetector:
                     severity = "medium"
                     impact = f"Configuration value differs between environments"
 
-                drifts.append(ConfigDrift(
+                drifts.append(ConfigDrift.model_construct(
                     config_key=key,
                     expected_value=baseline_value,
                     actual_value=target_value,
@@ -135,11 +167,11 @@ class ConfigurationDriftDetector:
                 ))
 
         # Calculate drift score
-        total_configs = len(all_keys)
+        total_configs = len(baseline_keys) + len(target_keys) - len(common_keys)
         drift_score = ((total_configs - len(drifts)) / total_configs * 100) if total_configs > 0 else 100
 
         # Determine compliance status
-        critical_drifts = sum(1 for d in drifts if d.severity == "critical")
+        critical_drifts = [d.severity for d in drifts].count("critical")
         if critical_drifts > 0:
             compliance = "critical_drift"
         elif len(drifts) > 0:
@@ -148,7 +180,11 @@ class ConfigurationDriftDetector:
             compliance = "compliant"
 
         # Generate recommendations
-        recommendations = self._generate_recommendations(drifts, baseline_env, target_env)
+        # The keyword checks only need the keys, lowercased once
+        drifted_keys = [d.config_key.lower() for d in drifts]
+        recommendations = self._generate_recommendations(
+            critical_drifts, drifted_keys, baseline_env, target_env
+        )
 
         # Generate summary
         summary = self._generate_summary(
@@ -169,18 +205,18 @@ class ConfigurationDriftDetector:
 
     def _generate_recommendations(
         self,
-        drifts: List[ConfigDrift],
+        critical_drifts: int,
+        drifted_keys: List[str],
         baseline_env: str,
         target_env: str
     ) -> List[str]:
-        """Generate remediation recommendations"""
+        """Generate remediation recommendations from the drift counts and lowercased drifted keys"""
         recommendations = []
 
-        critical_drifts = [d for d in drifts if d.severity == "critical"]
         if critical_drifts:
-            recommendations.append(f"🚨 URGENT: Resolve {len(critical_drifts)} critical configuration drifts immediately")
+            recommendations.append(f"🚨 URGENT: Resolve {critical_drifts} critical configuration drifts immediately")
 
-        if drifts:
+        if drifted_keys:
             recommendations.extend([
                 f"Use infrastructure-as-code (Terraform/Ansible) to manage configurations",
                 f"Implement automated configuration validation in CI/CD pipeline",
@@ -189,11 +225,19 @@ class ConfigurationDriftDetector:
                 f"Use configuration management tools (e.g., Consul, etcd)"
             ])
 
-            # Specific recommendations based on drift types
-            if any('database' in d.config_key.lower() for d in drifts):
+            # Specific recommendations based on drift types, found in one
+            # scan that stops once both kinds have been seen
+            has_database = has_secret = False
+            for key in drifted_keys:
+                has_database = has_database or 'database' in key
+                has_secret = has_secret or 'key' in key or 'secret' in key
+                if has_database and has_secret:
+                    break
+
+            if has_database:
                 recommendations.append("Review database connection strings across environments")
 
-            if any('key' in d.config_key.lower() or 'secret' in d.config_key.lower() for d in drifts):
+            if has_secret:
                 recommendations.append("Ensure secrets are managed through secret management system")
 
         return recommendations[:6]
@@ -208,20 +252,24 @@ class ConfigurationDriftDetector:
         critical: int
     ) -> str:
         """Generate executive summary"""
-        summary = f"Configuration Drift Analysis\n"
-        summary += f"Baseline: {baseline} → Target: {target}\n\n"
-        summary += f"Configurations checked: {total}\n"
-        summary += f"Drifts detected: {drifts}\n"
-        summary += f"Drift score: {score:.1f}/100\n"
+        lines = [
+            "Configuration Drift Analysis",
+            f"Baseline: {baseline} → Target: {target}",
+            "",
+            f"Configurations checked: {total}",
+            f"Drifts detected: {drifts}",
+            f"Drift score: {score:.1f}/100",
+            "",
+        ]
 
         if critical > 0:
-            summary += f"\n⚠️  {critical} CRITICAL drifts require immediate attention\n"
+            lines += [f"⚠️  {critical} CRITICAL drifts require immediate attention", ""]
 
         if score >= 95:
-            summary += "\n✓ Environments are well-aligned"
+            lines.append("✓ Environments are well-aligned")
         elif score >= 80:
-            summary += "\n⚠ Minor drifts detected, review recommended"
+            lines.append("⚠ Minor drifts detected, review recommended")
         else:
-            summary += "\n✗ Significant drift detected, remediation required"
+            lines.append("✗ Significant drift detected, remediation required")
 
-        return summary
+        return "\n".join(lines)
@@ -5,16 +5,88 @@ Scans Docker images and containers for vulnerabilities, misconfigurations,
 and security best practices violations.
 """
 
-from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
+import re
+from collections import Counter
+from typing import Iterator, List, Optional, Set, Tuple
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from aiops.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Package manager usage in RUN instructions
+_APT_RE = re.compile(
+    r"(?P<apt_install>apt-get\s+install)"
+    r"|(?P<no_recommends>--no-install-recommends)"
+    r"|(?P<apt_clean>apt-get\s+clean)"
+)
+_SECRET_RE = re.compile(r"password|api_key|secret|token", re.IGNORECASE)
+
+# Instructions whose mere presence is checked, by the finding they record
+_PRESENCE_FINDINGS = {"USER": "user", "HEALTHCHECK": "healthcheck", "EXPOSE": "expose"}
+
+
+def _dockerfile_instructions(content: str) -> Iterator[Tuple[str, str]]:
+    """
+    Split a Dockerfile into (INSTRUCTION, arguments) pairs.
+
+    Comment and blank lines are skipped, lines ending in a backslash are
+    joined with the next, and instructions are upper-cased since Docker
+    treats them case-insensitively.
+    """
+    parts: List[str] = []
+    for line in content.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.endswith("\\"):
+            parts.append(stripped[:-1])
+            continue
+        parts.append(stripped)
+        instruction, _, args = " ".join(parts).partition(" ")
+        parts = []
+        yield instruction.upper(), args.strip()
+    if parts:
+        instruction, _, args = " ".join(parts).partition(" ")
+        yield instruction.upper(), args.strip()
+
+
+def _scan_instructions(content: str) -> Set[str]:
+    """
+    Parse a Dockerfile in one pass and return the names of what it contains.
+
+    Presence of USER, HEALTHCHECK and EXPOSE is recorded by instruction,
+    apt-get usage only from RUN instructions, secrets from any
+    instruction's arguments, and base image issues from FROM instructions.
+    """
+    found: Set[str] = set()
+    first_from = True
+    for instruction, args in _dockerfile_instructions(content):
+        if instruction in _PRESENCE_FINDINGS:
+            found.add(_PRESENCE_FINDINGS[instruction])
+        elif instruction == "RUN":
+            found.update(match.lastgroup for match in _APT_RE.finditer(args))
+        elif instruction == "FROM":
+            # Skip flags such as --platform=...; "AS stage" follows the image
+            image = next((token for token in args.split() if not token.startswith("--")), "")
+            name = image.rsplit("/", 1)[-1]
+            unpinned = name != "scratch" and ":" not in name and "@" not in name
+            if name.endswith(":latest") or (first_from and unpinned):
+                found.add("latest")
+            if name.startswith(("ubuntu", "debian")):
+                found.add("debian_base")
+            first_from = False
+
+        if _SECRET_RE.search(args):
+            found.add("secret")
+    return found
+
 
 class Vulnerability(BaseModel):
     """Container vulnerability"""
+
+    model_config = ConfigDict(frozen=True)
+
     cve_id: Optional[str] = Field(description="CVE identifier")
     severity: str = Field(description="critical, high, medium, low")
     package_name: str = Field(description="Affected package")
@@ -49,22 +121,25 @@ class ContainerSecurityScanner:
         vulnerabilities = []
         misconfigurations = []
         recommendations = []
+        found = _scan_instructions(dockerfile_content)
 
         # Check for running as root
-        if 'USER' not in dockerfile_content:
+        if 'user' not in found:
             misconfigurations.append("Container runs as root user")
             recommendations.append("Add 'USER' instruction to run as non-root user")
 
         # Check for latest tag
-        if ':latest' in dockerfile_content or not ':' in dockerfile_content.split('\n')[0]:
+        if 'latest' in found:
             misconfigurations.append("Using 'latest' tag or no specific version")
             recommendations.append("Pin to specific image versions for reproducibility")
 
         # Check for hardcoded secrets
-        if any(word in dockerfile_content.lower() for word in ['password', 'api_key', 'secret', 'token']):
+        if 'secret' in found:
             misconfigurations.append("Potential hardcoded secrets in Dockerfile")
             recommendations.append("Use build arguments or secrets management instead")
-            vulnerabilities.append(Vulnerability(
+            # Here and in the simulated scan below, findings are fixed,
+            # known-valid values, so they are constructed without validation
+            vulnerabilities.append(Vulnerability.model_construct(
                 cve_id=None,
                 severity="critical",
                 package_name="dockerfile",
@@ -75,28 +150,28 @@ class ContainerSecurityScanner:
             ))
 
         # Check for unnecessary packages
-        if 'apt-get install' in dockerfile_content and '--no-install-recommends' not in dockerfile_content:
+        if 'apt_install' in found and 'no_recommends' not in found:
             misconfigurations.append("Installing recommended packages unnecessarily")
             recommendations.append("Use --no-install-recommends to reduce attack surface")
 
         # Check for cache cleanup
-        if 'apt-get install' in dockerfile_content and 'apt-get clean' not in dockerfile_content:
+        if 'apt_install' in found and 'apt_clean' not in found:
             misconfigurations.append("Not cleaning package manager cache")
             recommendations.append("Add 'apt-get clean' to reduce image size")
 
         # Check for HEALTHCHECK
-        if 'HEALTHCHECK' not in dockerfile_content:
+        if 'healthcheck' not in found:
             misconfigurations.append("Missing HEALTHCHECK instruction")
             recommendations.append("Add HEALTHCHECK for better container monitoring")
 
         # Check for exposed ports
-        if 'EXPOSE' not in dockerfile_content:
+        if 'expose' not in found:
             misconfigurations.append("No ports explicitly exposed")
             recommendations.append("Use EXPOSE to document which ports the container listens on")
 
         # Simulate vulnerability scan (in real implementation, integrate with Trivy/Snyk)
-        if 'FROM ubuntu' in dockerfile_content or 'FROM debian' in dockerfile_content:
-            vulnerabilities.append(Vulnerability(
+        if 'debian_base' in found:
+            vulnerabilities.append(Vulnerability.model_construct(
                 cve_id="CVE-2024-XXXX",
                 severity="high",
                 package_name="openssl",
@@ -107,8 +182,9 @@ class ContainerSecurityScanner:
             ))
 
         # Calculate security score
-        security_score = self._calculate_security_score(vulnerabilities, misconfigurations)
-        risk_level = self._determine_risk_level(vulnerabilities)
+        severities = Counter(v.severity for v in vulnerabilities)
+        security_score = self._calculate_security_score(severities, len(misconfigurations))
+        risk_level = self._determine_risk_level(severities)
 
         summary = f"Scanned {image_name}: {len(vulnerabilities)} vulnerabilities, {len(misconfigurations)} misconfigurations. Score: {security_score:.0f}/100"
 
@@ -123,21 +199,19 @@ class ContainerSecurityScanner:
             recommendations=recommendations
         )
 
-    def _calculate_security_score(self, vulns: List[Vulnerability], misconfigs: List[str]) -> float:
-        score = 100.0
-        for vuln in vulns:
-            if vuln.severity == "critical":
-                score -= 25
-            elif vuln.severity == "high":
-                score -= 15
-            elif vuln.severity == "medium":
-                score -= 8
-        score -= len(misconfigs) * 5
+    def _calculate_security_score(self, severities: Counter, misconfig_count: int) -> float:
+        score = (
+            100.0
+            - 25 * severities["critical"]
+            - 15 * severities["high"]
+            - 8 * severities["medium"]
+            - 5 * misconfig_count
+        )
         return max(0.0, score)
 
-    def _determine_risk_level(self, vulns: List[Vulnerability]) -> str:
-        critical = sum(1 for v in vulns if v.severity == "critical")
-        high = sum(1 for v in vulns if v.severity == "high")
+    def _determine_risk_level(self, severities: Counter) -> str:
+        critical = severities["critical"]
+        high = severities["high"]
 
         if critical > 0:
             return "critical"
@@ -5,6 +5,7 @@ This agent analyzes cloud resource usage and costs across AWS, Azure, and GCP,
 identifying waste, suggesting optimizations, and forecasting future costs.
 """
 
+from collections import Counter
 from typing import Dict, List, Any, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime, timedelta
@@ -12,6 +13,11 @@ from aiops.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Resource types checked for reserved pricing, old copies and detached storage
+_RESERVABLE_TYPES = frozenset({'EC2', 'RDS', 'VM', 'SQL'})
+_SNAPSHOT_TYPES = frozenset({'Snapshot', 'Backup', 'Image'})
+_VOLUME_TYPES = frozenset({'EBS', 'Disk', 'Volume'})
+
 
 class CostSaving(BaseModel):
     """Individual cost saving opportunity"""
@@ -88,18 +94,21 @@ class CloudCostOptimizer:
             wasteful_resources = []
             total_current_cost = 0.0
             total_potential_savings = 0.0
+            add_saving = savings_opportunities.append
+            add_wasteful = wasteful_resources.append
 
             # Analyze each resource
             for resource in resources:
-                resource_type = resource.get('type', 'unknown')
-                resource_id = resource.get('id', 'unknown')
-                cost = resource.get('monthly_cost', 0.0)
+                get = resource.get
+                resource_type = get('type', 'unknown')
+                resource_id = get('id', 'unknown')
+                cost = get('monthly_cost', 0.0)
                 total_current_cost += cost
 
                 # Check for idle resources
                 if self._is_idle(resource, usage_metrics):
                     savings = cost * 1.0  # 100% savings if completely idle
-                    savings_opportunities.append(CostSaving(
+                    add_saving(CostSaving(
                         resource_type=resource_type,
                         resource_id=resource_id,
                         current_cost=cost,
@@ -110,13 +119,13 @@ class CloudCostOptimizer:
                         priority="high",
                         implementation_effort="easy"
                     ))
-                    wasteful_resources.append(resource_id)
+                    add_wasteful(resource_id)
                     total_potential_savings += savings
 
                 # Check for underutilization
                 elif self._is_underutilized(resource, usage_metrics):
                     savings = cost * 0.5  # Estimate 50% savings by right-sizing
-                    savings_opportunities.append(CostSaving(
+                    add_saving(CostSaving(
                         resource_type=resource_type,
                         resource_id=resource_id,
                         current_cost=cost,
@@ -130,11 +139,11 @@ class CloudCostOptimizer:
                     total_potential_savings += savings
 
                 # Check for missing reserved instance opportunities
-                if resource_type in ['EC2', 'RDS', 'VM', 'SQL'] and resource.get('pricing', 'on-demand') == 'on-demand':
-                    uptime = resource.get('uptime_percentage', 0)
+                if resource_type in _RESERVABLE_TYPES and get('pricing', 'on-demand') == 'on-demand':
+                    uptime = get('uptime_percentage', 0)
                     if uptime > 70:  # Running >70% of the time
                         savings = cost * 0.40  # Typical 40% savings with RIs
-                        savings_opportunities.append(CostSaving(
+                        add_saving(CostSaving(
                             resource_type=resource_type,
                             resource_id=resource_id,
                             current_cost=cost,
@@ -148,11 +157,11 @@ class CloudCostOptimizer:
                         total_potential_savings += savings
 
                 # Check for old snapshots/backups
-                if resource_type in ['Snapshot', 'Backup', 'Image']:
-                    age_days = resource.get('age_days', 0)
+                if resource_type in _SNAPSHOT_TYPES:
+                    age_days = get('age_days', 0)
                     if age_days > 90:
                         savings = cost * 1.0
-                        savings_opportunities.append(CostSaving(
+                        add_saving(CostSaving(
                             resource_type=resource_type,
                             resource_id=resource_id,
                             current_cost=cost,
@@ -163,13 +172,13 @@ class CloudCostOptimizer:
                             priority="medium",
                             implementation_effort="easy"
                         ))
-                        wasteful_resources.append(resource_id)
+                        add_wasteful(resource_id)
                         total_potential_savings += savings
 
                 # Check for unattached volumes
-                if resource_type in ['EBS', 'Disk', 'Volume'] and not resource.get('attached', True):
+                if resource_type in _VOLUME_TYPES and not get('attached', True):
                     savings = cost * 1.0
-                    savings_opportunities.append(CostSaving(
+                    add_saving(CostSaving(
                         resource_type=resource_type,
                         resource_id=resource_id,
                         current_cost=cost,
@@ -180,26 +189,30 @@ class CloudCostOptimizer:
                         priority="high",
                         implementation_effort="easy"
                     ))
-                    wasteful_resources.append(resource_id)
+                    add_wasteful(resource_id)
                     total_potential_savings += savings
 
             # Generate cost forecasts
-            forecasts = self._generate_forecasts(total_current_cost, savings_opportunities)
-
-            # Count recommendations by priority
+            forecasts = self._generate_forecasts(total_current_cost, total_potential_savings)
+
+            # Count recommendations by priority and effort in one pass
+            priorities: Counter = Counter()
+            efforts: Counter = Counter()
+            for saving in savings_opportunities:
+                priorities[saving.priority] += 1
+                efforts[saving.implementation_effort] += 1
             recommendations_by_priority = {
-                "critical": sum(1 for s in savings_opportunities if s.priority == "critical"),
-                "high": sum(1 for s in savings_opportunities if s.priority == "high"),
-                "medium": sum(1 for s in savings_opportunities if s.priority == "medium"),
-                "low": sum(1 for s in savings_opportunities if s.priority == "low")
+                priority: priorities[priority] for priority in ("critical", "high", "medium", "low")
             }
 
             # Generate summary
             summary = self._generate_summary(
                 total_current_cost,
                 total_potential_savings,
-                savings_opportunities,
-                wasteful_resources
+                len(savings_opportunities),
+                wasteful_resources,
+                high_priority=priorities["critical"] + priorities["high"],
+                easy_wins=efforts["easy"]
             )
 
             result = CostOptimizationResult(
@@ -245,11 +258,10 @@ class CloudCostOptimizer:
     def _generate_forecasts(
         self,
         current_cost: float,
-        savings_opportunities: List[CostSaving]
+        total_potential_savings: float
     ) -> List[CostForecast]:
         """Generate cost forecasts"""
         # Calculate optimized cost
-        total_potential_savings = sum(s.potential_savings for s in savings_opportunities)
         optimized_cost = current_cost - total_potential_savings
 
         forecasts = [
@@ -294,8 +306,10 @@ class CloudCostOptimizer:
         self,
         current_cost: float,
         potential_savings: float,
-        opportunities: List[CostSaving],
-        wasteful: List[str]
+        opportunity_count: int,
+        wasteful: List[str],
+        high_priority: int,
+        easy_wins: int
     ) -> str:
         """Generate executive summary"""
         savings_pct = (potential_savings / current_cost * 100) if current_cost > 0 else 0
@@ -308,13 +322,11 @@ class CloudCostOptimizer:
         if wasteful:
             summary += f"⚠️  Found {len(wasteful)} wasteful resources (idle or unused)\n"
 
-        summary += f"\n📊 Optimization Opportunities: {len(opportunities)}\n"
+        summary += f"\n📊 Optimization Opportunities: {opportunity_count}\n"
 
-        high_priority = sum(1 for o in opportunities if o.priority in ['critical', 'high'])
         if high_priority:
             summary += f"   • {high_priority} high-priority items\n"
 
-        easy_wins = sum(1 for o in opportunities if o.implementation_effort == 'easy')
         if easy_wins:
             summary += f"   • {easy_wins} quick wins (easy to implement)\n"
 
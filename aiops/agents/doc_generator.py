@@ -1,7 +1,7 @@
 """Documentation Generator Agent - Automated documentation generation."""
 
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Final, Optional, List, Dict, Any
+from pydantic import BaseModel, Field, TypeAdapter
 from aiops.agents.base_agent import BaseAgent
 from aiops.core.logger import get_logger
 
@@ -20,6 +20,14 @@ class APIDocumentation(BaseModel):
     examples: List[Dict[str, Any]] = Field(description="Usage examples")
 
 
+# Array schema and validator for APIDocumentation lists, built once at import
+_API_DOCUMENTATION_SCHEMA: Final[Dict[str, Any]] = {
+    "type": "array",
+    "items": APIDocumentation.model_json_schema(),
+}
+_API_DOCUMENTATION: Final[TypeAdapter[List[APIDocumentation]]] = TypeAdapter(List[APIDocumentation])
+
+
 class CodeDocumentation(BaseModel):
     """Generated code documentation."""
 
@@ -187,11 +195,11 @@ Provide structured documentation for each endpoint.
             result = await self._generate_structured_response(
                 prompt=user_prompt,
                 system_prompt=system_prompt,
-                schema={"type": "array", "items": APIDocumentation.model_json_schema()},
+                schema=_API_DOCUMENTATION_SCHEMA,
             )
 
             logger.info(f"Generated documentation for {len(result)} API endpoints")
-            return [APIDocumentation(**doc) for doc in result]
+            return _API_DOCUMENTATION.validate_python(result)
 
         except Exception as e:
             logger.error(f"API documentation generation failed: {e}")
@@ -1,7 +1,8 @@
 """Security Scanner Agent - Automated security vulnerability detection."""
 
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field
+import re
+from typing import Final, List, Dict, Any, Optional
+from pydantic import BaseModel, Field, TypeAdapter
 from aiops.agents.base_agent import BaseAgent
 from aiops.core.logger import get_logger
 
@@ -35,6 +36,18 @@ class DependencyVulnerability(BaseModel):
     description: str = Field(description="Vulnerability description")
 
 
+# Array schema and validator for DependencyVulnerability lists, built once at import
+_DEPENDENCY_VULNERABILITIES_SCHEMA: Final[Dict[str, Any]] = {
+    "type": "array",
+    "items": DependencyVulnerability.model_json_schema(),
+}
+_DEPENDENCY_VULNERABILITIES: Final[TypeAdapter[List[DependencyVulnerability]]] = TypeAdapter(List[DependencyVulnerability])
+
+# Mentions of keys or APIs in a secret scan response, matched without
+# lowercasing a copy of the response for each check
+_SECRET_MENTION_RE = re.compile(r"api|key", re.IGNORECASE)
+
+
 class SecurityScanResult(BaseModel):
     """Result of security scan."""
 
@@ -241,10 +254,10 @@ Identify:
             result = await self._generate_structured_response(
                 prompt=user_prompt,
                 system_prompt=system_prompt,
-                schema={"type": "array", "items": DependencyVulnerability.model_json_schema()},
+                schema=_DEPENDENCY_VULNERABILITIES_SCHEMA,
             )
 
-            vulns = [DependencyVulnerability(**v) for v in result]
+            vulns = _DEPENDENCY_VULNERABILITIES.validate_python(result)
             logger.info(f"Found {len(vulns)} dependency vulnerabilities")
             return vulns
 
@@ -300,7 +313,7 @@ Provide location and type of secret found.
             # In production, use regex patterns and entropy analysis
             secrets = []
 
-            if "api" in response.lower() or "key" in response.lower():
+            if _SECRET_MENTION_RE.search(response):
                 secrets.append({
                     "type": "potential_secret",
                     "description": "Potential secrets detected",
@@ -13,7 +13,7 @@ from aiops.core.token_tracker import get_token_tracker
 from aiops.agents.code_reviewer import CodeReviewAgent, CodeReviewResult
 from aiops.agents.test_generator import TestGeneratorAgent, TestSuite
 from aiops.agents.log_analyzer import LogAnalyzerAgent, LogAnalysisResult
-from aiops.agents.cicd_optimizer import CICDOptimizerAgent, PipelineOptimization
+from aiops.agents.cicd_optimizer import PipelineOptimization, get_cicd_agent
 from aiops.agents.doc_generator import DocGeneratorAgent
 from aiops.agents.performance_analyzer import PerformanceAnalyzerAgent, PerformanceAnalysisResult
 from aiops.agents.anomaly_detector import AnomalyDetectorAgent, AnomalyDetectionResult
@@ -387,7 +387,7 @@ def create_app() -> FastAPI:
         """Optimize CI/CD pipeline (requires authentication)."""
         try:
             logger.info(f"Pipeline optimization requested by {current_user.get('username') if current_user else 'anonymous'}")
-            agent = CICDOptimizerAgent()
+            agent = get_cicd_agent()
             result = await agent.execute(
                 pipeline_config=request.pipeline_config,
                 pipeline_logs=request.pipeline_logs,
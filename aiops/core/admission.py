@@ -0,0 +1,162 @@
+"""Adaptive admission control for concurrent LLM calls."""
+
+import asyncio
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional
+from aiops.core.exceptions import LLMRateLimitError
+from aiops.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Provider responses that mean "send less", not "this request was bad"
+_OVERLOAD_STATUS_CODES = frozenset({429, 503, 529})
+
+# Rate limit reset durations as sent by OpenAI, e.g. "1s", "6m0s", "20ms"
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Seconds in a duration header, or None if it is not one."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """
+    Seconds the provider asked callers to wait before retrying.
+
+    Read from LLMRateLimitError.retry_after, the retry-after header, or the
+    request rate limit reset when no requests remain.
+    """
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after:
+        return float(retry_after)
+
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    if headers.get("retry-after"):
+        return _parse_duration(headers["retry-after"])
+    if headers.get("x-ratelimit-remaining-requests") == "0" and headers.get("x-ratelimit-reset-requests"):
+        return _parse_duration(headers["x-ratelimit-reset-requests"])
+    return None
+
+
+def _is_overload(error: BaseException) -> bool:
+    """Whether an error signals that the provider is saturated."""
+    return (
+        isinstance(error, (LLMRateLimitError, asyncio.TimeoutError, TimeoutError))
+        or getattr(error, "status_code", None) in _OVERLOAD_STATUS_CODES
+    )
+
+
+class AdmissionController:
+    """
+    AIMD limit on the number of concurrent calls to an LLM provider.
+
+    The limit grows by 0.5 after each call that succeeds within
+    target_latency and halves when a call is slower or the provider reports
+    overload, so concurrency settles just below the point where the provider
+    saturates. Calls wait while the limit is reached and, after a rate
+    limit error, until the provider's retry-after has passed.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        target_latency: Optional[float] = None,
+        min_concurrency: int = 1,
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            max_concurrency: Upper bound and starting value of the limit
+            target_latency: Seconds above which a call counts as overload;
+                None adapts to provider errors only
+            min_concurrency: Lower bound of the limit
+        """
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.target_latency = target_latency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one unit of concurrency for the duration of a call."""
+        await self._acquire()
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._release(started, error)
+
+    async def _acquire(self) -> None:
+        while True:
+            delay = self._blocked_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    # Pass the wake-up on to another waiter
+                    self._wake()
+                raise
+
+    def _release(self, started: float, error: Optional[BaseException]) -> None:
+        self.in_flight -= 1
+        now = time.monotonic()
+
+        retry_after = _retry_after(error) if error is not None else None
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+
+        slow = self.target_latency is not None and now - started > self.target_latency
+        if slow or (error is not None and _is_overload(error)):
+            # Calls started before the last decrease saw the old limit;
+            # their slowness is already accounted for
+            if started >= self._last_decrease:
+                self.limit = max(float(self.min_concurrency), self.limit * 0.5)
+                self._last_decrease = now
+                logger.debug(f"Admission limit decreased to {int(self.limit)}")
+        elif error is None:
+            self.limit = min(float(self.max_concurrency), self.limit + 0.5)
+
+        self._wake()
+
+    def _wake(self) -> None:
+        """Wake as many waiters as there are free slots."""
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
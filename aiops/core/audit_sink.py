@@ -0,0 +1,67 @@
+"""File sink for compliance audit trails."""
+
+import uuid
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple, Union
+import orjson
+from aiops.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _status(entry: Any) -> str:
+    """Status of an audit entry, "unknown" if it has none."""
+    return str(entry.get("status", "unknown")) if isinstance(entry, dict) else "unknown"
+
+
+def summarize_audit_trail(entries: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """Number of audit entries per "status" value, without writing them."""
+    return dict(Counter(map(_status, entries)))
+
+
+class AuditTrailSink:
+    """
+    Writes audit trail entries to NDJSON files, one file per report.
+
+    Entries are serialized and written in batches, so only one batch is held
+    as bytes at a time. Reports keep the file URI and a summary instead of
+    the entries themselves.
+    """
+
+    def __init__(self, directory: Union[str, Path], batch_size: int = 10_000):
+        """
+        Initialize the sink.
+
+        Args:
+            directory: Directory for audit trail files, created on first write
+            batch_size: Entries serialized per write
+        """
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+
+    def write(self, name: str, entries: Iterable[Dict[str, Any]]) -> Tuple[str, Dict[str, int]]:
+        """
+        Write audit entries to a new file.
+
+        Args:
+            name: File name prefix, e.g. the report ID
+            entries: Audit entries to write
+
+        Returns:
+            URI of the written file and the number of entries per "status"
+            value ("unknown" for entries without one)
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = (self.directory / f"{name}-{uuid.uuid4().hex[:8]}.ndjson").resolve()
+        summary: Counter = Counter()
+
+        entries = iter(entries)
+        with open(path, "wb") as f:
+            while batch := list(islice(entries, self.batch_size)):
+                summary.update(map(_status, batch))
+                f.write(b"".join(orjson.dumps(entry, default=str) + b"\n" for entry in batch))
+
+        logger.debug(f"Wrote {sum(summary.values())} audit entries to {path}")
+        return path.as_uri(), dict(summary)
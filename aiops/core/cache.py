@@ -5,6 +5,7 @@ import json
 import time
 import pickle
 import os
+from collections import OrderedDict
 from typing import Any, Optional, Callable
 from pathlib import Path
 from functools import wraps
@@ -120,6 +121,58 @@ class RedisBackend(CacheBackend):
             logger.error(f"Redis clear error: {e}")
 
 
+class MemoryBackend(CacheBackend):
+    """In-process LRU cache backend with per-entry TTL."""
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        Initialize memory backend.
+
+        Args:
+            maxsize: Maximum number of entries before the least recently
+                used entry is evicted
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get value from memory cache."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() > expires_at:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """Set value in memory cache."""
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        """Delete key from memory cache."""
+        self._entries.pop(key, None)
+
+    def exists(self, key: str) -> bool:
+        """Check if key exists and has not expired."""
+        return self.get(key) is not None
+
+    def clear(self):
+        """Clear all memory cache entries."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class FileBackend(CacheBackend):
     """File-based cache backend."""
 
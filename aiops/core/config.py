@@ -18,6 +18,8 @@ class Config(BaseSettings):
     # LLM Settings
     openai_api_key: Optional[str] = None
     anthropic_api_key: Optional[str] = None
+    # OpenAI-compatible endpoint, e.g. a self-hosted vLLM server
+    openai_base_url: Optional[str] = None
     default_llm_provider: Literal["openai", "anthropic"] = "openai"
     default_model: str = "gpt-4-turbo-preview"
     default_temperature: float = Field(default=0.7, ge=0.0, le=2.0)
@@ -55,6 +57,8 @@ class Config(BaseSettings):
         if provider == "openai":
             config["api_key"] = self.openai_api_key
             config["model"] = self.default_model
+            if self.openai_base_url:
+                config["base_url"] = self.openai_base_url
         elif provider == "anthropic":
             config["api_key"] = self.anthropic_api_key
             config["model"] = self.default_model
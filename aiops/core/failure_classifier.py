@@ -0,0 +1,213 @@
+"""Deterministic classification of CI build failures from their logs."""
+
+import re
+from typing import Any, Dict, NamedTuple, Optional, Pattern, Tuple
+
+
+class _FailureRule(NamedTuple):
+    """Log signature that identifies a failure with a known remedy"""
+    pattern: Pattern[str]
+    failure_category: str
+    root_cause: str
+    quick_fix: str
+    detailed_solution: str
+    prevention: Tuple[str, ...]
+
+
+# Checked in order; the first rule whose pattern appears in the log wins, so
+# specific infrastructure signatures come before generic build and test ones.
+_FAILURE_RULES: Tuple[_FailureRule, ...] = (
+    _FailureRule(
+        pattern=re.compile(
+            r"OOMKilled|exit code 137|Killed\s+process|Out of memory|"
+            r"JavaScript heap out of memory|java\.lang\.OutOfMemoryError|MemoryError"
+        ),
+        failure_category="infrastructure",
+        root_cause="The build ran out of memory",
+        quick_fix="Increase the memory limit of the runner or container",
+        detailed_solution=(
+            "1. Raise the memory limit of the job, runner or container\n"
+            "2. Reduce build parallelism (e.g. fewer test workers or compiler jobs)\n"
+            "3. Cap tool heaps explicitly (e.g. NODE_OPTIONS=--max-old-space-size, -Xmx)\n"
+            "4. Profile the step that was killed for memory leaks or oversized fixtures"
+        ),
+        prevention=(
+            "Set explicit memory requests and limits for CI jobs",
+            "Track peak memory usage of build steps over time",
+        ),
+    ),
+    _FailureRule(
+        pattern=re.compile(r"No space left on device|ENOSPC"),
+        failure_category="infrastructure",
+        root_cause="The runner ran out of disk space",
+        quick_fix="Free disk space on the runner or use a larger disk",
+        detailed_solution=(
+            "1. Remove unused Docker images, volumes and build caches on the runner\n"
+            "2. Clean workspace artifacts between jobs\n"
+            "3. Increase the disk size of the runner"
+        ),
+        prevention=(
+            "Prune Docker and build caches on a schedule",
+            "Alert on runner disk usage",
+        ),
+    ),
+    _FailureRule(
+        pattern=re.compile(r"ImagePullBackOff|ErrImagePull|manifest unknown|pull access denied"),
+        failure_category="deployment",
+        root_cause="The container image could not be pulled",
+        quick_fix="Check the image name and tag and the registry credentials",
+        detailed_solution=(
+            "1. Verify the image name and tag were pushed by the build\n"
+            "2. Check the image pull secret or registry credentials\n"
+            "3. Confirm the cluster can reach the registry"
+        ),
+        prevention=(
+            "Deploy images by the digest produced in the same pipeline",
+            "Validate that the image exists before deploying",
+        ),
+    ),
+    _FailureRule(
+        pattern=re.compile(r"CrashLoopBackOff"),
+        failure_category="deployment",
+        root_cause="The deployed container keeps crashing on startup",
+        quick_fix="Inspect the container logs of the crashing pod",
+        detailed_solution=(
+            "1. Read the logs of the previous container instance (kubectl logs --previous)\n"
+            "2. Check configuration, secrets and environment variables the service needs\n"
+            "3. Verify liveness probes give the service enough time to start"
+        ),
+        prevention=(
+            "Smoke test images before deploying them",
+            "Use readiness probes and progressive rollouts",
+        ),
+    ),
+    _FailureRule(
+        pattern=re.compile(
+            r"Could not resolve host|Temporary failure in name resolution|"
+            r"ECONNRESET|ETIMEDOUT|TLS handshake timeout|Connection reset by peer"
+        ),
+        failure_category="infrastructure",
+        root_cause="A network request from the build failed",
+        quick_fix="Retry the job",
+        detailed_solution=(
+            "1. Retry the job to rule out a transient outage\n"
+            "2. Check DNS and proxy settings of the runner\n"
+            "3. Check the status of the remote registry or service"
+        ),
+        prevention=(
+            "Cache or mirror dependencies close to the runners",
+            "Add retries with backoff to network-bound steps",
+        ),
+    ),
+    _FailureRule(
+        pattern=re.compile(
+            r"npm ERR! code E(?:RESOLVE|NOTFOUND|404|TARGET)|"
+            r"Could not find a version that satisfies the requirement|"
+            r"No matching distribution found|ResolutionImpossible|"
+            r"Could not resolve dependencies for project"
+        ),
+        failure_category="compilation",
+        root_cause="Dependencies could not be resolved",
+        quick_fix="Fix the conflicting or missing dependency versions",
+        detailed_solution=(
+            "1. Find the package named in the resolution error\n"
+            "2. Check that the requested version exists in the registry\n"
+            "3. Relax or align conflicting version constraints\n"
+            "4. Regenerate and commit the lock file"
+        ),
+        prevention=(
+            "Commit lock files and install from them in CI",
+            "Update dependencies through automated pull requests",
+        ),
+    ),
+    _FailureRule(
+        pattern=re.compile(
+            r"error TS\d+:|error\[E\d+\]|error: cannot find symbol|COMPILATION ERROR|"
+            r"undefined reference to|fatal error: .+: No such file or directory"
+        ),
+        failure_category="compilation",
+        root_cause="The code failed to compile",
+        quick_fix="Fix the compiler errors reported in the log",
+        detailed_solution=(
+            "1. Fix the first compiler error; later errors are often caused by it\n"
+            "2. Reproduce locally with the same compiler and flags as CI\n"
+            "3. Check for missing generated files or headers"
+        ),
+        prevention=(
+            "Compile before pushing with a pre-commit or pre-push hook",
+            "Pin compiler and toolchain versions in CI",
+        ),
+    ),
+    _FailureRule(
+        pattern=re.compile(
+            r"=+ .*\d+ failed|^FAILED \S+::|Tests run: \d+, Failures: [1-9]|"
+            r"Tests:\s+\d+ failed|^--- FAIL:",
+            re.MULTILINE,
+        ),
+        failure_category="test",
+        root_cause="One or more tests failed",
+        quick_fix="Fix the failing tests reported in the log",
+        detailed_solution=(
+            "1. Run the failing tests locally\n"
+            "2. Check whether the failure is caused by the change or is flaky\n"
+            "3. Fix the code or update the test if the behaviour change is intended"
+        ),
+        prevention=(
+            "Run the affected tests before pushing",
+            "Quarantine and track flaky tests",
+        ),
+    ),
+)
+
+# Commands that start a pipeline step: GitLab "$ cmd", GitHub Actions
+# "##[group]Run cmd", Docker "Step 3/7 : CMD" and Jenkins "[Pipeline] { (Stage)"
+_STEP_RE = re.compile(
+    r"^(?:\$ (?P<shell>.+)|##\[group\]Run (?P<action>.+)|Step \d+/\d+ : (?P<docker>.+)|"
+    r"\[Pipeline\] \{ \((?P<stage>.+)\))$",
+    re.MULTILINE,
+)
+
+_MAX_SUMMARY_CHARS = 300
+
+
+def _failed_step(logs: str, end: int) -> str:
+    """Name of the last step started before position end of the log."""
+    step = None
+    for step in _STEP_RE.finditer(logs, 0, end):
+        pass
+    if step is None:
+        return "unknown"
+    return next(group for group in step.groups() if group).strip()
+
+
+def classify_failure(logs: str) -> Optional[Dict[str, Any]]:
+    """
+    Classify a build failure from a known log signature.
+
+    Args:
+        logs: Build failure logs
+
+    Returns:
+        BuildFailureAnalysis fields for the first matching signature, with
+        the matching log line as error summary, or None if no signature matches
+    """
+    for rule in _FAILURE_RULES:
+        match = rule.pattern.search(logs)
+        if match is None:
+            continue
+
+        line_start = logs.rfind("\n", 0, match.start()) + 1
+        line_end = logs.find("\n", match.end())
+        error_line = logs[line_start:line_end if line_end != -1 else len(logs)].strip()
+
+        return {
+            "failure_category": rule.failure_category,
+            "root_cause": rule.root_cause,
+            "failed_step": _failed_step(logs, line_start),
+            "error_summary": error_line[:_MAX_SUMMARY_CHARS],
+            "quick_fix": rule.quick_fix,
+            "detailed_solution": rule.detailed_solution,
+            "prevention": list(rule.prevention),
+        }
+
+    return None
@@ -0,0 +1,51 @@
+"""Shared HTTP client for LLM provider traffic."""
+
+import asyncio
+import atexit
+import importlib.util
+from typing import Optional
+import httpx
+from aiops.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Enough pooled connections for every agent's max_concurrency at once
+_MAX_CONNECTIONS = 256
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide async HTTP client for LLM providers.
+
+    Sharing one client keeps connections alive between calls, so requests
+    skip TCP and TLS setup, and with the optional h2 package installed
+    concurrent requests to a provider are multiplexed over HTTP/2.
+    Retries are left to the provider SDKs, which honour retry-after.
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=_MAX_CONNECTIONS,
+                max_keepalive_connections=_MAX_CONNECTIONS,
+            ),
+            # Same defaults as the OpenAI and Anthropic SDKs; they pass
+            # their own timeout with each request anyway
+            timeout=httpx.Timeout(600.0, connect=5.0),
+        )
+    return _async_client
+
+
+@atexit.register
+def _close_async_client() -> None:
+    """Close the shared client's pooled connections on interpreter exit."""
+    if _async_client is None or _async_client.is_closed:
+        return
+    try:
+        asyncio.run(_async_client.aclose())
+    except Exception as e:
+        # The event loop that owned the connections may already be gone
+        logger.debug(f"Failed to close HTTP client: {e}")
@@ -0,0 +1,88 @@
+"""In-process output cache for LLM-backed agent methods."""
+
+import hashlib
+import inspect
+import json
+from functools import wraps
+from typing import Any, Callable, Optional
+from pydantic import BaseModel
+from aiops.core.cache import MemoryBackend
+from aiops.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Sampling above this temperature is too varied for a cached response to
+# stand in for a fresh one
+MAX_CACHEABLE_TEMPERATURE = 0.2
+
+
+def _make_key(name: str, args: tuple, kwargs: dict) -> str:
+    """Hash the qualified function name and its arguments."""
+    key_string = name + json.dumps({"args": args, "kwargs": kwargs}, sort_keys=True, default=str)
+    return hashlib.sha256(key_string.encode()).hexdigest()
+
+
+def llm_cache(
+    ttl: int = 3600,
+    maxsize: int = 1024,
+    cache_if: Optional[Callable[[Any], bool]] = None,
+):
+    """
+    Decorator to cache the results of an async agent method in-process.
+
+    Results are keyed on the method's qualified name and its arguments
+    (excluding ``self``), plus the provider and model of the instance's
+    ``llm``, so identical calls from any instance using the same model skip
+    the LLM. Instances whose model samples above MAX_CACHEABLE_TEMPERATURE
+    are not cached. Pydantic results are stored as JSON and rehydrated on
+    every hit, so callers never share a mutable instance.
+
+    Args:
+        ttl: Time-to-live in seconds
+        maxsize: Maximum number of cached results (least recently used evicted)
+        cache_if: Optional predicate; results for which it returns False are not cached
+
+    Example:
+        @llm_cache(ttl=3600)
+        async def fix_common_issues(self, issue_type, context=None):
+            ...
+    """
+
+    def decorator(func: Callable):
+        backend = MemoryBackend(maxsize=maxsize)
+        params = list(inspect.signature(func).parameters)
+        is_method = bool(params) and params[0] == "self"
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            llm = getattr(args[0], "llm", None) if is_method and args else None
+            if llm is None:
+                name = func.__qualname__
+            elif llm.temperature > MAX_CACHEABLE_TEMPERATURE:
+                return await func(*args, **kwargs)
+            else:
+                name = f"{llm.provider}:{llm.model}:{func.__qualname__}"
+            cache_key = _make_key(name, args[1:] if is_method else args, kwargs)
+
+            entry = backend.get(cache_key)
+            if entry is not None:
+                model, payload = entry
+                logger.debug(f"LLM cache hit for {func.__qualname__}")
+                return model.model_validate_json(payload) if model else payload
+
+            result = await func(*args, **kwargs)
+
+            if result is not None and (cache_if is None or cache_if(result)):
+                if isinstance(result, BaseModel):
+                    backend.set(cache_key, (type(result), result.model_dump_json()), ttl)
+                else:
+                    backend.set(cache_key, (None, result), ttl)
+
+            return result
+
+        wrapper.clear_cache = backend.clear
+        wrapper.cache_size = lambda: len(backend)
+
+        return wrapper
+
+    return decorator
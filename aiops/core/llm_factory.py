@@ -1,17 +1,69 @@
 """LLM Factory for creating and managing LLM instances."""
 
-from typing import Optional, Any, Dict
+import asyncio
+import functools
+import importlib
+import orjson
+from typing import Optional, Any, AsyncIterator, Dict, List
 from abc import ABC, abstractmethod
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
+from pydantic import BaseModel
 from langchain.schema import HumanMessage, SystemMessage, AIMessage
 from langchain.callbacks.base import BaseCallbackHandler
 from aiops.core.config import get_config
+from aiops.core.http import get_async_client
 from aiops.core.logger import get_logger
 from aiops.core.token_tracker import get_token_tracker
 
 logger = get_logger(__name__)
 
+# Provider chat models are imported on first use (PEP 562) so that importing
+# an agent does not load every provider SDK.
+_PROVIDER_CHAT_MODELS: Dict[str, str] = {
+    "ChatOpenAI": "langchain_openai",
+    "ChatAnthropic": "langchain_anthropic",
+}
+
+# OpenAI batch statuses after which a batch will not change any more
+_BATCH_DONE_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+def __getattr__(name: str) -> Any:
+    """Import a provider chat model class on first access and cache it."""
+    module_name = _PROVIDER_CHAT_MODELS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    obj = getattr(importlib.import_module(module_name), name)
+    globals()[name] = obj
+    return obj
+
+
+@functools.lru_cache(maxsize=128)
+def _json_schema(model: type) -> Dict[str, Any]:
+    """JSON schema of a pydantic model, generated once per model."""
+    return model.model_json_schema()
+
+
+def _chat_model(name: str) -> Any:
+    """Return a provider chat model class, importing it if needed."""
+    return globals()[name] if name in globals() else __getattr__(name)
+
+
+def _cache_token_usage(usage: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Extract prompt-cache token counts from a provider usage block.
+
+    OpenAI reports cache hits under prompt_tokens_details.cached_tokens;
+    Anthropic reports cache writes and reads as separate input counters.
+    """
+    details = usage.get("prompt_tokens_details") or {}
+    return {
+        "cache_creation_input_tokens": usage.get("cache_creation_input_tokens") or 0,
+        "cache_read_input_tokens": (
+            usage.get("cache_read_input_tokens") or details.get("cached_tokens") or 0
+        ),
+    }
+
 
 class TokenTrackingCallback(BaseCallbackHandler):
     """Callback to track token usage."""
@@ -29,10 +81,17 @@ class TokenTrackingCallback(BaseCallbackHandler):
         try:
             # Extract token usage from response
             if hasattr(response, 'llm_output') and response.llm_output:
-                token_usage = response.llm_output.get('token_usage', {})
+                # OpenAI reports 'token_usage', Anthropic reports 'usage'
+                token_usage = (
+                    response.llm_output.get('token_usage')
+                    or response.llm_output.get('usage')
+                    or {}
+                )
                 if token_usage:
-                    input_tokens = token_usage.get('prompt_tokens', 0)
-                    output_tokens = token_usage.get('completion_tokens', 0)
+                    input_tokens = token_usage.get('prompt_tokens', token_usage.get('input_tokens', 0))
+                    output_tokens = token_usage.get('completion_tokens', token_usage.get('output_tokens', 0))
+
+                    cache_usage = _cache_token_usage(token_usage)
 
                     # Track usage
                     self.tracker.track(
@@ -42,10 +101,37 @@ class TokenTrackingCallback(BaseCallbackHandler):
                         output_tokens=output_tokens,
                         user=self.user,
                         agent=self.agent,
+                        metadata=cache_usage,
                     )
+                    self._track_cache_usage(cache_usage)
         except Exception as e:
             logger.warning(f"Failed to track token usage: {e}")
 
+    def _track_cache_usage(self, cache_usage: Dict[str, int]):
+        """Log prompt-cache tokens and export them as Prometheus counters."""
+        cache_read = cache_usage["cache_read_input_tokens"]
+        cache_write = cache_usage["cache_creation_input_tokens"]
+        if not (cache_read or cache_write):
+            return
+
+        logger.info(
+            f"Prompt cache usage: {self.model} | "
+            f"Read: {cache_read} | Write: {cache_write}"
+            + (f" | Agent: {self.agent}" if self.agent else "")
+        )
+
+        try:
+            from aiops.observability.metrics import MetricsCollector
+        except ImportError:
+            # Metrics are optional; tracing/prometheus may not be installed
+            return
+        MetricsCollector.track_llm_cache_tokens(
+            provider=self.provider,
+            model=self.model,
+            cache_read_tokens=cache_read,
+            cache_write_tokens=cache_write,
+        )
+
 
 class BaseLLM(ABC):
     """Base class for LLM wrappers."""
@@ -56,6 +142,13 @@ class BaseLLM(ABC):
         self.provider = config.get("provider", "unknown")
         self.user = config.get("user")
         self.agent = config.get("agent")
+        self._structured_llms: Dict[Any, Any] = {}
+
+    @property
+    def temperature(self) -> float:
+        """Sampling temperature the chat model uses."""
+        temperature = getattr(getattr(self, "llm", None), "temperature", None)
+        return get_config().default_temperature if temperature is None else temperature
 
     @abstractmethod
     async def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
@@ -69,6 +162,107 @@ class BaseLLM(ABC):
         """Generate structured response from LLM."""
         pass
 
+    async def generate_structured_batch(
+        self,
+        prompts: List[str],
+        schema: Dict[str, Any],
+        system_prompt: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        **kwargs,
+    ) -> List[Any]:
+        """
+        Generate structured responses for many prompts in one submission.
+
+        Results are returned in prompt order. A failed item is returned as its
+        exception instead of failing the whole batch. At most max_concurrency
+        requests are in flight at once (unbounded if None).
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or len(prompts) or 1)
+
+        async def bounded(prompt: str) -> Any:
+            async with semaphore:
+                return await self.generate_structured(prompt, schema, system_prompt, **kwargs)
+
+        return await asyncio.gather(*(bounded(p) for p in prompts), return_exceptions=True)
+
+    async def generate_structured_stream(
+        self, prompt: str, schema: Dict[str, Any], system_prompt: Optional[str] = None, **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a structured response as progressively more complete dicts.
+
+        Providers without streaming support yield the final response once.
+        """
+        response = await self.generate_structured(prompt, schema, system_prompt, **kwargs)
+        yield response.model_dump() if isinstance(response, BaseModel) else response
+
+    async def generate_batch(
+        self,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        poll_interval: float = 30.0,
+        **kwargs,
+    ) -> List[Any]:
+        """
+        Generate responses for many prompts through the provider's batch API.
+
+        Batch APIs trade latency (results may take minutes to hours) for
+        lower cost and higher throughput, so use this for offline work such
+        as post-incident replay. Results are returned in prompt order; a
+        failed item is returned as its exception. Providers without a batch
+        API run the prompts concurrently.
+        """
+        return await asyncio.gather(
+            *(self.generate(p, system_prompt, **kwargs) for p in prompts), return_exceptions=True
+        )
+
+    def _structured_llm(self, schema: Any, partial: bool = False) -> Any:
+        """
+        Return the structured-output runnable for a schema, building it once.
+
+        Binding a schema converts it to a provider tool definition, so the
+        runnable is cached per schema to skip that work on every call and
+        keep the tool definition byte-identical across requests. With
+        partial=True a model schema is bound as its JSON schema, which makes
+        the tool-call parser emit partial objects while streaming.
+        """
+        is_model = isinstance(schema, type) and issubclass(schema, BaseModel)
+        if is_model:
+            key = (schema, partial)
+        else:
+            key = orjson.dumps(schema, option=orjson.OPT_SORT_KEYS)
+
+        runnable = self._structured_llms.get(key)
+        if runnable is None:
+            bound = _json_schema(schema) if is_model and partial else schema
+            runnable = self._structured_llms[key] = self.llm.with_structured_output(
+                bound, **self._structured_output_options(bound)
+            )
+        return runnable
+
+    def _structured_output_options(self, schema: Any) -> Dict[str, Any]:
+        """Options for binding a structured-output schema; provider defaults here."""
+        return {}
+
+    def _request_options(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Per-request model options.
+
+        max_tokens caps the length of one response without changing the
+        model's configured default.
+        """
+        max_tokens = kwargs.get("max_tokens")
+        return {"max_tokens": max_tokens} if max_tokens else {}
+
+    def _system_message(self, system_prompt: str, cacheable: bool = True) -> SystemMessage:
+        """
+        Build the system message.
+
+        Providers with explicit prompt caching override this to tag a
+        cacheable system prompt; by default the prompt is sent as is.
+        """
+        return SystemMessage(content=system_prompt)
+
     def _create_callback(self):
         """Create token tracking callback."""
         return TokenTrackingCallback(
@@ -84,23 +278,69 @@ class OpenAILLM(BaseLLM):
 
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
-        self.llm = ChatOpenAI(
+        self.llm = _chat_model("ChatOpenAI")(
             model=config.get("model", "gpt-4-turbo-preview"),
             temperature=config.get("temperature", 0.7),
             max_tokens=config.get("max_tokens", 4096),
             api_key=config.get("api_key"),
             callbacks=[self._create_callback()],
+            http_async_client=get_async_client(),
+            **({"base_url": config["base_url"]} if config.get("base_url") else {}),
+            # OpenAI caches prompt prefixes automatically; retention can be
+            # extended on models that support it (e.g. "24h").
+            extra_body=(
+                {"prompt_cache_retention": config["prompt_cache_retention"]}
+                if config.get("prompt_cache_retention")
+                else None
+            ),
         )
 
+    def _structured_output_options(self, schema: Any) -> Dict[str, Any]:
+        """
+        Bind schemas as a JSON schema response format on self-hosted endpoints.
+
+        OpenAI-compatible servers such as vLLM enforce a response format
+        with guided decoding, compiling the schema once on the server, so
+        responses always parse; tool calling there depends on how the server
+        was started.
+        """
+        if self.config.get("base_url"):
+            return {"method": "json_schema"}
+        return {}
+
+    def _request_options(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Per-request model options, including prompt caching.
+
+        A prompt_cache_key groups requests sharing a long static prefix onto
+        the same cache, which raises the hit rate for that prefix. Like
+        prompt_cache_retention it is sent in the request body, so SDK
+        releases that predate the parameter still accept it.
+        """
+        options = super()._request_options(kwargs)
+        key = kwargs.get("prompt_cache_key")
+        if key:
+            # Replaces the model's extra_body for this request, so the
+            # retention setting is repeated here
+            extra_body = {"prompt_cache_key": key}
+            if self.config.get("prompt_cache_retention"):
+                extra_body["prompt_cache_retention"] = self.config["prompt_cache_retention"]
+            options["extra_body"] = extra_body
+        return options
+
     async def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
         """Generate response from OpenAI."""
         messages = []
         if system_prompt:
-            messages.append(SystemMessage(content=system_prompt))
+            messages.append(self._system_message(system_prompt, kwargs.get("cacheable_system", True)))
         messages.append(HumanMessage(content=prompt))
 
         try:
-            response = await self.llm.ainvoke(messages, config={"callbacks": [self._create_callback()]})
+            response = await self.llm.ainvoke(
+                messages,
+                config={"callbacks": [self._create_callback()]},
+                **self._request_options(kwargs),
+            )
             return response.content
         except Exception as e:
             logger.error(f"OpenAI generation failed: {e}")
@@ -113,24 +353,145 @@ class OpenAILLM(BaseLLM):
         # Use function calling for structured output
         messages = []
         if system_prompt:
-            messages.append(SystemMessage(content=system_prompt))
+            messages.append(self._system_message(system_prompt, kwargs.get("cacheable_system", True)))
         messages.append(HumanMessage(content=prompt))
 
         try:
-            structured_llm = self.llm.with_structured_output(schema)
-            response = await structured_llm.ainvoke(messages, config={"callbacks": [self._create_callback()]})
+            structured_llm = self._structured_llm(schema)
+            response = await structured_llm.ainvoke(
+                messages,
+                config={"callbacks": [self._create_callback()]},
+                **self._request_options(kwargs),
+            )
             return response
         except Exception as e:
             logger.error(f"OpenAI structured generation failed: {e}")
             raise
 
+    async def generate_structured_batch(
+        self,
+        prompts: List[str],
+        schema: Dict[str, Any],
+        system_prompt: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        **kwargs,
+    ) -> List[Any]:
+        """Generate structured responses from OpenAI for a batch of prompts."""
+        batch = []
+        for prompt in prompts:
+            messages = []
+            if system_prompt:
+                messages.append(self._system_message(system_prompt, kwargs.get("cacheable_system", True)))
+            messages.append(HumanMessage(content=prompt))
+            batch.append(messages)
+
+        try:
+            structured_llm = self._structured_llm(schema)
+            return await structured_llm.abatch(
+                batch,
+                config={"callbacks": [self._create_callback()], "max_concurrency": max_concurrency},
+                return_exceptions=True,
+                **self._request_options(kwargs),
+            )
+        except Exception as e:
+            logger.error(f"OpenAI structured batch generation failed: {e}")
+            raise
+
+    async def generate_structured_stream(
+        self, prompt: str, schema: Dict[str, Any], system_prompt: Optional[str] = None, **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a structured response from OpenAI as partial dicts."""
+        messages = []
+        if system_prompt:
+            messages.append(self._system_message(system_prompt, kwargs.get("cacheable_system", True)))
+        messages.append(HumanMessage(content=prompt))
+
+        try:
+            structured_llm = self._structured_llm(schema, partial=True)
+            async for partial in structured_llm.astream(
+                messages,
+                config={"callbacks": [self._create_callback()]},
+                **self._request_options(kwargs),
+            ):
+                yield partial
+        except Exception as e:
+            logger.error(f"OpenAI structured stream failed: {e}")
+            raise
+
+    async def generate_batch(
+        self,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        poll_interval: float = 30.0,
+        **kwargs,
+    ) -> List[Any]:
+        """Generate responses through the OpenAI Batch API."""
+        import openai
+
+        client = openai.AsyncOpenAI(
+            api_key=self.config.get("api_key"),
+            base_url=self.config.get("base_url"),
+            http_client=get_async_client(),
+        )
+        settings = {"temperature": self.llm.temperature, "max_tokens": self.llm.max_tokens}
+        settings = {k: v for k, v in settings.items() if v is not None}
+        lines = []
+        for i, prompt in enumerate(prompts):
+            messages = []
+            if system_prompt:
+                messages.append({"role": "system", "content": system_prompt})
+            messages.append({"role": "user", "content": prompt})
+            lines.append(orjson.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.llm.model_name,
+                    "messages": messages,
+                    **settings,
+                },
+            }))
+
+        try:
+            input_file = await client.files.create(
+                file=("batch.jsonl", b"\n".join(lines)), purpose="batch"
+            )
+            batch = await client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
+            )
+            logger.info(f"Submitted OpenAI batch {batch.id} with {len(prompts)} requests")
+
+            while batch.status not in _BATCH_DONE_STATUSES:
+                await asyncio.sleep(poll_interval)
+                batch = await client.batches.retrieve(batch.id)
+
+            results: List[Any] = [
+                RuntimeError(f"OpenAI batch {batch.id} returned no result ({batch.status})")
+                for _ in prompts
+            ]
+            if batch.output_file_id:
+                output = await client.files.content(batch.output_file_id)
+                for line in output.text.splitlines():
+                    item = orjson.loads(line)
+                    index = int(item["custom_id"])
+                    if item.get("error"):
+                        results[index] = RuntimeError(item["error"].get("message", "batch request failed"))
+                    else:
+                        results[index] = item["response"]["body"]["choices"][0]["message"]["content"]
+            return results
+        except Exception as e:
+            logger.error(f"OpenAI batch generation failed: {e}")
+            raise
+
 
 class AnthropicLLM(BaseLLM):
     """Anthropic Claude LLM wrapper."""
 
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
-        self.llm = ChatAnthropic(
+        self.llm = _chat_model("ChatAnthropic")(
             model=config.get("model", "claude-3-5-sonnet-20241022"),
             temperature=config.get("temperature", 0.7),
             max_tokens=config.get("max_tokens", 4096),
@@ -138,15 +499,27 @@ class AnthropicLLM(BaseLLM):
             callbacks=[self._create_callback()],
         )
 
+    def _system_message(self, system_prompt: str, cacheable: bool = True) -> SystemMessage:
+        """Build the system message, marking it as an ephemeral cache breakpoint."""
+        if not cacheable:
+            return SystemMessage(content=system_prompt)
+        return SystemMessage(
+            content=[{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+        )
+
     async def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
         """Generate response from Anthropic."""
         messages = []
         if system_prompt:
-            messages.append(SystemMessage(content=system_prompt))
+            messages.append(self._system_message(system_prompt, kwargs.get("cacheable_system", True)))
         messages.append(HumanMessage(content=prompt))
 
         try:
-            response = await self.llm.ainvoke(messages, config={"callbacks": [self._create_callback()]})
+            response = await self.llm.ainvoke(
+                messages,
+                config={"callbacks": [self._create_callback()]},
+                **self._request_options(kwargs),
+            )
             return response.content
         except Exception as e:
             logger.error(f"Anthropic generation failed: {e}")
@@ -158,17 +531,122 @@ class AnthropicLLM(BaseLLM):
         """Generate structured response from Anthropic."""
         messages = []
         if system_prompt:
-            messages.append(SystemMessage(content=system_prompt))
+            messages.append(self._system_message(system_prompt, kwargs.get("cacheable_system", True)))
         messages.append(HumanMessage(content=prompt))
 
         try:
-            structured_llm = self.llm.with_structured_output(schema)
-            response = await structured_llm.ainvoke(messages, config={"callbacks": [self._create_callback()]})
+            structured_llm = self._structured_llm(schema)
+            response = await structured_llm.ainvoke(
+                messages,
+                config={"callbacks": [self._create_callback()]},
+                **self._request_options(kwargs),
+            )
             return response
         except Exception as e:
             logger.error(f"Anthropic structured generation failed: {e}")
             raise
 
+    async def generate_structured_batch(
+        self,
+        prompts: List[str],
+        schema: Dict[str, Any],
+        system_prompt: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        **kwargs,
+    ) -> List[Any]:
+        """Generate structured responses from Anthropic for a batch of prompts."""
+        batch = []
+        for prompt in prompts:
+            messages = []
+            if system_prompt:
+                messages.append(self._system_message(system_prompt, kwargs.get("cacheable_system", True)))
+            messages.append(HumanMessage(content=prompt))
+            batch.append(messages)
+
+        try:
+            structured_llm = self._structured_llm(schema)
+            return await structured_llm.abatch(
+                batch,
+                config={"callbacks": [self._create_callback()], "max_concurrency": max_concurrency},
+                return_exceptions=True,
+                **self._request_options(kwargs),
+            )
+        except Exception as e:
+            logger.error(f"Anthropic structured batch generation failed: {e}")
+            raise
+
+    async def generate_structured_stream(
+        self, prompt: str, schema: Dict[str, Any], system_prompt: Optional[str] = None, **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a structured response from Anthropic as partial dicts."""
+        messages = []
+        if system_prompt:
+            messages.append(self._system_message(system_prompt, kwargs.get("cacheable_system", True)))
+        messages.append(HumanMessage(content=prompt))
+
+        try:
+            structured_llm = self._structured_llm(schema, partial=True)
+            async for partial in structured_llm.astream(
+                messages,
+                config={"callbacks": [self._create_callback()]},
+                **self._request_options(kwargs),
+            ):
+                yield partial
+        except Exception as e:
+            logger.error(f"Anthropic structured stream failed: {e}")
+            raise
+
+    async def generate_batch(
+        self,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        poll_interval: float = 30.0,
+        **kwargs,
+    ) -> List[Any]:
+        """Generate responses through the Anthropic Message Batches API."""
+        import anthropic
+
+        client = anthropic.AsyncAnthropic(api_key=self.config.get("api_key"), http_client=get_async_client())
+        params: Dict[str, Any] = {"model": self.llm.model, "max_tokens": self.llm.max_tokens}
+        if self.llm.temperature is not None:
+            params["temperature"] = self.llm.temperature
+        if system_prompt:
+            # The shared system prompt is a cache breakpoint across the batch
+            params["system"] = [
+                {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+            ]
+        requests = [
+            {
+                "custom_id": str(i),
+                "params": {**params, "messages": [{"role": "user", "content": prompt}]},
+            }
+            for i, prompt in enumerate(prompts)
+        ]
+
+        try:
+            batch = await client.messages.batches.create(requests=requests)
+            logger.info(f"Submitted Anthropic batch {batch.id} with {len(prompts)} requests")
+
+            while batch.processing_status != "ended":
+                await asyncio.sleep(poll_interval)
+                batch = await client.messages.batches.retrieve(batch.id)
+
+            results: List[Any] = [
+                RuntimeError(f"Anthropic batch {batch.id} returned no result") for _ in prompts
+            ]
+            async for entry in await client.messages.batches.results(batch.id):
+                index = int(entry.custom_id)
+                if entry.result.type == "succeeded":
+                    results[index] = "".join(
+                        block.text for block in entry.result.message.content if block.type == "text"
+                    )
+                else:
+                    results[index] = RuntimeError(f"Anthropic batch request {entry.result.type}")
+            return results
+        except Exception as e:
+            logger.error(f"Anthropic batch generation failed: {e}")
+            raise
+
 
 class LLMFactory:
     """Factory for creating LLM instances."""
@@ -180,9 +658,12 @@ class LLMFactory:
         """Create or retrieve LLM instance."""
         config = get_config()
         provider = provider or config.default_llm_provider
+        # Unset arguments (e.g. temperature=None) keep the configured defaults
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
 
-        # Check if instance already exists
-        cache_key = f"{provider}_{kwargs.get('model', config.default_model)}"
+        # Check if instance already exists; agents asking for a different
+        # temperature get their own instance
+        cache_key = f"{provider}_{kwargs.get('model', config.default_model)}_{kwargs.get('temperature')}"
         if cache_key in cls._instances:
             return cls._instances[cache_key]
 
@@ -0,0 +1,82 @@
+"""Log cleanup and token-budget trimming for prompt building."""
+
+import re
+from typing import List, Optional
+from aiops.core.tokenizer import truncate_tail
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;?]*[ -/]*[@-~]")
+
+# Leading ISO 8601 timestamps, optionally bracketed, e.g.
+# "2024-01-01T12:00:00.123Z " or "[2024-01-01 12:00:00,123] "
+_TIMESTAMP_RE = re.compile(
+    r"^\[?\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\]?[ \t]*",
+    re.MULTILINE,
+)
+
+# Stack frame lines: Java/JS/.NET ("at ...") and Python ('File "..."')
+_FRAME_RE = re.compile(r'^\s*(?:at\s|File\s")')
+_PYTHON_FRAME_RE = re.compile(r'^\s*File\s"')
+
+
+def _dedupe_frames(lines: List[str]) -> List[str]:
+    """
+    Drop stack frames already seen earlier in the log.
+
+    Each run of dropped frames is replaced by a single line giving the
+    count. The source line that follows a dropped Python frame is dropped
+    with it.
+    """
+    seen = set()
+    kept = []
+    omitted = 0
+    skip_source = False
+
+    for line in lines:
+        if skip_source:
+            skip_source = False
+            if line.startswith("    ") and not _FRAME_RE.match(line):
+                continue
+
+        if _FRAME_RE.match(line):
+            frame = line.strip()
+            if frame in seen:
+                omitted += 1
+                skip_source = bool(_PYTHON_FRAME_RE.match(line))
+                continue
+            seen.add(frame)
+
+        if omitted:
+            kept.append(f"    ... {omitted} repeated frames omitted")
+            omitted = 0
+        kept.append(line)
+
+    if omitted:
+        kept.append(f"    ... {omitted} repeated frames omitted")
+    return kept
+
+
+def trim_logs(
+    text: str,
+    max_tokens: int = 1500,
+    model: Optional[str] = None,
+    strip_noise: bool = True,
+    dedupe_frames: bool = False,
+) -> str:
+    """
+    Clean up logs and keep their most recent max_tokens tokens.
+
+    Args:
+        text: Raw log text
+        max_tokens: Token budget for the returned text
+        model: Model name used to pick the tokenizer
+        strip_noise: Remove ANSI escape codes and leading timestamps
+        dedupe_frames: Collapse stack frames repeated across traces
+
+    Returns:
+        Trimmed log text, prefixed with a marker if the tail was cut
+    """
+    if strip_noise:
+        text = _TIMESTAMP_RE.sub("", _ANSI_RE.sub("", text))
+    if dedupe_frames:
+        text = "\n".join(_dedupe_frames(text.split("\n")))
+    return truncate_tail(text, max_tokens, model)
@@ -0,0 +1,66 @@
+"""Token-aware text truncation for prompt building."""
+
+import functools
+from typing import Any, Optional
+from aiops.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+TRUNCATION_MARKER = "...[truncated]\n"
+
+# Rough characters-per-token ratio used when no tokenizer is available
+_CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=16)
+def _get_encoding(model: Optional[str]) -> Any:
+    """Load the tiktoken encoding for a model, or None if unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+    except KeyError:
+        # Non-OpenAI models: cl100k_base is a close enough approximation
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to load tokenizer for {model}: {e}")
+        return None
+
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use and may be unreachable offline
+        logger.warning(f"Failed to load cl100k_base tokenizer: {e}")
+        return None
+
+
+def truncate_tail(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    Keep the last max_tokens tokens of text.
+
+    The tail is kept because the most recent lines (e.g. of a log) usually
+    carry the error. A marker is prepended when anything was dropped. Falls
+    back to an approximate character budget when no tokenizer is available.
+
+    Args:
+        text: Text to truncate
+        max_tokens: Maximum number of tokens to keep
+        model: Model name used to pick the tokenizer
+
+    Returns:
+        The text, or its tail prefixed with TRUNCATION_MARKER
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        max_chars = max_tokens * _CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        return TRUNCATION_MARKER + text[-max_chars:]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return TRUNCATION_MARKER + encoding.decode(tokens[-max_tokens:])
@@ -337,6 +337,35 @@ class MetricsCollector:
                 model=model,
             ).inc(cost)
 
+    @staticmethod
+    def track_llm_cache_tokens(
+        provider: str,
+        model: str,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
+    ):
+        """Track prompt-cache token usage.
+
+        Args:
+            provider: LLM provider
+            model: Model name
+            cache_read_tokens: Prompt tokens served from the provider cache
+            cache_write_tokens: Prompt tokens written to the provider cache
+        """
+        if cache_read_tokens > 0:
+            llm_tokens_total.labels(
+                provider=provider,
+                model=model,
+                token_type="cache_read",
+            ).inc(cache_read_tokens)
+
+        if cache_write_tokens > 0:
+            llm_tokens_total.labels(
+                provider=provider,
+                model=model,
+                token_type="cache_write",
+            ).inc(cache_write_tokens)
+
     @staticmethod
     def track_error(error_type: str, component: str):
         """Track error occurrence.
@@ -0,0 +1,99 @@
+"""Tests for adaptive admission control."""
+
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from aiops.core.admission import AdmissionController, _retry_after
+from aiops.core.exceptions import LLMRateLimitError
+
+
+class _StatusError(Exception):
+    """Provider SDK error carrying an HTTP status and response headers."""
+
+    def __init__(self, status_code, headers):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_never_exceeds_limit():
+    """Test calls beyond the limit wait for a free slot."""
+    controller = AdmissionController(max_concurrency=3)
+    active = peak = 0
+
+    async def call():
+        nonlocal active, peak
+        async with controller.slot():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(call() for _ in range(12)))
+
+    assert peak == 3
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limit_halves_on_overload_and_grows_on_fast_success():
+    """Test AIMD: one halving per overload, +0.5 per fast response."""
+    controller = AdmissionController(max_concurrency=8, target_latency=1.0)
+
+    with pytest.raises(_StatusError):
+        async with controller.slot():
+            raise _StatusError(503, {})
+    assert controller.limit == 4
+
+    with pytest.raises(ValueError):
+        async with controller.slot():
+            raise ValueError("unparseable response")
+    assert controller.limit == 4
+
+    for _ in range(2):
+        async with controller.slot():
+            pass
+    assert controller.limit == 5
+
+
+@pytest.mark.asyncio
+async def test_slow_responses_started_together_decrease_once():
+    """Test concurrent slow calls count as a single overload."""
+    controller = AdmissionController(max_concurrency=16, target_latency=0.01)
+
+    async def slow_call():
+        async with controller.slot():
+            await asyncio.sleep(0.03)
+
+    await asyncio.gather(*(slow_call() for _ in range(4)))
+
+    assert controller.limit == 8
+
+
+@pytest.mark.asyncio
+async def test_retry_after_delays_next_call():
+    """Test a rate-limited call blocks admission until retry-after passes."""
+    controller = AdmissionController(max_concurrency=4)
+
+    with pytest.raises(_StatusError):
+        async with controller.slot():
+            raise _StatusError(429, {"retry-after": "0.05"})
+
+    started = time.monotonic()
+    async with controller.slot():
+        pass
+
+    assert time.monotonic() - started >= 0.04
+
+
+def test_retry_after_sources():
+    """Test retry delays are read from errors and rate limit headers."""
+    assert _retry_after(LLMRateLimitError(provider="openai", retry_after=7)) == 7
+    assert _retry_after(_StatusError(429, {
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "1m30s",
+    })) == 90
+    assert _retry_after(_StatusError(429, {"x-ratelimit-remaining-requests": "12"})) is None
+    assert _retry_after(ValueError("bad")) is None
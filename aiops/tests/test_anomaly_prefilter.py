@@ -0,0 +1,87 @@
+"""Tests for the anomaly detector's local statistical pre-filter."""
+
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock
+
+from aiops.agents.anomaly_detector import (
+    AnomalyDetectorAgent,
+    AnomalyDetectionResult,
+    _numeric_outliers,
+    _sample_indices,
+)
+
+
+@pytest.fixture
+def anomaly_agent(test_config):
+    """Create anomaly detector agent."""
+    return AnomalyDetectorAgent(model="gpt-4-turbo-preview", temperature=0.0)
+
+
+def test_numeric_outliers_flags_spike():
+    """A single spike is flagged and nothing else."""
+    values = np.array([100, 105, 102, 450, 108, 103], dtype=np.float64)
+
+    outliers, scores = _numeric_outliers(values)
+
+    assert outliers.tolist() == [3]
+    assert scores[3] > 3.5
+
+
+def test_numeric_outliers_constant_series():
+    """A flat series has no outliers."""
+    outliers, _ = _numeric_outliers(np.full(10, 7.0))
+
+    assert len(outliers) == 0
+
+
+def test_numeric_outliers_zero_mad():
+    """A spike is still found when most points are identical."""
+    outliers, _ = _numeric_outliers(np.array([1, 1, 1, 1, 1, 100], dtype=np.float64))
+
+    assert outliers.tolist() == [5]
+
+
+@pytest.mark.asyncio
+async def test_time_series_without_outliers_skips_llm(anomaly_agent):
+    """No LLM call is made when the series has no outliers."""
+    anomaly_agent._generate_structured_response = AsyncMock()
+    data = [{"timestamp": i, "value": 100 + i % 3} for i in range(50)]
+
+    result = await anomaly_agent.detect_time_series_anomalies(data, "latency_ms")
+
+    assert result.total_anomalies == 0
+    anomaly_agent._generate_structured_response.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_time_series_sends_only_outliers(anomaly_agent):
+    """Only flagged points and their scores are sent to the LLM."""
+    mock_result = AnomalyDetectionResult(
+        total_anomalies=1,
+        critical_count=0,
+        anomalies=[],
+        summary="Spike",
+        recommendations=[],
+        potential_impacts=[],
+    )
+    anomaly_agent._generate_structured_response = AsyncMock(return_value=mock_result)
+    data = [{"timestamp": i, "value": 450 if i == 3 else 100} for i in range(20)]
+
+    result = await anomaly_agent.detect_time_series_anomalies(data, "latency_ms")
+
+    assert result is mock_result
+    prompt = anomaly_agent._generate_structured_response.call_args.kwargs["prompt"]
+    assert "'value': 450" in prompt
+    assert "'timestamp': 0" not in prompt
+
+
+def test_sample_indices_keeps_recent_points():
+    """Long series are sampled but always include the most recent window."""
+    indices = _sample_indices(1000)
+
+    assert len(indices) == 100
+    assert indices == sorted(indices)
+    assert indices[-20:] == list(range(980, 1000))
+    assert _sample_indices(1000) == indices
+    assert _sample_indices(50) == list(range(50))
@@ -0,0 +1,36 @@
+"""Tests for API Performance Analyzer."""
+
+import pytest
+from aiops.agents.api_performance_analyzer import APIPerformanceAnalyzer
+
+
+ENDPOINTS = [
+    {
+        "method": "GET",
+        "path": "/api/users",
+        "avg_latency_ms": 1200.0,
+        "p95_latency_ms": 2500.0,
+        "p99_latency_ms": 4000.0,
+        "requests_per_minute": 600.0,
+        "error_rate": 0.5,
+        "avg_response_size_kb": 40.0,
+    }
+]
+
+
+@pytest.mark.asyncio
+async def test_analyze_api_cache_hit_returns_fresh_result():
+    """Test a cache hit returns an equal but separate result with a new timestamp."""
+    analyzer = APIPerformanceAnalyzer()
+
+    first = await analyzer.analyze_api(ENDPOINTS)
+    first.optimizations.clear()
+    first.analyzed_at = "2000-01-01T00:00:00"
+    second = await analyzer.analyze_api(ENDPOINTS)
+
+    assert second is not first
+    assert second.optimizations
+    assert second.analyzed_at != first.analyzed_at
+    assert second.model_dump(exclude={"analyzed_at"}) == (
+        await APIPerformanceAnalyzer(cache_ttl=0).analyze_api(ENDPOINTS)
+    ).model_dump(exclude={"analyzed_at"})
@@ -0,0 +1,112 @@
+"""Tests for Auto Fixer Agent."""
+
+import pytest
+from unittest.mock import AsyncMock
+from aiops.agents.auto_fixer import AutoFixerAgent, _AUTO_FIX_USER_PROMPT_HEADER
+
+
+@pytest.fixture
+def auto_fixer(test_config):
+    """Create an auto fixer agent."""
+    return AutoFixerAgent(model="gpt-4-turbo-preview")
+
+
+def test_user_prompt_prefix_is_stable(auto_fixer):
+    """Test static instructions precede the per-call payload."""
+    first = auto_fixer._create_user_prompt("Service down", logs="ERROR a")
+    second = auto_fixer._create_user_prompt(
+        "Disk full on node-3", system_state={"disk": "100%"}
+    )
+
+    prefix = len(_AUTO_FIX_USER_PROMPT_HEADER)
+    assert first[:prefix] == second[:prefix] == _AUTO_FIX_USER_PROMPT_HEADER
+    assert "Disk full on node-3" in second
+    assert '"disk": "100%"' in second
+    assert "ERROR a" in first
+
+
+@pytest.mark.asyncio
+async def test_fix_common_issues_known_pattern(auto_fixer):
+    """Test known issues skip the LLM and fill in the service name."""
+    fix = await auto_fixer.fix_common_issues("high_cpu", context={"service": "api"})
+    generic = await auto_fixer.fix_common_issues("high_cpu")
+
+    assert fix.commands[0] == "kubectl scale deployment/api --replicas=5"
+    assert generic.commands[0] == "kubectl scale deployment/{service} --replicas=5"
+    assert fix.risk_level == "low"
+
+    generic.commands.append("mutated")
+    assert len((await auto_fixer.fix_common_issues("high_cpu")).commands) == 2
+
+
+def _fix(name):
+    return {
+        "fix_type": "infrastructure",
+        "description": name,
+        "confidence": 80,
+        "risk_level": "low",
+        "commands": [],
+        "validation": [],
+        "rollback_plan": "none",
+    }
+
+
+@pytest.mark.asyncio
+async def test_execute_stream_yields_fixes_as_they_close(auto_fixer):
+    """Test the recommended fix is yielded before alternatives finish streaming."""
+    partials = [
+        {"issue_summary": "s", "recommended_fix": {"fix_type": "infra"}},
+        {"issue_summary": "s", "recommended_fix": _fix("primary"), "alternative_fixes": [{}]},
+        {"issue_summary": "s", "recommended_fix": _fix("primary"), "alternative_fixes": [_fix("alt1"), {}]},
+        {"issue_summary": "s", "recommended_fix": _fix("primary"),
+         "alternative_fixes": [_fix("alt1"), _fix("alt2")], "requires_approval": True},
+    ]
+    seen = []
+
+    async def stream(*args, **kwargs):
+        for partial in partials:
+            seen.append(partial)
+            yield partial
+
+    auto_fixer.llm.generate_structured_stream = stream
+
+    fixes = []
+    async for fix in auto_fixer.execute_stream("Service down"):
+        fixes.append((fix.description, len(seen)))
+
+    assert fixes == [("primary", 2), ("alt1", 3), ("alt2", 4)]
+
+
+@pytest.mark.asyncio
+async def test_rollback_plan_known_shape_skips_llm(auto_fixer):
+    """Test simple deployments get a templated rollback plan."""
+    auto_fixer.llm.generate = AsyncMock(return_value="llm plan")
+
+    plan = await auto_fixer.generate_rollback_plan(
+        {"service": "api", "version": "v1.2", "namespace": "prod"}, "5xx spike"
+    )
+    custom = await auto_fixer.generate_rollback_plan({"service": "api", "db": "pg"}, "5xx spike")
+
+    assert "kubectl rollout undo deployment/api -n prod" in plan["rollback_steps"]
+    assert "5xx spike" in plan["rollback_steps"]
+    assert custom["rollback_steps"] == "llm plan"
+    auto_fixer.llm.generate.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_generated_common_fix_is_cached_at_low_temperature(test_config):
+    """Test generated fixes are reused only when the agent does not sample."""
+    AutoFixerAgent._generate_common_fix.clear_cache()
+    deterministic = AutoFixerAgent(model="gpt-4-turbo-preview", temperature=0)
+    sampling = AutoFixerAgent(model="gpt-4-turbo-preview")
+
+    for agent in (deterministic, sampling):
+        agent.llm.generate_structured = AsyncMock(return_value=_fix("restart worker"))
+        first = await agent.fix_common_issues("stuck_worker")
+        second = await agent.fix_common_issues("stuck_worker")
+        assert first == second
+        assert first.description == "restart worker"
+
+    assert deterministic.llm is not sampling.llm
+    assert deterministic.llm.generate_structured.await_count == 1
+    assert sampling.llm.generate_structured.await_count == 2
@@ -0,0 +1,192 @@
+"""Tests for BaseAgent helpers."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from pydantic import BaseModel
+
+from aiops.agents.base_agent import BaseAgent, _response_cache
+
+
+class EchoAgent(BaseAgent):
+    """Minimal concrete agent for exercising BaseAgent helpers."""
+
+    def __init__(self, **kwargs):
+        super().__init__(name="EchoAgent", model="gpt-4-turbo-preview", temperature=0.0, **kwargs)
+
+    async def execute(self, value):
+        return value
+
+
+@pytest.fixture
+def echo_agent(test_config):
+    """Create echo agent."""
+    return EchoAgent(max_concurrency=2)
+
+
+@pytest.mark.asyncio
+async def test_fan_out_preserves_order_and_exceptions(echo_agent):
+    """Results come back in input order with failures returned in place."""
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    results = await echo_agent._fan_out([echo_agent.execute(1), fail(), echo_agent.execute(3)])
+
+    assert results[0] == 1
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == 3
+
+
+@pytest.mark.asyncio
+async def test_fan_out_respects_max_concurrency(echo_agent):
+    """No more than max_concurrency coroutines run at once."""
+    running = 0
+    peak = 0
+
+    async def work():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await echo_agent._fan_out(work() for _ in range(6))
+
+    assert peak == 2
+
+
+class Item(BaseModel):
+    """Schema used by structured-response tests."""
+
+    name: str
+    count: int
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("raw", ['{"name": "a", "count": 1}', b'{"name": "a", "count": 1}', {"name": "a", "count": 1}])
+async def test_structured_response_is_parsed_into_schema(echo_agent, raw):
+    """JSON text and dicts from the provider are validated into the schema."""
+    echo_agent.llm.generate_structured = AsyncMock(return_value=raw)
+
+    result = await echo_agent._generate_structured_response("prompt", Item)
+
+    assert result == Item(name="a", count=1)
+
+
+@pytest.mark.asyncio
+async def test_structured_response_json_for_dict_schema(echo_agent):
+    """JSON text is decoded when the schema is a plain JSON schema."""
+    echo_agent.llm.generate_structured = AsyncMock(return_value='{"ok": true}')
+
+    result = await echo_agent._generate_structured_response("prompt", {"type": "object"})
+
+    assert result == {"ok": True}
+
+
+@pytest.mark.asyncio
+async def test_identical_in_flight_requests_are_coalesced(echo_agent):
+    """Test concurrent identical structured requests share one LLM call."""
+    release = asyncio.Event()
+
+    async def generate(prompt, schema, system_prompt=None, **kwargs):
+        await release.wait()
+        return {"name": prompt, "count": 1}
+
+    echo_agent.llm.generate_structured = AsyncMock(side_effect=generate)
+
+    calls = [
+        asyncio.ensure_future(echo_agent._generate_structured_response("a", Item))
+        for _ in range(3)
+    ]
+    other = asyncio.ensure_future(echo_agent._generate_structured_response("b", Item))
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*calls, other)
+
+    assert echo_agent.llm.generate_structured.await_count == 2
+    assert [r.name for r in results] == ["a", "a", "a", "b"]
+    assert results[0] is not results[1]
+    assert echo_agent._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_cached_structured_response_reuses_result(echo_agent):
+    """An identical request is answered from cache without calling the LLM."""
+    _response_cache.clear()
+    echo_agent.llm.generate_structured = AsyncMock(return_value={"name": "a", "count": 1})
+
+    first = await echo_agent._cached_structured_response("prompt", Item, "system")
+    second = await echo_agent._cached_structured_response("prompt", Item, "system")
+
+    assert first == second == Item(name="a", count=1)
+    assert second is not first
+    echo_agent.llm.generate_structured.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_cached_structured_response_skipped_at_high_temperature(echo_agent, monkeypatch):
+    """Sampled responses are not cached."""
+    _response_cache.clear()
+    monkeypatch.setattr(echo_agent.llm.llm, "temperature", 0.9)
+    echo_agent.llm.generate_structured = AsyncMock(return_value={"name": "a", "count": 1})
+
+    await echo_agent._cached_structured_response("prompt", Item, "system")
+    await echo_agent._cached_structured_response("prompt", Item, "system")
+
+    assert echo_agent.llm.generate_structured.await_count == 2
+    assert len(_response_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_structured_response_skipped_at_default_temperature(test_config):
+    """An agent built without a temperature samples at the configured default."""
+
+    class DefaultTemperatureAgent(EchoAgent):
+        def __init__(self):
+            BaseAgent.__init__(self, name="DefaultTemperatureAgent")
+
+    _response_cache.clear()
+    agent = DefaultTemperatureAgent()
+    agent.llm.generate_structured = AsyncMock(return_value={"name": "a", "count": 1})
+
+    await agent._cached_structured_response("prompt", Item, "system")
+    await agent._cached_structured_response("prompt", Item, "system")
+
+    assert agent.llm.temperature == test_config.default_temperature
+    assert agent.llm.generate_structured.await_count == 2
+    assert len(_response_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_structured_response_invalidated_by_cache_version(echo_agent, monkeypatch):
+    """Bumping cache_version makes earlier cached responses unreachable."""
+    _response_cache.clear()
+    echo_agent.llm.generate_structured = AsyncMock(return_value={"name": "a", "count": 1})
+
+    await echo_agent._cached_structured_response("prompt", Item, "system")
+    monkeypatch.setattr(echo_agent, "cache_version", "2")
+    await echo_agent._cached_structured_response("prompt", Item, "system")
+    await echo_agent._cached_structured_response("prompt", Item, "system", ttl=0)
+
+    assert echo_agent.llm.generate_structured.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_list_items_yields_closed_elements(echo_agent):
+    """Every complete element is validated and yielded, skipping malformed ones."""
+    seen = []
+
+    async def stream():
+        for partial in (
+            {"items": [{"name": "a"}]},
+            {"items": [{"name": "a", "count": 1}, {"name": "b"}]},
+            {"items": [{"name": "a", "count": 1}, {"name": "b"}, {"name": "c", "count": 3}], "total": 2},
+        ):
+            seen.append(partial)
+            yield partial
+
+    items = [item async for item in echo_agent._stream_list_items(stream(), "items", Item, {"total"})]
+
+    assert items == [Item(name="a", count=1), Item(name="c", count=3)]
+    assert len(seen) == 3
@@ -0,0 +1,105 @@
+"""Tests for CI/CD Optimizer Agent."""
+
+import pytest
+from aiops.agents.cicd_optimizer import CICDOptimizerAgent
+
+
+@pytest.fixture
+def cicd_optimizer(test_config):
+    """Create a CI/CD optimizer agent."""
+    return CICDOptimizerAgent(model="gpt-4-turbo-preview", temperature=0.0)
+
+
+def _issue(stage):
+    return {
+        "stage": stage,
+        "issue_type": "performance",
+        "severity": "medium",
+        "description": f"{stage} is slow",
+        "impact": "Longer pipeline",
+        "solution": "Cache dependencies",
+    }
+
+
+@pytest.mark.asyncio
+async def test_execute_stream_yields_issues_as_they_close(cicd_optimizer):
+    """Test each issue is yielded once the model moves past it."""
+    partials = [
+        {"issues": [{"stage": "build"}]},
+        {"issues": [_issue("build"), {"stage": "te"}]},
+        {"issues": [_issue("build"), _issue("test")], "optimizations": []},
+        {"issues": [_issue("build"), _issue("test")], "optimizations": ["Parallelize tests"]},
+    ]
+    seen = []
+
+    async def stream(*args, **kwargs):
+        for partial in partials:
+            seen.append(partial)
+            yield partial
+
+    cicd_optimizer.llm.generate_structured_stream = stream
+
+    issues = []
+    async for issue in cicd_optimizer.execute_stream("stages: [build, test]"):
+        issues.append((issue.stage, len(seen)))
+
+    assert issues == [("build", 2), ("test", 3)]
+
+
+@pytest.mark.asyncio
+async def test_execute_batch_packs_pipelines_into_one_request(cicd_optimizer):
+    """Test pipelines in a group share one request and keep their order."""
+    prompts = []
+
+    async def generate_structured(prompt, schema, *args, **kwargs):
+        prompts.append(prompt)
+        count = prompt.count("### Request ")
+        return schema(results=[
+            {
+                "issues": [_issue(f"stage{i}")],
+                "optimizations": [],
+                "parallel_opportunities": [],
+                "caching_opportunities": [],
+                "resource_recommendations": {},
+            }
+            for i in range(count)
+        ])
+
+    cicd_optimizer.llm.generate_structured = generate_structured
+
+    results = await cicd_optimizer.execute_batch(["a: 1", "b: 2", "c: 3"], batch_size=2)
+
+    assert len(prompts) == 2
+    assert [r.issues[0].stage for r in results] == ["stage0", "stage1", "stage0"]
+
+
+@pytest.mark.asyncio
+async def test_execute_batch_falls_back_on_result_count_mismatch(cicd_optimizer):
+    """Test a group whose result count is wrong gets fallback results."""
+
+    async def generate_structured(prompt, schema, *args, **kwargs):
+        return schema(results=[])
+
+    cicd_optimizer.llm.generate_structured = generate_structured
+
+    results = await cicd_optimizer.execute_batch(["a: 1", "b: 2"])
+
+    assert len(results) == 2
+    assert all(r.optimizations[0].startswith("Analysis failed") for r in results)
+
+
+@pytest.mark.asyncio
+async def test_analyze_build_failure_classifies_known_failures_locally(cicd_optimizer):
+    """Test known failure signatures are answered without the LLM."""
+
+    async def generate_structured(*args, **kwargs):
+        raise AssertionError("LLM should not be called")
+
+    cicd_optimizer.llm.generate_structured = generate_structured
+
+    result = await cicd_optimizer.analyze_build_failure(
+        "$ docker pull registry/app:1.2\nError response from daemon: manifest unknown\n"
+    )
+
+    assert result.failure_category == "deployment"
+    assert result.failed_step == "docker pull registry/app:1.2"
@@ -0,0 +1,34 @@
+"""Tests for Cloud Cost Optimizer."""
+
+import pytest
+from aiops.agents.cost_optimizer import CloudCostOptimizer
+
+
+@pytest.mark.asyncio
+async def test_analyze_costs_counts_opportunities():
+    """Test each check fires and the priority counts and summary agree with the opportunities."""
+    resources = [
+        {"id": "i-idle", "type": "EC2", "monthly_cost": 100.0, "uptime_percentage": 90},
+        {"id": "i-small", "type": "EC2", "monthly_cost": 50.0},
+        {"id": "db", "type": "RDS", "monthly_cost": 80.0, "pricing": "reserved"},
+        {"id": "snap", "type": "Snapshot", "monthly_cost": 5.0, "age_days": 200},
+        {"id": "vol", "type": "EBS", "monthly_cost": 10.0, "attached": False},
+    ]
+    metrics = {
+        "i-idle": {"cpu_avg": 0.5, "network_avg": 0.2},
+        "i-small": {"cpu_avg": 20.0},
+        "db": {"cpu_avg": 50.0, "memory_avg": 10.0},
+    }
+
+    result = await CloudCostOptimizer().analyze_costs(resources, metrics)
+
+    assert [s.resource_id for s in result.savings_opportunities] == [
+        "i-idle", "i-idle", "i-small", "db", "snap", "vol"
+    ]
+    assert result.wasteful_resources == ["i-idle", "snap", "vol"]
+    assert result.recommendations_by_priority == {"critical": 0, "high": 3, "medium": 3, "low": 0}
+    assert result.current_monthly_cost == 245.0
+    assert result.potential_monthly_savings == 220.0
+    assert "Optimization Opportunities: 6" in result.summary
+    assert "3 high-priority items" in result.summary
+    assert "4 quick wins" in result.summary
@@ -0,0 +1,95 @@
+"""Tests for deterministic code metrics."""
+
+import time
+import pytest
+from aiops.tools.code_metrics import find_duplicate_blocks, python_complexity
+
+
+CODE = '''
+def simple(x):
+    return x + 1
+
+
+def branchy(items, flag):
+    total = 0
+    for item in items:
+        if item > 0 and flag:
+            total += item
+        elif item < 0:
+            total -= item
+    return total
+'''
+
+
+def test_python_complexity_per_function():
+    """Test cyclomatic complexity and nesting are measured per function."""
+    metrics = python_complexity(CODE)
+
+    by_name = {f["name"]: f for f in metrics["functions"]}
+    assert by_name["simple"]["cyclomatic_complexity"] == 1
+    assert by_name["branchy"]["cyclomatic_complexity"] == 5
+    assert by_name["branchy"]["max_nesting"] == 3
+    assert metrics["cyclomatic_complexity"] == 6
+    assert metrics["lines_of_code"] == 10
+    assert 0 < metrics["maintainability_index"] <= 100
+
+
+def test_python_complexity_rejects_invalid_code():
+    """Test unparseable code raises SyntaxError."""
+    with pytest.raises(SyntaxError):
+        python_complexity("def broken(:")
+
+
+def test_find_duplicate_blocks_matches_renamed_copies():
+    """Test copies with renamed identifiers are reported once with both locations."""
+    block = """
+def load_{name}(path):
+    with open(path) as f:
+        data = f.read()
+    rows = data.splitlines()
+    rows = [r.strip() for r in rows]
+    return [r for r in rows if r]
+"""
+    code = block.format(name="users") + "\nprint('x')\n" + block.format(name="orders")
+
+    duplicates = find_duplicate_blocks(code, min_lines=6)
+
+    assert duplicates == [{"lines": 6, "locations": [(2, 7), (11, 16)]}]
+    assert find_duplicate_blocks(block.format(name="users"), min_lines=6) == []
+
+
+def test_find_duplicate_blocks_merges_repeated_copies():
+    """Test back-to-back copies give one entry listing each copy, not one per shifted window."""
+    block = """def load_{name}(path):
+    with open(path) as f:
+        data = f.read()
+    rows = data.splitlines()
+    rows = [r.strip() for r in rows]
+    rows = [r for r in rows if r]
+    return rows
+"""
+    code = "".join(block.format(name=name) for name in ("users", "orders", "items"))
+    assignments = "\n".join(f"x{i} = {i}" for i in range(20))
+
+    assert find_duplicate_blocks(code, min_lines=6) == [
+        {"lines": 7, "locations": [(1, 7), (8, 14), (15, 21)]},
+    ]
+    assert find_duplicate_blocks(assignments, min_lines=6) == []
+
+
+def test_find_duplicate_blocks_is_fast_on_large_repetitive_input():
+    """Test generated data and many copies of a block are handled in well under a second each."""
+    table = "data = {\n" + "".join(f'    "key_{i}": {i},\n' for i in range(6000)) + "}\n"
+    assignments = "\n".join(f"x = {i}" for i in range(3000))
+    block = "def f_{i}(a):\n    b = a + 1\n    c = b * 2\n    d = c - 3\n    e = d / 4\n    return e\n"
+    copies = "".join(block.format(i=i) for i in range(2000))
+
+    started = time.perf_counter()
+    assert find_duplicate_blocks(table) == []
+    assert find_duplicate_blocks(assignments) == []
+    [duplicate] = find_duplicate_blocks(copies)
+    elapsed = time.perf_counter() - started
+
+    assert duplicate["lines"] == 6
+    assert len(duplicate["locations"]) == 2000
+    assert elapsed < 2.0
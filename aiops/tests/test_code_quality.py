@@ -0,0 +1,82 @@
+"""Tests for Code Quality Agent."""
+
+import pytest
+from aiops.agents.code_quality import (
+    CodeQualityAgent,
+    CodeSmellAnalysis,
+    QualityMetricsAnalysis,
+    TechnicalDebtAnalysis,
+)
+from aiops.agents.base_agent import _response_cache
+
+
+@pytest.fixture
+def code_quality_agent(test_config):
+    """Create a code quality agent."""
+    _response_cache.clear()
+    return CodeQualityAgent(model="gpt-4-turbo-preview", temperature=0.0)
+
+
+def _smell(location):
+    return {
+        "type": "long_method",
+        "severity": "medium",
+        "location": location,
+        "description": "Too long",
+        "refactoring_suggestion": "Split it",
+        "impact": "Harder to read",
+    }
+
+
+@pytest.mark.asyncio
+async def test_execute_merges_concurrent_analyses(code_quality_agent):
+    """Test metrics, smells per chunk and debt are analyzed separately and merged."""
+    code = "".join(f"def f{i}():\n    return {'x' * 60!r}\n\n\n" for i in range(300))
+    prompts = []
+
+    async def generate_structured(prompt, schema, system_prompt=None, **kwargs):
+        prompts.append((schema, prompt))
+        if schema is QualityMetricsAnalysis:
+            return {"overall_quality_score": 80, "grade": "B", "summary": "ok",
+                    "metrics": [], "maintainability_index": 70}
+        if schema is TechnicalDebtAnalysis:
+            return {"technical_debt": {"hours": 2}, "best_practices": {}, "recommendations": ["Add docs"]}
+        return {"code_smells": [_smell(f"chunk {len(prompts)}")]}
+
+    code_quality_agent.llm.generate_structured = generate_structured
+
+    result = await code_quality_agent.execute(code)
+
+    smell_prompts = [p for schema, p in prompts if schema is CodeSmellAnalysis]
+    assert len(smell_prompts) > 1
+    assert "starts at line" in smell_prompts[1]
+    assert result.grade == "B"
+    assert result.recommendations == ["Add docs"]
+    assert len(result.code_smells) == len(smell_prompts)
+
+
+def test_system_prompt_is_shared_across_spellings(code_quality_agent):
+    """Test language spelling variants reuse one cached prompt object."""
+    first = code_quality_agent._create_system_prompt("Python", "API", "smells")
+    second = code_quality_agent._create_system_prompt(" python", "api", "smells")
+
+    assert first is second
+    assert first.endswith("**Language**: python\n**Project Type**: api\nApply domain-specific quality standards.\n")
+
+
+@pytest.mark.asyncio
+async def test_smell_lists_are_capped_and_budgeted(code_quality_agent):
+    """Test responses are token-limited and overlong smell lists are cut to the cap."""
+    budgets = []
+
+    async def generate_structured(prompt, schema, system_prompt=None, **kwargs):
+        budgets.append(kwargs.get("max_tokens"))
+        return {"code_smells": [_smell(f"line {i}") for i in range(40)]}
+
+    code_quality_agent.llm.generate_structured = generate_structured
+
+    analysis = await code_quality_agent._analyze("x = 1\n", "smells", "python", None, CodeSmellAnalysis)
+
+    assert len(analysis.code_smells) == 15
+    assert analysis.code_smells[0].location == "line 0"
+    assert budgets == [1500]
@@ -3,6 +3,7 @@
 import pytest
 from unittest.mock import AsyncMock, patch
 from aiops.agents.code_reviewer import CodeReviewAgent, CodeReviewResult, CodeIssue
+from aiops.tools.code_metrics import split_top_level
 
 
 @pytest.fixture
@@ -150,3 +151,91 @@ def test_create_user_prompt(mock_code_review_agent, sample_code):
     assert "review" in prompt.lower()
     assert sample_code in prompt
     assert "utility function" in prompt
+
+
+@pytest.mark.asyncio
+async def test_review_many_submits_one_batch(test_config):
+    """Test batch review submits all prompts at once and falls back per item."""
+    agent = CodeReviewAgent(model="gpt-4-turbo-preview", temperature=0.0)
+    mock_result = CodeReviewResult(
+        overall_score=90.0,
+        summary="Looks good",
+        issues=[],
+        strengths=["Simple"],
+        recommendations=[],
+    )
+
+    with patch.object(
+        agent,
+        "_generate_structured_batch",
+        new=AsyncMock(return_value=[mock_result, Exception("API Error")]),
+    ) as batch:
+        results = await agent.review_many(["x = 1", "y = 2"])
+
+        assert batch.await_count == 1
+        assert len(batch.call_args.kwargs["prompts"]) == 2
+        assert results[0].overall_score == 90.0
+        assert results[1].overall_score == 0
+
+
+@pytest.mark.asyncio
+async def test_review_diff_stream_yields_issues_as_they_close(test_config):
+    """Test each issue is yielded once the model moves past it."""
+    agent = CodeReviewAgent(model="gpt-4-turbo-preview", temperature=0.0)
+    issue = {"severity": "high", "category": "bug", "description": "Wrong value", "suggestion": "Fix it"}
+    partials = [
+        {"overall_score": 50, "issues": [{"severity": "hi"}]},
+        {"overall_score": 50, "issues": [issue, {"severity": "low"}]},
+        {"overall_score": 50, "issues": [issue, {**issue, "severity": "low"}], "strengths": []},
+    ]
+    seen = []
+
+    async def stream(*args, **kwargs):
+        for partial in partials:
+            seen.append(partial)
+            yield partial
+
+    agent.llm.generate_structured_stream = stream
+
+    issues = [(i.severity, len(seen)) async for i in agent.review_diff_stream("-a\n+b")]
+
+    assert issues == [("high", 2), ("low", 3)]
+
+
+@pytest.mark.asyncio
+async def test_large_python_code_is_reviewed_in_chunks(test_config):
+    """Test chunk reviews are merged with file line numbers and weighted scores."""
+    agent = CodeReviewAgent(model="gpt-4-turbo-preview", temperature=0.0)
+    code = "".join(f"def f{i}():\n    return {'x' * 60!r}\n\n\n" for i in range(200))
+
+    async def review(prompt, schema, system_prompt=None, **kwargs):
+        return CodeReviewResult(
+            overall_score=80.0,
+            summary="Chunk reviewed.",
+            issues=[CodeIssue(severity="low", category="style", line_number=1,
+                              description="No docstring", suggestion="Add one")],
+            strengths=["Consistent naming"],
+            recommendations=["Add docstrings"],
+        )
+
+    with patch.object(agent, "_generate_structured_response", new=AsyncMock(side_effect=review)) as call:
+        result = await agent.execute(code)
+
+    chunk_starts = [first_line for first_line, _ in split_top_level(code, 8000)]
+    assert call.await_count == len(chunk_starts) > 1
+    assert [i.line_number for i in result.issues] == chunk_starts
+    assert result.overall_score == 80.0
+    assert result.strengths == ["Consistent naming"]
+
+
+@pytest.mark.asyncio
+async def test_blank_code_is_not_sent_for_review(test_config):
+    """Test reviewing whitespace-only code returns without an LLM call."""
+    agent = CodeReviewAgent(model="gpt-4-turbo-preview", temperature=0.0)
+
+    with patch.object(agent, "_generate_structured_response", new=AsyncMock()) as call:
+        result = await agent.execute("  \n\t\n")
+
+    call.assert_not_awaited()
+    assert result.overall_score == 100
+    assert result.summary == "No code provided"
@@ -0,0 +1,219 @@
+"""Tests for Compliance Checker Agent."""
+
+import asyncio
+import orjson
+from datetime import datetime
+import pytest
+from pathlib import Path
+from urllib.parse import urlparse
+from unittest.mock import AsyncMock, patch
+from aiops.agents.base_agent import _response_cache
+from aiops.agents.compliance_checker import ComplianceCheckerAgent
+
+
+@pytest.fixture
+def compliance_checker(test_config, tmp_path):
+    """Create a compliance checker agent."""
+    return ComplianceCheckerAgent(model="gpt-4-turbo-preview", audit_dir=str(tmp_path))
+
+
+def _violation(severity):
+    return {
+        "rule_id": "SOC2-CC6.1",
+        "standard": "SOC2",
+        "severity": severity,
+        "category": "encryption",
+        "resource": "s3://logs",
+        "description": "Bucket is not encrypted",
+        "current_state": "unencrypted",
+        "required_state": "SSE-KMS",
+        "remediation": "Enable default encryption",
+        "automation_available": True,
+        "compliance_control": "CC6.1",
+    }
+
+
+@pytest.mark.asyncio
+async def test_check_many_builds_reports_and_keeps_failures_in_place(compliance_checker):
+    """Test batched checks share one submission and report failures per check."""
+    responses = [
+        {
+            "overall_score": 70,
+            "violations": [_violation("critical"), _violation("low")],
+            "scores_by_standard": [{
+                "standard": "SOC2", "score": 70, "total_controls": 10,
+                "passing_controls": 7, "failing_controls": 3, "exempted_controls": 0,
+            }],
+            "executive_summary": "Mostly compliant",
+        },
+        {"overall_score": 50, "violations": [{"rule_id": "incomplete"}], "executive_summary": ""},
+    ]
+
+    with patch.object(
+        compliance_checker, "_generate_structured_batch", new=AsyncMock(return_value=responses)
+    ) as batch:
+        reports = await compliance_checker.check_many([
+            {"environment": "prod", "standards": ["SOC2"]},
+            {"environment": "staging", "standards": ["SOC2"]},
+        ])
+
+    assert batch.await_count == 1
+    assert reports[0].critical_violations == 1
+    assert reports[0].scores_by_standard[0].passing_controls == 7
+    generated_at = datetime.fromisoformat(reports[0].generated_at)
+    assert reports[0].report_id == f"COMP-prod-{generated_at.strftime('%Y%m%d-%H%M%S')}"
+    assert isinstance(reports[1], Exception)
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_checks_share_one_llm_call(compliance_checker):
+    """Test duplicate checks coalesce in flight and repeats hit the cache."""
+    _response_cache.clear()
+    calls = 0
+
+    async def generate_structured(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"overall_score": 90, "violations": [], "executive_summary": "Compliant"}
+
+    compliance_checker.llm.generate_structured = generate_structured
+    check = {"environment": "prod", "standards": ["SOC2"], "logging_config": {"audit": True}}
+
+    reports = await asyncio.gather(*(compliance_checker.execute(**check) for _ in range(5)))
+    await compliance_checker.execute(**check)
+
+    assert calls == 1
+    assert all(r.overall_score == 90 for r in reports)
+
+
+@pytest.mark.asyncio
+async def test_remediation_plan_groups_violations_by_severity(compliance_checker):
+    """Test the remediation prompt counts and lists violations per severity."""
+    with patch.object(
+        compliance_checker, "_generate_structured_batch",
+        new=AsyncMock(return_value=[{
+            "overall_score": 40,
+            "violations": [_violation("high"), _violation("critical"), _violation("high"), _violation("low")],
+        }]),
+    ):
+        [report] = await compliance_checker.check_many([{"environment": "prod", "standards": ["SOC2"]}])
+
+    with patch.object(
+        compliance_checker, "_generate_response", new=AsyncMock(return_value="plan")
+    ) as generate:
+        await compliance_checker.generate_remediation_plan(report)
+
+    prompt = generate.await_args.args[0]
+    assert "- Total Violations: 4\n- Critical: 1\n- High: 2\n" in prompt
+
+
+@pytest.mark.asyncio
+async def test_audit_trail_is_written_to_sink(compliance_checker, tmp_path):
+    """Test the report keeps a pointer and summary instead of the audit entries."""
+    audit_trail = [
+        {"check": "encryption at rest", "status": "fail"},
+        {"check": "audit logging", "status": "pass"},
+        {"check": "mfa", "status": "pass"},
+        {"check": "backups"},
+    ]
+    with patch.object(
+        compliance_checker, "_generate_structured_batch",
+        new=AsyncMock(return_value=[
+            {"overall_score": 80, "violations": [], "audit_trail": audit_trail},
+            {"overall_score": 90, "violations": []},
+        ]),
+    ):
+        with_trail, without_trail = await compliance_checker.check_many([
+            {"environment": "prod", "standards": ["SOC2"]},
+            {"environment": "dev", "standards": ["SOC2"]},
+        ])
+
+    assert with_trail.audit_trail_summary == {"fail": 1, "pass": 2, "unknown": 1}
+    path = Path(urlparse(with_trail.audit_trail_uri).path)
+    assert path.parent == tmp_path.resolve()
+    assert [orjson.loads(line) for line in path.read_bytes().splitlines()] == audit_trail
+
+    assert without_trail.audit_trail_uri is None
+    assert without_trail.audit_trail_summary == {}
+
+
+@pytest.mark.asyncio
+async def test_audit_trail_is_only_summarized_without_audit_dir(test_config, tmp_path, monkeypatch):
+    """Test no file is written unless an audit directory is configured."""
+    monkeypatch.chdir(tmp_path)
+    checker = ComplianceCheckerAgent(model="gpt-4-turbo-preview")
+    audit_trail = [{"check": "mfa", "status": "pass"}, {"check": "backups", "status": "fail"}]
+
+    with patch.object(
+        checker, "_generate_structured_batch",
+        new=AsyncMock(return_value=[{"overall_score": 80, "violations": [], "audit_trail": audit_trail}]),
+    ):
+        [report] = await checker.check_many([{"environment": "prod", "standards": ["SOC2"]}])
+
+    assert report.audit_trail_uri is None
+    assert report.audit_trail_summary == {"pass": 1, "fail": 1}
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_each_standard_is_checked_by_its_own_call(compliance_checker):
+    """Test standards are analysed concurrently and merged into one report."""
+    _response_cache.clear()
+    analyses = {
+        "SOC2": {
+            "overall_score": 90,
+            "scores_by_standard": [{
+                "standard": "SOC2", "score": 90, "total_controls": 30,
+                "passing_controls": 27, "failing_controls": 3, "exempted_controls": 0,
+            }],
+            "violations": [_violation("high")],
+            "recommendations": ["Enable MFA", "Encrypt backups"],
+            "next_review_date": "2027-03-01",
+            "executive_summary": "Mostly compliant",
+        },
+        "HIPAA": {
+            "overall_score": 50,
+            "scores_by_standard": [{
+                "standard": "HIPAA", "score": 50, "total_controls": 10,
+                "passing_controls": 5, "failing_controls": 5, "exempted_controls": 0,
+            }],
+            "violations": [_violation("critical")],
+            "recommendations": ["Encrypt backups"],
+            "next_review_date": "2027-01-15",
+            "executive_summary": "PHI is not encrypted",
+        },
+    }
+    prompts = []
+
+    async def generate_structured(prompt, *args, **kwargs):
+        prompts.append(prompt)
+        standard = "SOC2" if "Standards: SOC2\n" in prompt else "HIPAA"
+        return analyses[standard]
+
+    compliance_checker.llm.generate_structured = generate_structured
+    report = await compliance_checker.execute(
+        environment="prod", standards=["SOC2", "HIPAA"], encryption_config={"at_rest": False}
+    )
+
+    assert len(prompts) == 2
+    assert report.standards_checked == ["SOC2", "HIPAA"]
+    assert report.overall_score == 80
+    assert [s.standard for s in report.scores_by_standard] == ["SOC2", "HIPAA"]
+    assert report.critical_violations == 1
+    assert report.recommendations == ["Enable MFA", "Encrypt backups"]
+    assert report.next_review_date == "2027-01-15"
+    assert report.executive_summary == "SOC2: Mostly compliant\nHIPAA: PHI is not encrypted"
+
+
+@pytest.mark.asyncio
+async def test_check_without_configuration_skips_llm(compliance_checker):
+    """Test a check with nothing to analyse returns an empty report without an LLM call."""
+    compliance_checker.llm.generate_structured = AsyncMock()
+
+    report = await compliance_checker.execute(environment="prod", standards=["SOC2"])
+
+    compliance_checker.llm.generate_structured.assert_not_awaited()
+    assert report.overall_score == 100
+    assert report.violations == []
+    assert report.executive_summary == "No artifacts provided"
@@ -0,0 +1,60 @@
+"""Tests for Configuration Drift Detector."""
+
+import pytest
+from aiops.agents.config_drift_detector import ConfigurationDriftDetector
+
+
+@pytest.mark.asyncio
+async def test_detect_drift_classifies_missing_extra_and_changed_keys():
+    """Test severities of missing, extra and changed keys."""
+    baseline = {"DATABASE_URL": "postgres://prod", "workers": 10, "timeout": 30, "log_level": "INFO"}
+    target = {"workers": 2, "timeout": 30, "log_level": "DEBUG", "debug": True}
+
+    result = await ConfigurationDriftDetector().detect_drift(baseline, target)
+
+    severities = {d.config_key: d.severity for d in result.drifts}
+    assert severities == {
+        "DATABASE_URL": "critical",
+        "workers": "high",
+        "log_level": "medium",
+        "debug": "medium",
+    }
+    assert result.total_configs == 5
+    assert result.compliance_status == "critical_drift"
+
+
+@pytest.mark.asyncio
+async def test_detect_drift_uses_custom_critical_keys():
+    """Test caller-supplied critical keys replace the defaults."""
+    result = await ConfigurationDriftDetector().detect_drift(
+        {"feature_flags": "a", "auth_provider": "okta"},
+        {"feature_flags": "b", "auth_provider": "auth0"},
+        critical_keys=["Feature"],
+    )
+
+    severities = {d.config_key: d.severity for d in result.drifts}
+    assert severities == {"feature_flags": "critical", "auth_provider": "medium"}
+
+
+@pytest.mark.asyncio
+async def test_detect_drift_does_not_compare_booleans_as_numbers():
+    """Test a toggled flag is a plain value difference, not a 100% numeric change."""
+    result = await ConfigurationDriftDetector().detect_drift({"cache_enabled": True}, {"cache_enabled": False})
+
+    [drift] = result.drifts
+    assert drift.severity == "medium"
+    assert drift.impact == "Configuration value differs between environments"
+
+
+@pytest.mark.asyncio
+async def test_detect_drift_identical_configs_are_compliant():
+    """Test equal configs short-circuit to a compliant result."""
+    config = {"workers": 4, "log_level": "INFO"}
+
+    result = await ConfigurationDriftDetector().detect_drift(config, dict(config))
+
+    assert result.drifts == []
+    assert result.total_configs == 2
+    assert result.drift_score == 100.0
+    assert result.compliance_status == "compliant"
+    assert result.recommendations == []
@@ -0,0 +1,68 @@
+"""Tests for Container Security Scanner."""
+
+import pytest
+from aiops.agents.container_security import ContainerSecurityScanner
+
+
+@pytest.mark.asyncio
+async def test_scan_dockerfile_flags_insecure_dockerfile():
+    """Test each check fires on a Dockerfile that breaks every rule."""
+    dockerfile = (
+        "FROM ubuntu:latest\n"
+        "ENV API_KEY=abc123\n"
+        "RUN apt-get install -y curl\n"
+        "CMD [\"./app\"]\n"
+    )
+
+    result = await ContainerSecurityScanner().scan_dockerfile(dockerfile)
+
+    assert result.misconfigurations == [
+        "Container runs as root user",
+        "Using 'latest' tag or no specific version",
+        "Potential hardcoded secrets in Dockerfile",
+        "Installing recommended packages unnecessarily",
+        "Not cleaning package manager cache",
+        "Missing HEALTHCHECK instruction",
+        "No ports explicitly exposed",
+    ]
+    assert [v.severity for v in result.vulnerabilities] == ["critical", "high"]
+
+
+@pytest.mark.asyncio
+async def test_scan_dockerfile_accepts_hardened_dockerfile():
+    """Test a hardened Dockerfile passes, with instructions matched case-insensitively."""
+    dockerfile = (
+        "FROM python:3.11-slim\n"
+        "RUN apt-get install -y --no-install-recommends curl && apt-get clean\n"
+        "expose 8000\n"
+        "HEALTHCHECK CMD curl -f http://localhost:8000/health\n"
+        "ENV APP_USERNAME=app\n"
+        "user app\n"
+    )
+
+    result = await ContainerSecurityScanner().scan_dockerfile(dockerfile)
+
+    assert result.misconfigurations == []
+    assert result.vulnerabilities == []
+    assert result.security_score == 100.0
+
+
+@pytest.mark.asyncio
+async def test_scan_dockerfile_parses_instructions_not_substrings():
+    """Test comments are ignored and continued RUN lines are read as one instruction."""
+    dockerfile = (
+        "# USER and HEALTHCHECK are added by the base image\n"
+        "FROM --platform=linux/amd64 registry.local:5000/python:3.11-slim AS build\n"
+        "RUN apt-get update && \\\n"
+        "    apt-get install -y \\\n"
+        "      --no-install-recommends curl && \\\n"
+        "    apt-get clean\n"
+        "EXPOSE 8000\n"
+    )
+
+    result = await ContainerSecurityScanner().scan_dockerfile(dockerfile)
+
+    assert result.misconfigurations == [
+        "Container runs as root user",
+        "Missing HEALTHCHECK instruction",
+    ]
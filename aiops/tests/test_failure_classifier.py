@@ -0,0 +1,38 @@
+"""Tests for build failure classification."""
+
+from aiops.core.failure_classifier import classify_failure
+
+
+def test_classify_oom_takes_precedence_over_test_failures():
+    """Test infrastructure signatures win over the test failures they cause."""
+    logs = (
+        "$ pytest -n 8\n"
+        "worker gw3 crashed: exit code 137\n"
+        "===== 3 failed, 120 passed in 42.0s =====\n"
+    )
+
+    result = classify_failure(logs)
+
+    assert result["failure_category"] == "infrastructure"
+    assert result["failed_step"] == "pytest -n 8"
+    assert result["error_summary"] == "worker gw3 crashed: exit code 137"
+
+
+def test_classify_failing_tests_and_github_step():
+    """Test failing tests are attributed to the last step started."""
+    logs = (
+        "##[group]Run npm ci\n"
+        "added 812 packages\n"
+        "##[group]Run go test ./...\n"
+        "--- FAIL: TestParse (0.00s)\n"
+    )
+
+    result = classify_failure(logs)
+
+    assert result["failure_category"] == "test"
+    assert result["failed_step"] == "go test ./..."
+
+
+def test_classify_unknown_failure_returns_none():
+    """Test logs without a known signature are left to the LLM."""
+    assert classify_failure("Step 3/7 : RUN make\nmake: *** [all] Error 2\n") is None
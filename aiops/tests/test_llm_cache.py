@@ -0,0 +1,77 @@
+"""Tests for the LLM output cache."""
+
+import pytest
+from types import SimpleNamespace
+from pydantic import BaseModel
+from aiops.core.llm_cache import llm_cache
+
+
+class Answer(BaseModel):
+    text: str
+
+
+class Agent:
+    def __init__(self, llm=None):
+        self.calls = 0
+        if llm is not None:
+            self.llm = llm
+
+    @llm_cache(ttl=60, cache_if=lambda answer: answer.text != "failed")
+    async def ask(self, question: str, context=None) -> Answer:
+        self.calls += 1
+        return Answer(text="failed" if question == "bad" else question.upper())
+
+
+@pytest.mark.asyncio
+async def test_llm_cache_hit_returns_fresh_copy():
+    """Test repeated calls are served from the cache as new instances."""
+    Agent.ask.clear_cache()
+    agent = Agent()
+
+    first = await agent.ask("hello", context={"b": 1, "a": 2})
+    second = await Agent().ask("hello", context={"a": 2, "b": 1})
+
+    assert agent.calls == 1
+    assert second == first
+    assert second is not first
+
+
+@pytest.mark.asyncio
+async def test_llm_cache_skips_rejected_results():
+    """Test results rejected by cache_if are not cached."""
+    Agent.ask.clear_cache()
+    agent = Agent()
+
+    await agent.ask("bad")
+    await agent.ask("bad")
+    await agent.ask("other")
+
+    assert agent.calls == 3
+    assert Agent.ask.cache_size() == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_cache_keys_on_model():
+    """Test instances using different models do not share cached results."""
+    Agent.ask.clear_cache()
+    gpt = SimpleNamespace(provider="openai", model="gpt-4o", temperature=0.0)
+    claude = SimpleNamespace(provider="anthropic", model="claude-3-5-sonnet", temperature=0.0)
+    agents = [Agent(gpt), Agent(claude), Agent(gpt)]
+
+    for agent in agents:
+        await agent.ask("hello")
+
+    assert [agent.calls for agent in agents] == [1, 1, 0]
+
+
+@pytest.mark.asyncio
+async def test_llm_cache_skips_sampled_results():
+    """Test instances sampling at a high temperature are not cached."""
+    Agent.ask.clear_cache()
+    agent = Agent(SimpleNamespace(provider="openai", model="gpt-4o", temperature=0.7))
+
+    await agent.ask("hello")
+    await agent.ask("hello")
+
+    assert agent.calls == 2
+    assert Agent.ask.cache_size() == 0
@@ -88,6 +88,29 @@ async def test_openai_generate():
         mock_instance.ainvoke.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_openai_generate_passes_prompt_cache_key():
+    """Test OpenAI sends the prompt cache key in the request body, keeping the retention setting."""
+    config = {"api_key": "test_key", "model": "gpt-4", "temperature": 0.7, "prompt_cache_retention": "24h"}
+
+    with patch("aiops.core.llm_factory.ChatOpenAI") as mock_chat:
+        mock_instance = AsyncMock()
+        mock_instance.ainvoke = AsyncMock(
+            return_value=AsyncMock(content="Test response")
+        )
+        mock_chat.return_value = mock_instance
+
+        llm = OpenAILLM(config)
+        await llm.generate("Test prompt", "System prompt", prompt_cache_key="TestAgent")
+        assert mock_instance.ainvoke.call_args.kwargs["extra_body"] == {
+            "prompt_cache_key": "TestAgent",
+            "prompt_cache_retention": "24h",
+        }
+
+        await llm.generate("Test prompt")
+        assert "extra_body" not in mock_instance.ainvoke.call_args.kwargs
+
+
 @pytest.mark.asyncio
 async def test_anthropic_generate():
     """Test Anthropic generate method."""
@@ -105,3 +128,207 @@ async def test_anthropic_generate():
 
         assert response == "Test response"
         mock_instance.ainvoke.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_anthropic_generate_passes_max_tokens():
+    """Test a per-request max_tokens is forwarded only when given."""
+    config = {"api_key": "test_key", "model": "claude-3-5-sonnet-20241022", "temperature": 0.7}
+
+    with patch("aiops.core.llm_factory.ChatAnthropic") as mock_chat:
+        mock_instance = AsyncMock()
+        mock_instance.ainvoke = AsyncMock(
+            return_value=AsyncMock(content="Test response")
+        )
+        mock_chat.return_value = mock_instance
+
+        llm = AnthropicLLM(config)
+        await llm.generate("Test prompt", max_tokens=1500)
+        assert mock_instance.ainvoke.call_args.kwargs["max_tokens"] == 1500
+
+        await llm.generate("Test prompt")
+        assert "max_tokens" not in mock_instance.ainvoke.call_args.kwargs
+
+
+@pytest.mark.asyncio
+async def test_openai_generate_structured_batch():
+    """Test OpenAI structured batch submits all prompts at once."""
+    config = {"api_key": "test_key", "model": "gpt-4", "temperature": 0.7}
+
+    with patch("aiops.core.llm_factory.ChatOpenAI") as mock_chat:
+        structured = AsyncMock()
+        structured.abatch = AsyncMock(return_value=[{"a": 1}, {"a": 2}])
+        mock_instance = AsyncMock()
+        mock_instance.with_structured_output = lambda schema: structured
+        mock_chat.return_value = mock_instance
+
+        llm = OpenAILLM(config)
+        responses = await llm.generate_structured_batch(["p1", "p2"], {}, "System prompt")
+
+        assert responses == [{"a": 1}, {"a": 2}]
+        structured.abatch.assert_called_once()
+        batch = structured.abatch.call_args.args[0]
+        assert len(batch) == 2
+        assert batch[0][0].content == "System prompt"
+
+
+@pytest.mark.asyncio
+async def test_openai_generate_structured_stream():
+    """Test OpenAI structured stream yields partial dicts from a JSON schema."""
+    from pydantic import BaseModel
+
+    class Result(BaseModel):
+        items: list
+
+    config = {"api_key": "test_key", "model": "gpt-4", "temperature": 0.7}
+
+    async def astream(messages, config=None):
+        yield {"items": [1]}
+        yield {"items": [1, 2]}
+
+    with patch("aiops.core.llm_factory.ChatOpenAI") as mock_chat:
+        schemas = []
+        structured = AsyncMock()
+        structured.astream = astream
+        mock_instance = AsyncMock()
+        mock_instance.with_structured_output = lambda schema: schemas.append(schema) or structured
+        mock_chat.return_value = mock_instance
+
+        llm = OpenAILLM(config)
+        partials = [p async for p in llm.generate_structured_stream("Test prompt", Result)]
+
+        assert partials == [{"items": [1]}, {"items": [1, 2]}]
+        assert schemas[0]["title"] == "Result"
+
+
+def test_anthropic_system_prompt_is_cacheable():
+    """Test Anthropic marks the system prompt as a cache breakpoint."""
+    config = {"api_key": "test_key", "model": "claude-3-5-sonnet-20241022", "temperature": 0.7}
+
+    with patch("aiops.core.llm_factory.ChatAnthropic"):
+        llm = AnthropicLLM(config)
+
+        cached = llm._system_message("System prompt")
+        assert cached.content == [
+            {"type": "text", "text": "System prompt", "cache_control": {"type": "ephemeral"}}
+        ]
+        assert llm._system_message("System prompt", cacheable=False).content == "System prompt"
+
+
+def test_cache_token_usage_from_provider_usage():
+    """Test prompt-cache token counts are read from OpenAI and Anthropic usage."""
+    from aiops.core.llm_factory import _cache_token_usage
+
+    openai_usage = {"prompt_tokens": 2000, "prompt_tokens_details": {"cached_tokens": 1536}}
+    anthropic_usage = {
+        "input_tokens": 50,
+        "cache_creation_input_tokens": 1200,
+        "cache_read_input_tokens": 0,
+    }
+
+    assert _cache_token_usage(openai_usage) == {
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 1536,
+    }
+    assert _cache_token_usage(anthropic_usage) == {
+        "cache_creation_input_tokens": 1200,
+        "cache_read_input_tokens": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_openai_generate_batch_maps_results_by_custom_id():
+    """Test OpenAI batch results are returned in prompt order."""
+    import orjson
+    from types import SimpleNamespace
+
+    config = {"api_key": "test_key", "model": "gpt-4", "temperature": 0.7}
+    output = b"\n".join([
+        orjson.dumps({"custom_id": "1", "error": {"message": "rate limited"}}),
+        orjson.dumps({
+            "custom_id": "0",
+            "response": {"body": {"choices": [{"message": {"content": "first"}}]}},
+        }),
+    ])
+
+    client = AsyncMock()
+    client.files.create = AsyncMock(return_value=SimpleNamespace(id="file-in"))
+    client.batches.create = AsyncMock(
+        return_value=SimpleNamespace(id="batch-1", status="in_progress", output_file_id=None)
+    )
+    client.batches.retrieve = AsyncMock(
+        return_value=SimpleNamespace(id="batch-1", status="completed", output_file_id="file-out")
+    )
+    client.files.content = AsyncMock(return_value=SimpleNamespace(text=output.decode()))
+
+    with patch("openai.AsyncOpenAI", return_value=client):
+        llm = OpenAILLM(config)
+        results = await llm.generate_batch(["p0", "p1"], "System prompt", poll_interval=0)
+
+    assert results[0] == "first"
+    assert isinstance(results[1], RuntimeError)
+    submitted = client.files.create.call_args.kwargs["file"][1].split(b"\n")
+    assert orjson.loads(submitted[0])["body"]["messages"][0]["content"] == "System prompt"
+
+
+@pytest.mark.asyncio
+async def test_structured_output_is_bound_once_per_schema():
+    """Test the structured-output runnable is reused across calls."""
+    config = {"api_key": "test_key", "model": "gpt-4", "temperature": 0.7}
+
+    with patch("aiops.core.llm_factory.ChatOpenAI") as mock_chat:
+        structured = AsyncMock()
+        structured.ainvoke = AsyncMock(return_value={"a": 1})
+        mock_instance = AsyncMock()
+        bound = []
+        mock_instance.with_structured_output = lambda schema: bound.append(schema) or structured
+        mock_chat.return_value = mock_instance
+
+        llm = OpenAILLM(config)
+        await llm.generate_structured("p1", {"title": "A"})
+        await llm.generate_structured("p2", {"title": "A"})
+
+        assert len(bound) == 1
+        assert structured.ainvoke.await_count == 2
+
+
+def test_openai_uses_configured_base_url():
+    """Test an OpenAI-compatible endpoint is passed to the client only when set."""
+    config = {"api_key": "test_key", "model": "gpt-4", "temperature": 0.7}
+
+    with patch("aiops.core.llm_factory.ChatOpenAI") as mock_chat:
+        OpenAILLM({**config, "base_url": "http://localhost:8001/v1"})
+        assert mock_chat.call_args.kwargs["base_url"] == "http://localhost:8001/v1"
+
+        OpenAILLM(config)
+        assert "base_url" not in mock_chat.call_args.kwargs
+
+
+def test_openai_binds_json_schema_on_self_hosted_endpoint():
+    """Test structured output uses a guided JSON schema only on custom endpoints."""
+    from pydantic import BaseModel
+
+    class Verdict(BaseModel):
+        ok: bool
+
+    config = {"api_key": "test_key", "model": "gpt-4", "temperature": 0.7}
+
+    with patch("aiops.core.llm_factory.ChatOpenAI") as mock_chat:
+        OpenAILLM({**config, "base_url": "http://localhost:8001/v1"})._structured_llm(Verdict)
+        assert mock_chat.return_value.with_structured_output.call_args.kwargs == {"method": "json_schema"}
+
+        OpenAILLM(config)._structured_llm(Verdict)
+        assert mock_chat.return_value.with_structured_output.call_args.kwargs == {}
+
+
+def test_openai_llms_share_one_http_client():
+    """Test every OpenAI model reuses the process-wide pooled HTTP client."""
+    from aiops.core.http import get_async_client
+
+    with patch("aiops.core.llm_factory.ChatOpenAI") as mock_chat:
+        OpenAILLM({"api_key": "test_key", "model": "gpt-4"})
+        OpenAILLM({"api_key": "test_key", "model": "gpt-4o-mini"})
+
+    clients = [call.kwargs["http_async_client"] for call in mock_chat.call_args_list]
+    assert clients[0] is clients[1] is get_async_client()
+    assert not clients[0].is_closed
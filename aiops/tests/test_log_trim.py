@@ -0,0 +1,41 @@
+"""Tests for log trimming."""
+
+from aiops.core.log_trim import trim_logs
+from aiops.core.tokenizer import TRUNCATION_MARKER
+
+
+def test_trim_logs_strips_ansi_and_timestamps():
+    """Test color codes and leading timestamps are removed."""
+    logs = "2024-01-01T12:00:00.123Z \x1b[31mERROR\x1b[0m build failed\n[2024-01-01 12:00:01,5] INFO done"
+
+    assert trim_logs(logs) == "ERROR build failed\nINFO done"
+    assert trim_logs(logs, strip_noise=False) == logs
+
+
+def test_trim_logs_dedupes_repeated_frames():
+    """Test frames repeated across traces are collapsed to a count."""
+    trace = (
+        "Traceback (most recent call last):\n"
+        '  File "app.py", line 10, in main\n'
+        "    run()\n"
+        '  File "app.py", line 5, in run\n'
+        "    fail()\n"
+        "ValueError: boom"
+    )
+
+    trimmed = trim_logs(f"{trace}\n{trace}", dedupe_frames=True)
+
+    assert trimmed.count('File "app.py", line 10') == 1
+    assert trimmed.count("ValueError: boom") == 2
+    assert "    ... 2 repeated frames omitted" in trimmed
+    assert trimmed.count("    run()") == 1
+
+
+def test_trim_logs_keeps_tail_within_budget():
+    """Test long logs keep their most recent lines."""
+    logs = "\n".join(f"INFO step {i}" for i in range(2000)) + "\nERROR final failure"
+
+    trimmed = trim_logs(logs, max_tokens=50)
+
+    assert trimmed.startswith(TRUNCATION_MARKER)
+    assert trimmed.endswith("ERROR final failure")
@@ -0,0 +1,20 @@
+"""Tests for token-aware truncation."""
+
+from aiops.core.tokenizer import TRUNCATION_MARKER, truncate_tail
+
+
+def test_truncate_tail_keeps_short_text():
+    """Test text within budget is returned unchanged."""
+    assert truncate_tail("ERROR db down", max_tokens=100) == "ERROR db down"
+
+
+def test_truncate_tail_keeps_most_recent_lines():
+    """Test long text keeps its tail and is marked as truncated."""
+    logs = "\n".join(f"INFO line {i}" for i in range(2000)) + "\nERROR final failure"
+
+    truncated = truncate_tail(logs, max_tokens=50, model="gpt-4")
+
+    assert truncated.startswith(TRUNCATION_MARKER)
+    assert truncated.endswith("ERROR final failure")
+    assert len(truncated) < len(logs)
+    assert truncate_tail(logs, max_tokens=50, model="gpt-4") == truncated
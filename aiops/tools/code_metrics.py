@@ -0,0 +1,315 @@
+"""Deterministic code metrics: complexity, nesting, maintainability and duplication."""
+
+import ast
+import bisect
+import hashlib
+import io
+import keyword
+import math
+import re
+import tokenize
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+# Nodes that add a decision point to McCabe cyclomatic complexity
+_DECISION_NODES = (
+    ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp,
+    ast.ExceptHandler, ast.With, ast.AsyncWith, ast.Assert, ast.comprehension,
+)
+
+# Nodes that increase nesting for cognitive complexity and nesting depth
+_NESTING_NODES = (
+    ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.ExceptHandler,
+    ast.With, ast.AsyncWith,
+)
+
+_FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+if hasattr(ast, "Match"):
+    _DECISION_NODES += (ast.match_case,)
+    _NESTING_NODES += (ast.Match,)
+if hasattr(ast, "TryStar"):
+    _NESTING_NODES += (ast.TryStar,)
+
+_WORD_RE = re.compile(r"[A-Za-z_]\w*")
+_LITERAL_RE = re.compile(r"\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+# Import/include lines look alike once normalized and are not worth reporting
+_IMPORT_PREFIXES = ("import ", "from ", "#include", "using ", "require ", "package ")
+
+# Occurrences of one window considered by find_duplicate_blocks; later ones
+# can still be reported by extending a run over them
+_MAX_WINDOW_OCCURRENCES = 32
+
+
+def _own_nodes(node: ast.AST):
+    """Walk a function body without descending into nested functions or classes."""
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        if isinstance(child, _FUNCTION_NODES + (ast.ClassDef, ast.Lambda)):
+            continue
+        yield child
+        stack.extend(ast.iter_child_nodes(child))
+
+
+def _cyclomatic(func: ast.AST) -> int:
+    """McCabe cyclomatic complexity of a single function."""
+    complexity = 1
+    for node in _own_nodes(func):
+        if isinstance(node, _DECISION_NODES):
+            complexity += 1
+        elif isinstance(node, ast.BoolOp):
+            complexity += len(node.values) - 1
+    return complexity
+
+
+def _cognitive(node: ast.AST, nesting: int = 0) -> int:
+    """
+    Cognitive complexity of a function body.
+
+    Control flow structures cost one plus their nesting level, and each
+    boolean operator sequence costs one.
+    """
+    total = 0
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, _FUNCTION_NODES + (ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(child, _NESTING_NODES) and not isinstance(child, (ast.Try, ast.With, ast.AsyncWith)):
+            total += 1 + nesting
+        elif isinstance(child, ast.BoolOp):
+            total += 1
+        elif isinstance(child, ast.IfExp):
+            total += 1 + nesting
+        total += _cognitive(child, nesting + isinstance(child, _NESTING_NODES))
+    return total
+
+
+def _max_nesting(node: ast.AST, depth: int = 0) -> int:
+    """Deepest nesting of control flow blocks below node."""
+    deepest = depth
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, _FUNCTION_NODES + (ast.ClassDef, ast.Lambda)):
+            continue
+        deepest = max(deepest, _max_nesting(child, depth + isinstance(child, _NESTING_NODES)))
+    return deepest
+
+
+def _halstead_volume(code: str) -> float:
+    """Halstead volume from the operator and operand tokens of Python code."""
+    operators: Dict[str, int] = defaultdict(int)
+    operands: Dict[str, int] = defaultdict(int)
+
+    for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+        if tok.type == tokenize.OP or (tok.type == tokenize.NAME and keyword.iskeyword(tok.string)):
+            operators[tok.string] += 1
+        elif tok.type in (tokenize.NAME, tokenize.NUMBER, tokenize.STRING):
+            operands[tok.string] += 1
+
+    length = sum(operators.values()) + sum(operands.values())
+    vocabulary = len(operators) + len(operands)
+    return length * math.log2(vocabulary) if vocabulary > 1 else 0.0
+
+
+def _lines_of_code(code: str) -> int:
+    """Count non-blank, non-comment lines."""
+    return sum(1 for line in code.splitlines() if line.strip() and not line.lstrip().startswith("#"))
+
+
+def python_complexity(code: str) -> Dict[str, Any]:
+    """
+    Compute complexity metrics for Python source.
+
+    Args:
+        code: Python source code
+
+    Returns:
+        Overall and per-function cyclomatic and cognitive complexity, nesting
+        depth, lines of code and maintainability index (0-100)
+
+    Raises:
+        SyntaxError: If the code cannot be parsed
+    """
+    tree = ast.parse(code)
+
+    functions = [
+        {
+            "name": node.name,
+            "line": node.lineno,
+            "cyclomatic_complexity": _cyclomatic(node),
+            "cognitive_complexity": _cognitive(node),
+            "max_nesting": _max_nesting(node),
+        }
+        for node in ast.walk(tree)
+        if isinstance(node, _FUNCTION_NODES)
+    ]
+    functions.sort(key=lambda f: f["line"])
+
+    module_complexity = _cyclomatic(tree)
+    cyclomatic = sum(f["cyclomatic_complexity"] for f in functions) + module_complexity - 1
+    loc = _lines_of_code(code)
+    volume = _halstead_volume(code)
+
+    # SEI maintainability index, rescaled to 0-100
+    if loc:
+        mi = 171 - 5.2 * math.log(max(volume, 1)) - 0.23 * cyclomatic - 16.2 * math.log(loc)
+        maintainability = round(max(0.0, min(100.0, mi * 100 / 171)), 2)
+    else:
+        maintainability = 100.0
+
+    return {
+        "cyclomatic_complexity": cyclomatic,
+        "cognitive_complexity": sum(f["cognitive_complexity"] for f in functions),
+        "average_nesting": (
+            round(sum(f["max_nesting"] for f in functions) / len(functions), 2) if functions else 0
+        ),
+        "max_nesting": max([_max_nesting(tree)] + [f["max_nesting"] for f in functions]),
+        "lines_of_code": loc,
+        "maintainability_index": maintainability,
+        "functions": functions,
+    }
+
+
+def _normalized_lines(code: str) -> List[Tuple[int, str]]:
+    """
+    Non-blank lines with identifiers and literals normalized away.
+
+    Renamed copies of a block therefore normalize to the same text.
+    Keywords are kept so that structure still distinguishes blocks. Comments
+    and import lines are skipped.
+    """
+    lines = []
+    for number, line in enumerate(code.splitlines(), 1):
+        text = line.strip()
+        if not text or text.startswith(("#", "//") + _IMPORT_PREFIXES):
+            continue
+        text = _LITERAL_RE.sub("LIT", text)
+        text = _WORD_RE.sub(lambda m: m.group() if keyword.iskeyword(m.group()) else "ID", text)
+        lines.append((number, _SPACE_RE.sub(" ", text)))
+    return lines
+
+
+def find_duplicate_blocks(code: str, min_lines: int = 6) -> List[Dict[str, Any]]:
+    """
+    Find blocks of at least min_lines lines that appear more than once.
+
+    Lines are normalized so renamed copies still match, then hashed over
+    every window of min_lines consecutive non-blank lines. Each occurrence
+    of a window is paired with the next one and extended into a maximal
+    run of matching lines. Short patterns repeated line after line (data
+    tables, generated assignments) are not reported, and blocks whose
+    copies lie entirely within longer reported blocks are left out.
+
+    Args:
+        code: Source code in any curly-brace or indentation-based language
+        min_lines: Minimum number of lines for a duplicate block
+
+    Returns:
+        One entry per duplicated block with the 1-based line ranges of each copy
+    """
+    lines = _normalized_lines(code)
+    if len(lines) < 2 * min_lines:
+        return []
+
+    windows: Dict[bytes, List[int]] = defaultdict(list)
+    for i in range(len(lines) - min_lines + 1):
+        window = "\n".join(text for _, text in lines[i:i + min_lines])
+        windows[hashlib.blake2b(window.encode(), digest_size=8).digest()].append(i)
+
+    # Window positions already inside a run, as sorted disjoint ranges per
+    # distance between the copies
+    covered: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+    runs = []
+    for starts in windows.values():
+        starts = starts[:_MAX_WINDOW_OCCURRENCES]
+        for first, other in zip(starts, starts[1:]):
+            offset = other - first
+            if offset < min_lines:
+                # The window overlaps its own next copy, so it is a short
+                # pattern repeated line after line
+                continue
+            ranges = covered[offset]
+            i = bisect.bisect_right(ranges, (first, len(lines))) - 1
+            if i >= 0 and ranges[i][0] <= first <= ranges[i][1]:
+                continue
+
+            a, b = first, other
+            while a > 0 and lines[a - 1][1] == lines[b - 1][1]:
+                a -= 1
+                b -= 1
+            length = min_lines
+            while b + length < len(lines) and lines[a + length][1] == lines[b + length][1]:
+                length += 1
+            bisect.insort(ranges, (a, a + length - min_lines))
+
+            # A run longer than the distance between its copies is a block
+            # repeated back to back
+            copies = (offset + length) // offset if length > offset else 2
+            runs.append((min(length, offset), [a + k * offset for k in range(copies)]))
+
+    # Longest blocks first, so shorter runs inside repeated code are dropped
+    reported = set()
+    blocks = []
+    for length, copies in sorted(runs, key=lambda run: (-run[0], run[1])):
+        copy_lines = {start + k for start in copies for k in range(length)}
+        if copy_lines <= reported:
+            continue
+        reported |= copy_lines
+        blocks.append((copies, length))
+
+    return [
+        {
+            "lines": length,
+            "locations": [(lines[start][0], lines[start + length - 1][0]) for start in copies],
+        }
+        for copies, length in sorted(blocks)
+    ]
+
+
+def split_top_level(code: str, max_chars: int) -> List[Tuple[int, str]]:
+    """
+    Split Python source into chunks of whole top-level definitions.
+
+    Consecutive top-level statements are grouped until a chunk would exceed
+    max_chars; a single definition larger than max_chars gets its own chunk.
+
+    Args:
+        code: Python source code
+        max_chars: Target maximum chunk size in characters
+
+    Returns:
+        (first line number, chunk source) pairs; the whole code as one chunk
+        if it is small enough or cannot be parsed
+    """
+    if len(code) <= max_chars:
+        return [(1, code)]
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return [(1, code)]
+    if not tree.body:
+        return [(1, code)]
+
+    lines = code.splitlines(keepends=True)
+    # Each top-level statement spans from its first line (decorators
+    # included) to the line before the next statement
+    starts = [
+        min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        for node in tree.body
+    ]
+    starts[0] = 1
+    bounds = list(zip(starts, starts[1:] + [len(lines) + 1]))
+
+    chunks: List[Tuple[int, str]] = []
+    chunk_start, chunk_end = bounds[0]
+    size = 0
+    for start, end in bounds:
+        text = "".join(lines[start - 1:end - 1])
+        if size and size + len(text) > max_chars:
+            chunks.append((chunk_start, "".join(lines[chunk_start - 1:chunk_end - 1])))
+            chunk_start, size = start, 0
+        chunk_end = end
+        size += len(text)
+    chunks.append((chunk_start, "".join(lines[chunk_start - 1:chunk_end - 1])))
+    return chunks
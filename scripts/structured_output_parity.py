@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Structured Output Parity Check
+
+Re-runs a captured set of code reviews against a baseline and a candidate
+model (e.g. a quantized variant) and compares how often each returns a
+response that validates against the review schema. Run it before switching
+DEFAULT_MODEL to the candidate.
+
+Each line of the input file is a JSON object with a "code" key and optional
+"language" and "context" keys.
+"""
+
+import sys
+import asyncio
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def load_reviews(path: Path) -> List[Dict[str, Any]]:
+    """Load captured review inputs, one JSON object per line"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def schema_compliance(model: str, reviews: List[Dict[str, Any]]) -> float:
+    """Fraction of reviews the model answered with a valid review"""
+    from aiops.agents.code_reviewer import CodeReviewAgent
+
+    # Deterministic sampling, and no cache: every review must reach the model
+    agent = CodeReviewAgent(model=model, temperature=0.0, cache_ttl=0)
+    results = await agent.execute_many(reviews)
+
+    # Reviews that fail to parse come back as the agent's fallback result
+    valid = sum(
+        1 for result in results
+        if not isinstance(result, Exception) and not result.summary.startswith("Review failed:")
+    )
+    return valid / len(reviews)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("reviews", type=Path, help="JSONL file of captured review inputs")
+    parser.add_argument("--baseline", required=True, help="Model currently in use")
+    parser.add_argument("--candidate", required=True, help="Model to switch to")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.0,
+        help="Allowed drop in schema compliance rate (default: 0.0)",
+    )
+    args = parser.parse_args()
+
+    reviews = load_reviews(args.reviews)
+    if not reviews:
+        print(f"✗ No reviews found in {args.reviews}")
+        return 1
+
+    print(f"Replaying {len(reviews)} reviews")
+    baseline = await schema_compliance(args.baseline, reviews)
+    print(f"  {args.baseline}: {baseline:.1%} schema compliant")
+    candidate = await schema_compliance(args.candidate, reviews)
+    print(f"  {args.candidate}: {candidate:.1%} schema compliant")
+
+    if candidate + args.tolerance < baseline:
+        print(f"\n✗ {args.candidate} is less schema compliant than {args.baseline}")
+        return 1
+
+    print(f"\n✓ {args.candidate} matches {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit_code = asyncio.run(main())
+    sys.exit(exit_code)